@@ -0,0 +1,70 @@
+"""
+Compression Middleware
+Negotiated gzip/brotli encoding for responses that were not compressed by their endpoint
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.infrastructure.compression import compress, compression_stats, is_compressible, negotiate_encoding
+
+settings = get_settings()
+
+
+class CompressionMiddleware:
+    """
+    Compress eligible responses with the best coding the client accepts
+
+    Responses are left alone when they already carry a Content-Encoding
+    (cached payloads are sent precompressed by the endpoint), are not JSON or
+    text, are smaller than `minimum_size`, or are streamed in several chunks.
+
+    Args:
+        app: Wrapped ASGI application
+        minimum_size: Smallest body, in bytes, worth compressing
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the body shows whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or not start_message:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            eligible = (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and is_compressible(headers.get("content-type"))
+                and len(body) >= self.minimum_size
+            )
+            if eligible:
+                encoded = compress(body, encoding)
+                compression_stats.record(encoding, len(body), len(encoded))
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(encoded))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": encoded}
+            await send(start_message)
+            start_message = {}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -5,6 +5,7 @@ FastAPI dependencies for dependency injection
 from fastapi import Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import verify_token
+from app.core.tracing import span
 
 security = HTTPBearer()
 
@@ -23,5 +24,6 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         HTTPException: If token is invalid
     """
     token = credentials.credentials
-    return verify_token(token)
+    with span("auth"):
+        return verify_token(token)
 
@@ -0,0 +1,96 @@
+"""
+HTTP Caching
+Strong ETag / Last-Modified validators and conditional GET handling for JSON responses
+"""
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from app.core.config import get_settings
+from app.core.tracing import span
+from app.infrastructure.compression import compression_stats, negotiate_encoding
+from app.infrastructure.payload import Payload
+
+settings = get_settings()
+
+# Warning header (RFC 7234 5.5) per reason a stale payload was served
+STALE_WARNINGS = {
+    "revalidating": '110 - "Response is Stale"',
+    "error": '111 - "Revalidation Failed"',
+}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2)
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified_since(if_modified_since: str, last_modified: str) -> bool:
+    """
+    Whether a resource last modified at `last_modified` is unchanged since If-Modified-Since
+    """
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+        modified = parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        return False
+    return modified <= since
+
+
+def payload_response(request: Request, payload: Payload, max_age: Optional[int] = None) -> Response:
+    """
+    Build the response for a JSON payload, honouring conditional request headers
+
+    The ETag and body are cached on the payload, so a 304 costs neither
+    serialization nor hashing once the payload has been served before. Large
+    bodies are sent with the negotiated content coding; the compressed bytes
+    are kept on the payload too, so cached documents are compressed only once.
+    Each coding is a distinct representation and gets its own strong ETag.
+    Payloads served from an expired cache entry carry a Warning header.
+
+    Args:
+        request: Incoming request (If-None-Match / If-Modified-Since are read from it)
+        payload: Document to send
+        max_age: Cache-Control max-age in seconds (HTTP_CACHE_MAX_AGE by default)
+
+    Returns:
+        304 Not Modified if the client copy is current, otherwise 200 with the JSON body
+    """
+    with span("serialize"):
+        body = payload.body
+        etag = payload.etag
+    encoding = None
+    if settings.COMPRESSION_ENABLED and len(body) >= settings.COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        etag = f'{etag[:-1]}-{encoding}"'
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": payload.last_modified,
+        # Responses require authentication, so shared caches must not store them
+        "Cache-Control": f"private, max-age={settings.HTTP_CACHE_MAX_AGE if max_age is None else max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if payload.stale is not None:
+        headers["Warning"] = STALE_WARNINGS[payload.stale]
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    else:
+        not_modified = if_modified_since is not None and not_modified_since(if_modified_since, payload.last_modified)
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if encoding is not None:
+        precompressed = payload.is_encoded(encoding)
+        with span("compress"):
+            content = payload.encoded(encoding)
+        compression_stats.record(encoding, len(body), len(content), precompressed=precompressed)
+        headers["Content-Encoding"] = encoding
+        return Response(content=content, media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,152 @@
+"""
+Metrics Middleware
+Per-route request latency histograms, plus scrape-time collectors for cache, upstream and limiter state
+"""
+import time
+from typing import Iterable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.rate_limit import load_shedder, login_limiter, user_limiter
+from app.core.config import get_settings
+from app.infrastructure.compression import compression_stats
+from app.infrastructure.metrics import Collected, LoopLagMonitor, metrics
+from app.infrastructure.pokeapi_client import pokeapi_client
+from app.services.pokemon_service import pokemon_service
+
+settings = get_settings()
+
+# Lag is normally well under a millisecond; anything near a second is an outage
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+requests_in_flight = metrics.gauge("http_requests_in_flight", "Requests currently being handled").labels()
+request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Request latency by method, route template and status (the _count series is the request count)",
+    ("method", "route", "status"),
+)
+loop_lag = LoopLagMonitor(
+    metrics.histogram("event_loop_lag_seconds", "Delay of event loop callbacks", buckets=LOOP_LAG_BUCKETS).labels(),
+    interval=settings.METRICS_LOOP_LAG_INTERVAL,
+)
+
+
+class MetricsMiddleware:
+    """
+    Record latency and status of every HTTP request
+
+    Requests are labelled with the route template (e.g. /pokemons/{pokemon_id})
+    rather than the raw path, and unmatched paths share one label, so the
+    number of series stays bounded whatever clients request.
+
+    Args:
+        app: Wrapped ASGI application
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.labels(scope["method"], route, status_code).observe(time.perf_counter() - started)
+
+
+def collect_service_state() -> Iterable[Collected]:
+    """Counters kept by the cache, PokeAPI client, limiters and prefetcher, as metric samples"""
+    cache = pokemon_service.cache_stats()
+    if cache is not None:
+        tiers = [(tier, counters) for tier, counters in cache.items() if tier != "stale_served"]
+        for field in ("hits", "misses", "evictions", "errors"):
+            yield (
+                f"pokemon_cache_{field}_total", "counter", f"Response cache {field} per tier",
+                [({"tier": tier}, counters[field]) for tier, counters in tiers],
+            )
+        yield (
+            "pokemon_cache_hit_ratio", "gauge", "Response cache hits / lookups per tier",
+            [
+                ({"tier": tier}, counters["hits"] / lookups if lookups else 0.0)
+                for tier, counters in tiers
+                for lookups in (counters["hits"] + counters["misses"],)
+            ],
+        )
+        yield (
+            "pokemon_cache_entries", "gauge", "Entries in the in-memory cache",
+            [({}, cache["memory"]["entries"])],
+        )
+        yield (
+            "pokemon_cache_stale_served_total", "counter", "Stale cache entries served, by reason",
+            [({"reason": reason}, count) for reason, count in cache["stale_served"].items()],
+        )
+
+    upstream = pokeapi_client.health()
+    breaker = upstream.get("circuit_breaker")
+    if breaker is not None:
+        yield (
+            "pokeapi_circuit_breaker_state", "gauge", "1 for the current circuit breaker state",
+            [({"state": state}, int(breaker["state"] == state)) for state in ("closed", "open", "half_open")],
+        )
+        yield ("pokeapi_circuit_breaker_opened_total", "counter", "Times the breaker opened", [({}, breaker["times_opened"])])
+    for field in ("retries", "hedges"):
+        if field in upstream:
+            yield (f"pokeapi_{field}_total", "counter", f"PokeAPI {field} sent", [({}, upstream[field])])
+    if "retry_budget" in upstream:
+        yield (
+            "pokeapi_retry_budget_tokens", "gauge", "Retries/hedges currently allowed by the retry budget",
+            [({}, upstream["retry_budget"]["tokens"])],
+        )
+    rate_limit = upstream.get("rate_limit")
+    if rate_limit is not None:
+        yield ("pokeapi_rate_limit_queue_depth", "gauge", "Requests waiting for an outbound token", [({}, rate_limit["queue_depth"])])
+        yield ("pokeapi_rate_limit_delayed_total", "counter", "Requests that waited for a token", [({}, rate_limit["delayed"])])
+        yield (
+            "pokeapi_rate_limit_wait_seconds_total", "counter", "Time spent waiting for outbound tokens",
+            [({}, rate_limit["wait_seconds_total"])],
+        )
+
+    yield (
+        "http_rate_limited_total", "counter", "Requests answered 429 by the inbound rate limits",
+        [({"limiter": "user"}, user_limiter.limited), ({"limiter": "login"}, login_limiter.limited)],
+    )
+    shedding = load_shedder.snapshot()
+    yield ("http_load_shed_queued", "gauge", "Requests waiting for a concurrency slot", [({}, shedding["queued"])])
+    yield (
+        "http_load_shed_total", "counter", "Requests answered 503 by the load shedder",
+        [({"reason": "queue_full"}, shedding["shed"]), ({"reason": "queue_timeout"}, shedding["timed_out"])],
+    )
+
+    prefetch = pokemon_service.prefetcher.stats()
+    yield ("prefetch_pending", "gauge", "Prefetch jobs queued or running", [({}, prefetch["pending"])])
+    yield (
+        "prefetch_jobs_total", "counter", "Prefetch jobs by outcome",
+        [({"outcome": outcome}, prefetch[outcome]) for outcome in ("completed", "failed", "dropped")],
+    )
+
+    compression = compression_stats.as_dict()
+    yield (
+        "compression_bytes_total", "counter", "Response bytes before and after compression",
+        [
+            ({"encoding": encoding, "stage": stage}, counters[f"{stage}_bytes"])
+            for encoding, counters in compression.items()
+            for stage in ("identity", "encoded")
+        ],
+    )
+    yield ("event_loop_lag_last_seconds", "gauge", "Most recent event loop lag measurement", [({}, loop_lag.last)])
+
+
+metrics.register_collector(collect_service_state)
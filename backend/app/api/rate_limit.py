@@ -0,0 +1,133 @@
+"""
+Rate Limit Middleware
+Per-subject request limits and load shedding in front of /pokemons and /login
+"""
+import math
+from typing import Optional
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.security import verify_token
+from app.core.serialization import FastJSONResponse
+from app.infrastructure.rate_limit import KeyedRateLimiter, LoadShedder
+
+settings = get_settings()
+
+LIMITED_PREFIXES = ("/pokemons", "/reference", "/login")
+
+user_limiter = KeyedRateLimiter(
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_SUBJECTS,
+)
+login_limiter = KeyedRateLimiter(
+    rate=settings.RATE_LIMIT_LOGIN_PER_MINUTE / 60,
+    burst=settings.RATE_LIMIT_LOGIN_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_SUBJECTS,
+)
+load_shedder = LoadShedder(
+    max_concurrent=settings.LOAD_SHED_MAX_CONCURRENT,
+    queue_size=settings.LOAD_SHED_QUEUE_SIZE,
+    queue_timeout=settings.LOAD_SHED_QUEUE_TIMEOUT,
+)
+
+
+def client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def request_subject(scope: Scope) -> str:
+    """
+    Who a request is counted against
+
+    The `sub` of a valid bearer token (verified the same way as
+    get_current_user, so usually a token cache hit), otherwise the client IP.
+    Run uvicorn with --proxy-headers behind a trusted proxy so the IP is the
+    client's rather than the proxy's.
+
+    Args:
+        scope: ASGI scope of the request
+
+    Returns:
+        "user:<sub>" or "ip:<address>"
+    """
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{verify_token(token)}"
+        except HTTPException:
+            pass
+    return f"ip:{client_ip(scope)}"
+
+
+def rejection(status_code: int, detail: str, retry_after: float) -> FastJSONResponse:
+    return FastJSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(math.ceil(retry_after), 1))},
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Reject abusive clients and shed load before any endpoint work is done
+
+    /login is limited per client IP, everything else under /pokemons per user
+    (falling back to the IP without a valid token); over the limit the answer
+    is 429 with Retry-After. Requests that pass then need one of the global
+    concurrency slots: when the wait queue is full, or the wait too long, the
+    answer is 503 with Retry-After. Other paths (/health, /docs) are not
+    limited.
+
+    Args:
+        app: Wrapped ASGI application
+        limiter: Per-user limits
+        login: Per-IP limits for /login
+        shedder: Global concurrency cap, or None for no cap
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: KeyedRateLimiter,
+        login: KeyedRateLimiter,
+        shedder: Optional[LoadShedder] = None,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.login = login
+        self.shedder = shedder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "") if scope["type"] == "http" else ""
+        if not path.startswith(LIMITED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        if path.startswith("/login"):
+            retry_after = self.login.hit(f"ip:{client_ip(scope)}")
+        else:
+            retry_after = self.limiter.hit(request_subject(scope))
+        if retry_after:
+            response = rejection(status.HTTP_429_TOO_MANY_REQUESTS, "Too many requests", retry_after)
+            await response(scope, receive, send)
+            return
+
+        if self.shedder is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.shedder.acquire():
+            response = rejection(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Server is overloaded, try again later",
+                self.shedder.queue_timeout,
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.release()
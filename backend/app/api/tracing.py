@@ -0,0 +1,93 @@
+"""
+Tracing Middleware
+Starts a trace per request, reports it as a Server-Timing header, and optionally logs or profiles it
+"""
+import logging
+import os
+import random
+from typing import Optional
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.profiling import SamplingProfiler
+from app.core.tracing import Trace, TraceLog, current_trace
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+trace_log = TraceLog(settings.TRACE_LOG_PATH) if settings.TRACE_LOG_PATH else None
+
+
+def profiling_requested(scope: Scope) -> bool:
+    """Whether the request asks for the profiler (X-Profile: 1 or ?profile=1); DEBUG only"""
+    if not settings.DEBUG:
+        return False
+    if Headers(scope=scope).get("x-profile") == "1":
+        return True
+    return parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile") == ["1"]
+
+
+class TracingMiddleware:
+    """
+    Trace every HTTP request
+
+    Spans recorded by the layers below (auth, service, cache, upstream,
+    serialize) are summed per name into a Server-Timing header, so browser
+    devtools show where the time of a slow call went. A TRACE_SAMPLE_RATE
+    share of requests is appended to the JSONL trace log, when one is set.
+    In DEBUG mode, a request sent with X-Profile: 1 or ?profile=1 is also
+    profiled; the collapsed-stack file is named in the X-Profile-File header.
+
+    Args:
+        app: Wrapped ASGI application
+        sample_rate: Share of requests written to the trace log
+        log: Trace log, or None to keep traces in headers only
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 0.0, log: Optional[TraceLog] = None):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        status_code = 500
+        profiler: Optional[SamplingProfiler] = None
+        profile_path: Optional[str] = None
+        if profiling_requested(scope):
+            profiler = SamplingProfiler(settings.PROFILE_INTERVAL)
+            profile_path = os.path.join(settings.PROFILE_DIR, f"{trace.trace_id}.folded")
+            profiler.start()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", trace.server_timing())
+                if profile_path is not None:
+                    headers["X-Profile-File"] = profile_path
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            trace.finished = True
+            if profiler is not None:
+                profiler.stop()
+                profiler.dump(profile_path)
+                logger.info("Profile of %s %s written to %s", scope["method"], scope["path"], profile_path)
+            if self.log is not None and random.random() < self.sample_rate:
+                self.log.write({
+                    **trace.as_dict(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                })
@@ -2,21 +2,32 @@
 Pokemon Endpoints
 Handles pokemon-related operations
 """
-from fastapi import APIRouter, Depends, Query
-from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Literal, Optional
 from app.api.dependencies import get_current_user
+from app.api.http_cache import payload_response
+from app.core.config import get_settings
+from app.core.serialization import json_dumps
+from app.infrastructure.payload import Payload
 from app.services.pokemon_service import get_pokemon_service, PokemonService
 
+settings = get_settings()
 router = APIRouter()
 
 
 @router.get("/pokemons", tags=["Pokemons"])
 async def get_pokemons(
+    request: Request,
     offset: int = Query(default=0, ge=0, description="Number of pokemons to skip"),
     limit: int = Query(default=20, ge=1, le=100, description="Number of pokemons to return"),
+    search: Optional[str] = Query(default=None, description="Name prefix (or exact ID) to search for"),
+    fuzzy: bool = Query(default=False, description="Match the search approximately instead of by prefix"),
+    type_name: Optional[str] = Query(default=None, alias="type", description="Only pokemons of this type"),
+    sort: Optional[str] = Query(default=None, description="Sort column (id, name or a stat), '-' prefix for descending"),
     current_user: str = Depends(get_current_user),
     pokemon_service: PokemonService = Depends(get_pokemon_service)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get paginated list of all pokemons
     
@@ -24,6 +35,16 @@ async def get_pokemons(
     
     - **offset**: Number of pokemons to skip (default: 0)
     - **limit**: Number of pokemons to return (default: 20, max: 100)
+    - **search**: Name prefix, or exact ID when numeric
+    - **fuzzy**: Tolerate typos in the search (default: false)
+    - **type**: Filter by type, e.g. "fire"
+    - **sort**: id, name or a stat (hp, attack, ...), "-" prefix for descending
+    
+    Search, type and sort are served from a server-side index of the full
+    catalog, so results are consistent across pages.
+    
+    Responses carry a strong ETag and Last-Modified; send If-None-Match or
+    If-Modified-Since to get a 304 when the page is unchanged.
     
     Returns a paginated list with:
     - count: Total number of pokemons
@@ -31,26 +52,139 @@ async def get_pokemons(
     - previous: URL for previous page (if any)
     - results: List of pokemon names and URLs
     """
-    return await pokemon_service.get_pokemons_list(offset=offset, limit=limit)
+    if search is None and type_name is None and sort is None:
+        return payload_response(request, await pokemon_service.get_pokemons_list(offset=offset, limit=limit))
+
+    page = await pokemon_service.search_pokemons(
+        search=search, fuzzy=fuzzy, type_name=type_name, sort=sort, offset=offset, limit=limit
+    )
+    page["next"] = (
+        str(request.url.include_query_params(offset=offset + limit))
+        if offset + limit < page["count"] else None
+    )
+    page["previous"] = (
+        str(request.url.include_query_params(offset=max(offset - limit, 0)))
+        if offset > 0 else None
+    )
+    return payload_response(request, Payload(data=page))
+
+
+@router.get("/pokemons/batch", tags=["Pokemons"])
+async def get_pokemons_batch(
+    ids: str = Query(..., description="Comma-separated pokemon IDs or names, e.g. 1,4,pikachu"),
+    view: Literal["full", "summary", "compact"] = Query(
+        default="full", description="Full PokeAPI payload, summary fields or compact (reference IDs)"
+    ),
+    current_user: str = Depends(get_current_user),
+    pokemon_service: PokemonService = Depends(get_pokemon_service)
+) -> Dict[str, Any]:
+    """
+    Get detailed information about several pokemons in one request
+
+    Requires authentication.
+
+    - **ids**: Comma-separated IDs or names (max: BATCH_MAX_IDS, default 50)
+    - **view**: "full" (default), "summary" or "compact"
+
+    Returns partial results:
+    - results: Pokemon details keyed by normalized ID or name
+    - errors: status_code and detail for each ID that could not be fetched
+    """
+    pokemon_ids = [part.strip() for part in ids.split(",") if part.strip()]
+    if not pokemon_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="At least one pokemon ID is required"
+        )
+    if len(pokemon_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.BATCH_MAX_IDS} pokemon IDs can be requested at once"
+        )
+    return await pokemon_service.get_pokemon_details_batch(pokemon_ids, view=view)
+
+
+async def ndjson_lines(records: AsyncIterator[Payload]) -> AsyncIterator[bytes]:
+    """
+    Encode exported records as NDJSON, one compact JSON document per line
+
+    The empty first chunk sends the headers at once (CompressionMiddleware
+    holds them until the first body chunk) rather than after the first
+    record. The status has been sent by then, so a list page failing
+    mid-export ends the stream with an {"error": ...} line.
+    """
+    yield b""
+    try:
+        async for payload in records:
+            body = payload.body
+            if b"\n" in body:
+                # Upstream bytes are passed through; re-encode any that are pretty-printed
+                body = json_dumps(payload.data)
+            yield body + b"\n"
+    except HTTPException as e:
+        yield json_dumps({"error": {"status_code": e.status_code, "detail": e.detail}}) + b"\n"
+
+
+@router.get("/pokemons/export", tags=["Pokemons"])
+async def export_pokemons(
+    export_format: Literal["ndjson"] = Query(default="ndjson", alias="format", description="Export format"),
+    view: Literal["full", "summary"] = Query(default="full", description="Full PokeAPI payload or summary fields"),
+    current_user: str = Depends(get_current_user),
+    pokemon_service: PokemonService = Depends(get_pokemon_service)
+) -> StreamingResponse:
+    """
+    Stream every pokemon with its details
+
+    Requires authentication.
+
+    - **format**: "ndjson" (one JSON document per line)
+    - **view**: "full" (default) or "summary"
+
+    Records arrive in completion order, not by ID. A pokemon that cannot be
+    fetched is exported as {"id", "error": {"status_code", "detail"}}; if the
+    export itself fails part way, the last line is {"error": {...}}.
+    """
+    return StreamingResponse(
+        ndjson_lines(pokemon_service.export_pokemons(view=view)),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/pokemons/{pokemon_id}", tags=["Pokemons"])
 async def get_pokemon_detail(
     pokemon_id: str,
+    request: Request,
+    view: Literal["full", "summary", "compact"] = Query(
+        default="full", description="Full PokeAPI payload, summary fields or compact (reference IDs)"
+    ),
+    fields: Optional[str] = Query(default=None, description="Comma-separated top-level fields, e.g. id,name,types"),
     current_user: str = Depends(get_current_user),
     pokemon_service: PokemonService = Depends(get_pokemon_service)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get detailed information about a specific pokemon
     
     Requires authentication.
     
     - **pokemon_id**: Pokemon ID (e.g., "25") or name (e.g., "pikachu")
+    - **view**: "full" (default) or "summary" (id, name, height, weight,
+      abilities, types, sprites without per-game versions, stats) or
+      "compact" (full payload with moves, abilities and types as integer IDs,
+      resolved through /reference/{moves|abilities|types})
+    - **fields**: Explicit comma-separated top-level fields; id and name are always
+      included, unknown fields are rejected with 422
     
     Returns detailed information including:
     - id, name, height, weight
     - abilities, types, sprites
     - stats, moves, and more
+    
+    Supports conditional GET with If-None-Match / If-Modified-Since.
     """
-    return await pokemon_service.get_pokemon_detail(pokemon_id)
+    payload = await pokemon_service.get_pokemon_detail(
+        pokemon_id,
+        view=view,
+        fields=fields.split(",") if fields else None
+    )
+    return payload_response(request, payload)
 
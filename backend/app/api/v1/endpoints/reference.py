@@ -0,0 +1,36 @@
+"""
+Reference Endpoints
+Serves the move, ability and type names that compact pokemon details refer to by ID
+"""
+from fastapi import APIRouter, Depends, Request, Response
+from typing import Literal
+from app.api.dependencies import get_current_user
+from app.api.http_cache import payload_response
+from app.core.config import get_settings
+from app.services.pokemon_service import get_pokemon_service, PokemonService
+
+settings = get_settings()
+router = APIRouter()
+
+
+@router.get("/reference/{table}", tags=["Reference"])
+async def get_reference(
+    table: Literal["moves", "abilities", "types"],
+    request: Request,
+    current_user: str = Depends(get_current_user),
+    pokemon_service: PokemonService = Depends(get_pokemon_service)
+) -> Response:
+    """
+    Get the ID to name table of moves, abilities or types
+
+    Requires authentication.
+
+    - **table**: "moves", "abilities" or "types"
+
+    Returns {"kind", "count", "names": {id: name}}. IDs are PokeAPI's own, as
+    used by /pokemons/{id}?view=compact. The tables rarely change, so they
+    are sent with a long max-age (REFERENCE_MAX_AGE) and support conditional
+    GET with If-None-Match / If-Modified-Since.
+    """
+    payload = await pokemon_service.get_reference(table)
+    return payload_response(request, payload, max_age=settings.REFERENCE_MAX_AGE)
@@ -2,8 +2,10 @@
 Core Configuration
 Manages all application settings from environment variables
 """
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -15,11 +17,152 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified tokens remembered until their exp (0 disables the cache)
+    TOKEN_CACHE_MAX_ENTRIES: int = 4096
     
     # PokeAPI
     POKEAPI_BASE_URL: str = "https://pokeapi.co/api/v2"
     POKEAPI_TIMEOUT: int = 30
-    
+    POKEAPI_MAX_CONNECTIONS: int = 100
+    POKEAPI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    POKEAPI_KEEPALIVE_EXPIRY: float = 30.0
+    # Off by default; needs the optional h2 package (pip install httpx[http2])
+    POKEAPI_HTTP2: bool = False
+    # Circuit breaker: fail fast with 503 once this share of calls in the window fails
+    POKEAPI_BREAKER_ENABLED: bool = True
+    POKEAPI_BREAKER_FAILURE_THRESHOLD: float = 0.5
+    POKEAPI_BREAKER_MIN_CALLS: int = 20
+    POKEAPI_BREAKER_WINDOW_SECONDS: float = 30.0
+    POKEAPI_BREAKER_OPEN_SECONDS: float = 15.0
+    # Adaptive timeout: observed latency percentile x multiplier, between the
+    # minimum and POKEAPI_TIMEOUT (which applies until enough samples exist,
+    # after FALLBACK_AFTER consecutive timeouts and to half-open breaker probes)
+    POKEAPI_ADAPTIVE_TIMEOUT: bool = True
+    POKEAPI_TIMEOUT_MIN: float = 1.0
+    POKEAPI_TIMEOUT_PERCENTILE: float = 99.0
+    POKEAPI_TIMEOUT_MULTIPLIER: float = 3.0
+    POKEAPI_TIMEOUT_FALLBACK_AFTER: int = 3
+    # Retries with jittered exponential backoff for transient failures, within
+    # a per-request deadline and a retry budget shared by retries and hedges
+    POKEAPI_MAX_RETRIES: int = 2
+    POKEAPI_RETRY_BACKOFF_BASE: float = 0.1
+    POKEAPI_RETRY_BACKOFF_MAX: float = 2.0
+    POKEAPI_RETRY_BUDGET_RATIO: float = 0.2
+    POKEAPI_RETRY_BUDGET_MAX: float = 10.0
+    POKEAPI_DEADLINE: float = 30.0
+    # Hedging: send a second attempt if the first has not answered by the latency percentile
+    POKEAPI_HEDGING: bool = False
+    POKEAPI_HEDGE_PERCENTILE: float = 95.0
+    # Outbound rate limit: requests queue in arrival order for a token; with a
+    # lock file every worker process on the host shares the budget. Rates must
+    # be positive (use the _ENABLED flags to turn limits off)
+    POKEAPI_RATE_LIMIT_ENABLED: bool = False
+    POKEAPI_RATE_LIMIT_PER_SECOND: float = Field(20.0, gt=0)
+    POKEAPI_RATE_LIMIT_BURST: int = Field(40, ge=1)
+    POKEAPI_RATE_LIMIT_LOCK_FILE: Optional[str] = None
+    # Serve all reads from a local snapshot file instead of the network
+    POKEAPI_SNAPSHOT_PATH: Optional[str] = None
+
+    # Cache
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 2048
+    CACHE_TTL_SECONDS: int = 3600
+    CACHE_DISK_PATH: Optional[str] = None
+    # Rows kept in the SQLite tier (expired rows are pruned once they can no longer be served stale)
+    CACHE_DISK_MAX_ENTRIES: int = 100000
+    # Cache pokemon details as compact normalized records (about 5x smaller than the
+    # upstream JSON) rendered per response, instead of the upstream bytes served as is
+    CACHE_COMPACT_RECORDS: bool = True
+    # Rendered bodies (plus their compressed copies, made once per coding) kept for
+    # the most recently served records. Each costs about 1.1x the detail's JSON size
+    # on top of its record; a hit outside this set re-renders and re-compresses the
+    # document (a few hundred microseconds of CPU). Lower it to trade CPU for memory
+    CACHE_RENDERED_MAX_ENTRIES: int = 1024
+    # Shared tier on a Redis-compatible server (takes precedence over CACHE_DISK_PATH),
+    # so every worker reads what any of them fetched: redis://[:password@]host[:port][/db]
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_REDIS_PREFIX: str = "pokeapi:"
+    CACHE_REDIS_POOL_SIZE: int = 10
+    # Seconds to wait for the server before treating a read as a miss
+    CACHE_REDIS_TIMEOUT: float = 0.5
+    # Seconds the server is skipped (reads are misses) after it failed
+    CACHE_REDIS_BACKOFF_SECONDS: float = 5.0
+    # Cache-Control max-age sent with /pokemons responses
+    HTTP_CACHE_MAX_AGE: int = 300
+    # Seconds past expiry an entry is served while it is refreshed in the background
+    CACHE_STALE_WHILE_REVALIDATE: int = 300
+    # Background refreshes of such entries running at once (they are never dropped)
+    CACHE_REVALIDATE_CONCURRENCY: int = 10
+    # Seconds past expiry an entry may still be served when PokeAPI fails or is slow
+    CACHE_STALE_IF_ERROR: int = 86400
+    # How long to wait for PokeAPI before falling back to such an entry
+    CACHE_STALE_IF_ERROR_WAIT: float = 2.0
+
+    # JSON backend for responses and upstream parsing: "orjson" (installed from
+    # requirements.txt; falls back to the stdlib when missing) or "stdlib"
+    JSON_BACKEND: str = "orjson"
+
+    # Response compression: gzip, plus brotli from the brotli (or brotlicffi) package in requirements.txt
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+
+    # Batch detail endpoint
+    BATCH_MAX_IDS: int = 50
+    BATCH_CONCURRENCY: int = 10
+
+    # Streaming NDJSON export of the whole catalog: list pages of PAGE_SIZE,
+    # details fetched CONCURRENCY at a time
+    EXPORT_PAGE_SIZE: int = 100
+    EXPORT_CONCURRENCY: int = 10
+
+    # Reference tables (/reference/{moves|abilities|types}) for view=compact details:
+    # cached this long, and sent with this Cache-Control max-age
+    REFERENCE_TTL_SECONDS: int = 86400
+    REFERENCE_MAX_AGE: int = 86400
+
+    # Prefetching: next list page and the details on a served page (speculative,
+    # off by default), plus a startup warm-up of the most requested pokemons
+    PREFETCH_ENABLED: bool = False
+    PREFETCH_CONCURRENCY: int = 4
+    PREFETCH_RATE_PER_SECOND: float = Field(10.0, gt=0)
+    PREFETCH_MAX_PENDING: int = 200
+    PREFETCH_WARMUP_TOP_K: int = 0
+
+    # Inbound rate limits (GCRA): per user (JWT sub, or client IP without a
+    # valid token) on /pokemons, per client IP on /login; 429 over the limit
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_SECOND: float = Field(20.0, gt=0)
+    RATE_LIMIT_BURST: int = Field(40, ge=1)
+    RATE_LIMIT_LOGIN_PER_MINUTE: float = Field(10.0, gt=0)
+    RATE_LIMIT_LOGIN_BURST: int = Field(5, ge=1)
+    RATE_LIMIT_MAX_SUBJECTS: int = 100000
+    # Load shedding: requests beyond MAX_CONCURRENT wait in a queue of QUEUE_SIZE
+    # and get a 503 when it is full or after QUEUE_TIMEOUT seconds (0 disables)
+    LOAD_SHED_MAX_CONCURRENT: int = 200
+    LOAD_SHED_QUEUE_SIZE: int = 500
+    LOAD_SHED_QUEUE_TIMEOUT: float = 5.0
+
+    # Prometheus-style /metrics endpoint and how often event loop lag is sampled (seconds)
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL: float = 0.5
+
+    # Tracing: per-layer timings (auth, service, cache, upstream, serialize) in a
+    # Server-Timing header, and a sampled JSONL span log when TRACE_LOG_PATH is set
+    TRACING_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_LOG_PATH: Optional[str] = None
+    # Per-request sampling profiler, DEBUG only: send "X-Profile: 1" or ?profile=1
+    # to get a collapsed-stack file (flamegraph.pl, speedscope) in PROFILE_DIR
+    PROFILE_DIR: str = "profiles"
+    PROFILE_INTERVAL: float = 0.001
+
+    # Catalog index (server-side search, filter and sort)
+    CATALOG_TTL_SECONDS: int = 86400
+    CATALOG_PRELOAD: bool = False
+    CATALOG_LOAD_STATS: bool = False
+
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
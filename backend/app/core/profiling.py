@@ -0,0 +1,66 @@
+"""
+Sampling Profiler
+Per-request stack sampling of the event loop thread, written as collapsed stacks for flame graphs
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from typing import List, Optional
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval from a helper thread
+
+    Meant for debugging a single slow request: the event loop thread also runs
+    every other request in flight, so profile on an otherwise idle server.
+    The result is in the collapsed-stack format ("outer;inner;leaf count")
+    read by flamegraph.pl, speedscope and inferno.
+
+    Args:
+        interval: Seconds between samples
+        thread_id: Thread to sample (defaults to the calling thread)
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            names: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def dump(self, path: str) -> None:
+        """Write the collapsed stacks to path, creating its directory"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
@@ -2,8 +2,12 @@
 Security utilities
 Handles JWT token creation and validation
 """
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 from app.core.config import get_settings
@@ -11,6 +15,62 @@ from app.core.config import get_settings
 settings = get_settings()
 
 
+class TokenCache:
+    """
+    Bounded cache of already verified tokens
+
+    Clients resend the same token on every request for its whole lifetime, so
+    the username is remembered per token (keyed by its SHA-256 digest) until
+    the token's own `exp`. Only tokens that passed full verification are
+    stored, and lookups past `exp` are treated as misses and evicted.
+
+    Used both from the event loop (rate limiting) and from threadpool threads
+    (the sync auth dependency), so every access holds a lock.
+
+    Args:
+        max_entries: Maximum number of tokens kept (least recently used evicted)
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            username, expires_at = entry
+            if expires_at <= time.time():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return username
+
+    def set(self, token: str, username: str, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        key = self.digest(token)
+        with self._lock:
+            self._entries[key] = (username, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -36,6 +96,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def verify_token(token: str) -> str:
     """
     Verify and decode a JWT token
+    Tokens verified before are answered from the token cache until they expire
     
     Args:
         token: JWT token to verify
@@ -46,6 +107,10 @@ def verify_token(token: str) -> str:
     Raises:
         HTTPException: If token is invalid
     """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
@@ -55,6 +120,8 @@ def verify_token(token: str) -> str:
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        if payload.get("exp") is not None:
+            token_cache.set(token, username, float(payload["exp"]))
         return username
     except JWTError:
         raise HTTPException(
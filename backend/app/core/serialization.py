@@ -0,0 +1,65 @@
+"""
+JSON Serialization
+Fast JSON encoding/decoding with orjson, falling back to the standard library
+"""
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+from app.core.config import get_settings
+
+# orjson is optional; without it everything uses the stdlib json module
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+
+settings = get_settings()
+
+
+def use_orjson() -> bool:
+    """Whether the orjson backend is selected and installed"""
+    return ORJSON_AVAILABLE and settings.JSON_BACKEND == "orjson"
+
+
+def json_dumps(data: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON
+
+    Both backends produce the same bytes for PokeAPI documents (no spaces,
+    non-ASCII characters kept as is), so ETags do not depend on the backend.
+
+    Args:
+        data: JSON-compatible document
+
+    Returns:
+        Encoded document
+    """
+    if use_orjson():
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_loads(body: Any) -> Any:
+    """
+    Parse a JSON document
+
+    Args:
+        body: JSON as bytes, bytearray, memoryview or str
+
+    Returns:
+        Parsed document
+    """
+    if use_orjson():
+        return orjson.loads(body)
+    if isinstance(body, memoryview):
+        body = body.tobytes()
+    return json.loads(body)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with json_dumps (orjson when available)"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
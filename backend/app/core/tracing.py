@@ -0,0 +1,164 @@
+"""
+Request Tracing
+Lightweight spans across the endpoint, service and client layers, reported as Server-Timing and JSONL
+"""
+import functools
+import os
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from app.core.serialization import json_dumps
+
+T = TypeVar("T")
+
+
+class Trace:
+    """
+    Spans recorded while handling one request
+
+    Spans are kept as (name, start, duration, parent) tuples relative to the
+    start of the request. Once the trace is finished, late spans (e.g. from a
+    background prefetch that inherited the request's context) are ignored.
+    """
+
+    __slots__ = ("trace_id", "started", "spans", "finished")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float, Optional[str]]] = []
+        self.finished = False
+
+    def record(self, name: str, started: float, duration: float, parent: Optional[str]) -> None:
+        if not self.finished:
+            self.spans.append((name, started - self.started, duration, parent))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: total milliseconds per span name, plus the request total
+
+        Concurrent spans of one name (e.g. hedged upstream requests) are summed.
+        """
+        totals: Dict[str, float] = {}
+        for name, _, duration, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        totals["total"] = self.elapsed()
+        return ", ".join(f"{name};dur={duration * 1000:.2f}" for name, duration in totals.items())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": round(self.elapsed() * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "parent": parent,
+                    "start_ms": round(start * 1000, 3),
+                    "duration_ms": round(duration * 1000, 3),
+                }
+                for name, start, duration, parent in self.spans
+            ],
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """Context manager timing one span of the current trace"""
+
+    __slots__ = ("trace", "name", "parent", "started", "_token")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        duration = time.perf_counter() - self.started
+        _current_span.reset(self._token)
+        self.trace.record(self.name, self.started, duration, self.parent)
+
+
+class _NoSpan:
+    """Shared no-op span used when no trace is active"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """
+    Time a block as a span of the current request's trace
+
+    Outside a traced request this returns a shared no-op context manager, so
+    instrumented code costs one context variable lookup.
+
+    Args:
+        name: Span name, also used as the Server-Timing metric name
+
+    Returns:
+        Context manager recording the span
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return _NO_SPAN
+    return Span(trace, name)
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator recording every call of a coroutine function as a span"""
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> T:
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class TraceLog:
+    """
+    Appends finished traces to a JSONL file, one object per line
+
+    Args:
+        path: File to append to (created with its directory if missing)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "ab")
+        self._file.write(json_dumps(record) + b"\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,531 @@
+"""
+Response Cache
+Tiered cache for upstream PokeAPI data: a bounded in-process LRU with TTL in
+front of an optional shared tier, either a SQLite file (a restarted worker
+starts warm, workers on one host share it) or a Redis-compatible server
+(every worker on every host shares one working set)
+
+Expired entries are not dropped eagerly: get() treats them as misses, but
+get_stale() still returns them so the caller can revalidate them upstream, and
+lookup() returns them with their staleness so the caller can decide whether
+to serve them while revalidating or when PokeAPI is failing.
+"""
+import asyncio
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol, Tuple
+from app.core.config import get_settings
+from app.infrastructure.resp import RespClient, RespError
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Raised by pickle.loads for corrupt blobs or ones written by an incompatible version
+UNPICKLE_ERRORS = (pickle.UnpicklingError, ValueError, TypeError, EOFError, AttributeError, ImportError)
+
+
+class CacheStats:
+    """Hit/miss/eviction/error counters for a cache tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "errors": self.errors}
+
+
+class CacheBackend(Protocol):
+    """
+    Interface of a cache tier
+
+    `name` labels the tier in stats. Values are any picklable object; `ttl`
+    defaults to the tier's own. Expired entries stay readable through
+    get_stale() and lookup() until the tier drops them.
+    """
+
+    name: str
+    stats: CacheStats
+
+    async def get(self, key: str) -> Optional[Any]: ...
+
+    async def get_stale(self, key: str) -> Optional[Any]: ...
+
+    async def lookup(self, key: str) -> Tuple[Optional[Any], float]: ...
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def clear(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryCache:
+    """
+    Bounded LRU cache with per-entry TTL, private to the process
+
+    Args:
+        max_entries: Maximum number of entries before the least recently used is evicted
+        ttl: Default time-to-live in seconds
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Return the entry even if it has expired, without touching the counters"""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    async def lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        """
+        Return the entry and how many seconds ago it expired (negative while fresh)
+
+        Fresh entries count as hits and expired ones as misses, as with get().
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None, 0.0
+        value, expires_at = entry
+        stale_for = time.monotonic() - expires_at
+        if stale_for < 0:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return value, stale_for
+
+    def contains(self, key: str) -> bool:
+        """Whether an unexpired entry exists, without touching the counters or LRU order"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Persistent cache tier backed by a local SQLite file
+
+    Values are pickled (the file is private to this service). Queries run in
+    a worker thread so the event loop is never blocked on disk I/O. Workers
+    on one host can share the file (WAL mode allows concurrent readers).
+
+    Cache keys depend on client input (pages, projections), so the file is
+    bounded: when it is opened and every `prune_every` writes, rows expired
+    for more than `retain_stale` seconds are deleted, then the rows closest
+    to expiry beyond `max_entries`.
+
+    Args:
+        path: SQLite database file
+        ttl: Default time-to-live in seconds
+        max_entries: Maximum number of rows kept
+        retain_stale: Seconds expired rows are kept (for stale serving and revalidation)
+        prune_every: Writes between two prunes
+    """
+
+    name = "disk"
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        max_entries: int = 100000,
+        retain_stale: float = 0.0,
+        prune_every: int = 100,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.retain_stale = retain_stale
+        self.prune_every = max(prune_every, 1)
+        self.stats = CacheStats()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        with self._lock:
+            self._open()
+
+    def _open(self) -> None:
+        """Open the file if needed (lock held); after close() the next access reopens it"""
+        if self._conn is not None:
+            return
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        self._conn.commit()
+        self._prune()
+
+    def _get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        value, stale_for = self._lookup(key)
+        if stale_for >= 0 and not allow_stale:
+            return None
+        return value
+
+    def _lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        with self._lock:
+            self._open()
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, 0.0
+        try:
+            value = pickle.loads(row[0])
+        except UNPICKLE_ERRORS as e:
+            # A miss rather than a failed request; the row is dropped so the next write replaces it
+            logger.warning("Dropping unreadable disk cache entry %s: %r", key, e)
+            self.stats.errors += 1
+            self._execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None, 0.0
+        return value, time.time() - row[1]
+
+    def _set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._open()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes >= self.prune_every:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Delete long-expired rows, then the ones closest to expiry over max_entries (lock held)"""
+        self._writes = 0
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time() - self.retain_stale,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+            self.stats.evictions += excess
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: Tuple = ()) -> None:
+        with self._lock:
+            self._open()
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Return the entry even if it has expired, without touching the counters"""
+        return await asyncio.to_thread(self._get, key, True)
+
+    async def lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        """Return the entry and how many seconds ago it expired (negative while fresh)"""
+        value, stale_for = await asyncio.to_thread(self._lookup, key)
+        if value is None or stale_for >= 0:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value, stale_for
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._set, key, value, self.ttl if ttl is None else ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM cache WHERE key = ?", (key,))
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM cache")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisCache:
+    """
+    Cache tier shared by every worker through a Redis-compatible server
+
+    Values are pickled together with their expiry time, and the server is
+    asked to keep them `retain_stale` seconds past it, so expired entries can
+    still be revalidated or served stale. Pickles are trusted: the server (or
+    at least the key prefix) must be private to this service.
+
+    The cache is an optimization, so a server that is down or slow degrades
+    to misses (and dropped writes) after `timeout` instead of failing requests;
+    failures are counted in stats.errors. After a failure the server is not
+    contacted for `backoff` seconds (every call is a miss or a no-op), so an
+    outage does not add `timeout` to every cache access.
+
+    Args:
+        url: redis://[:password@]host[:port][/db]
+        ttl: Default time-to-live in seconds
+        retain_stale: Seconds expired entries are kept on the server
+        prefix: Prepended to every key, so clear() leaves other data alone
+        pool_size: Maximum number of connections per worker
+        timeout: Seconds to wait for the server before giving up
+        backoff: Seconds the server is skipped after a failure
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str,
+        ttl: float,
+        retain_stale: float = 0.0,
+        prefix: str = "pokeapi:",
+        pool_size: int = 10,
+        timeout: float = 0.5,
+        backoff: float = 5.0,
+    ):
+        self.client = RespClient(url, pool_size=pool_size, timeout=timeout)
+        self.backoff = backoff
+        self.ttl = ttl
+        self.retain_stale = retain_stale
+        self.prefix = prefix
+        self.stats = CacheStats()
+        self._available = True
+        self._retry_at = 0.0
+
+    async def _command(self, *args: Any) -> Any:
+        """Run a command, returning None if the server fails (counting an error) or is being skipped"""
+        if not self._available and time.monotonic() < self._retry_at:
+            return None
+        try:
+            reply = await self.client.execute(*args)
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self.stats.errors += 1
+            self._retry_at = time.monotonic() + self.backoff
+            if self._available:
+                logger.warning("Shared cache unavailable, continuing without it: %r", e)
+                self._available = False
+            return None
+        if not self._available:
+            logger.info("Shared cache available again")
+            self._available = True
+        return reply
+
+    async def _lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        raw = await self._command("GET", self.prefix + key)
+        if raw is None:
+            return None, 0.0
+        try:
+            expires_at, value = pickle.loads(raw)
+        except UNPICKLE_ERRORS as e:
+            # A miss rather than a failed request; the key is dropped so the next write replaces it
+            logger.warning("Dropping unreadable shared cache entry %s: %r", key, e)
+            self.stats.errors += 1
+            await self.delete(key)
+            return None, 0.0
+        return value, time.time() - expires_at
+
+    async def get(self, key: str) -> Optional[Any]:
+        value, stale_for = await self._lookup(key)
+        if value is None or stale_for >= 0:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return value
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Return the entry even if it has expired, without touching the counters"""
+        return (await self._lookup(key))[0]
+
+    async def lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        """Return the entry and how many seconds ago it expired (negative while fresh)"""
+        value, stale_for = await self._lookup(key)
+        if value is None or stale_for >= 0:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value, stale_for
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        keep_for = ttl + self.retain_stale
+        if keep_for <= 0:
+            await self.delete(key)
+            return
+        blob = pickle.dumps((time.time() + ttl, value), protocol=pickle.HIGHEST_PROTOCOL)
+        await self._command("SET", self.prefix + key, blob, "PX", max(int(keep_for * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._command("DEL", self.prefix + key)
+
+    async def clear(self) -> None:
+        """Delete every key under the prefix"""
+        cursor = b"0"
+        while True:
+            reply = await self._command("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)
+            if reply is None:
+                return
+            cursor, keys = reply
+            if keys:
+                await self._command("DEL", *keys)
+            if cursor == b"0":
+                return
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional shared tier
+
+    Reads check memory first, then the shared tier; shared hits are promoted
+    into memory for the time they have left. Writes go to both tiers. The shared tier is any CacheBackend
+    (SQLiteCache or RedisCache); with one, a page fetched by any worker is a
+    hit for all of them.
+    """
+
+    def __init__(self, memory: MemoryCache, shared: Optional[CacheBackend] = None):
+        self.memory = memory
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.memory.get(key)
+        if value is None and self.shared is not None:
+            value, stale_for = await self.shared.lookup(key)
+            if value is None or stale_for >= 0:
+                return None
+            await self.memory.set(key, value, -stale_for)
+        return value
+
+    async def get_stale(self, key: str) -> Optional[Any]:
+        """Return an entry even if it has expired (for upstream revalidation)"""
+        value = await self.memory.get_stale(key)
+        if value is None and self.shared is not None:
+            value = await self.shared.get_stale(key)
+        return value
+
+    async def lookup(self, key: str) -> Tuple[Optional[Any], float]:
+        """
+        Return the entry and how many seconds ago it expired (negative while fresh)
+
+        A fresh shared entry is promoted into memory, as with get().
+        """
+        value, stale_for = await self.memory.lookup(key)
+        if (value is None or stale_for >= 0) and self.shared is not None:
+            shared_value, shared_stale_for = await self.shared.lookup(key)
+            if shared_value is not None and (value is None or shared_stale_for < stale_for):
+                value, stale_for = shared_value, shared_stale_for
+                if stale_for < 0:
+                    await self.memory.set(key, value, -stale_for)
+        return value, stale_for
+
+    def contains(self, key: str) -> bool:
+        """Whether the memory tier holds an unexpired entry (shared entries are promoted on get)"""
+        return self.memory.contains(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.memory.set(key, value, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.memory.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    async def clear(self) -> None:
+        await self.memory.clear()
+        if self.shared is not None:
+            await self.shared.clear()
+
+    def close(self) -> None:
+        """Release the shared tier's connections (it reconnects if used again)"""
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters per tier, suitable for the /health payload"""
+        result: Dict[str, Any] = {
+            "memory": {**self.memory.stats.as_dict(), "entries": len(self.memory)},
+        }
+        if self.shared is not None:
+            result[self.shared.name] = self.shared.stats.as_dict()
+        return result
+
+
+def build_cache() -> Optional[TieredCache]:
+    """
+    Create the response cache from settings
+
+    Returns:
+        TieredCache, or None when caching is disabled
+    """
+    if not settings.CACHE_ENABLED:
+        return None
+    memory = MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    shared: Optional[CacheBackend] = None
+    if settings.CACHE_REDIS_URL:
+        shared = RedisCache(
+            settings.CACHE_REDIS_URL,
+            settings.CACHE_TTL_SECONDS,
+            # Expired entries are worth keeping as long as they may be served stale
+            retain_stale=max(settings.CACHE_STALE_WHILE_REVALIDATE, settings.CACHE_STALE_IF_ERROR),
+            prefix=settings.CACHE_REDIS_PREFIX,
+            pool_size=settings.CACHE_REDIS_POOL_SIZE,
+            timeout=settings.CACHE_REDIS_TIMEOUT,
+            backoff=settings.CACHE_REDIS_BACKOFF_SECONDS,
+        )
+    elif settings.CACHE_DISK_PATH:
+        shared = SQLiteCache(
+            settings.CACHE_DISK_PATH,
+            settings.CACHE_TTL_SECONDS,
+            max_entries=settings.CACHE_DISK_MAX_ENTRIES,
+            retain_stale=max(settings.CACHE_STALE_WHILE_REVALIDATE, settings.CACHE_STALE_IF_ERROR),
+        )
+    return TieredCache(memory, shared)
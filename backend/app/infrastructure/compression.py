@@ -0,0 +1,131 @@
+"""
+Compression
+Content-coding negotiation, gzip/brotli encoders and per-encoding byte savings
+"""
+import gzip
+from typing import Dict, Optional
+from app.core.config import get_settings
+
+# Brotli is optional; either the C extension or the CFFI build will do
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+settings = get_settings()
+
+# Media types worth compressing (JSON and text; images are already compressed)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> tuple:
+    """Content codings we can produce, in order of preference"""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for a response from the Accept-Encoding header
+
+    Codings are ranked by the client's q-value, ties broken by our preference
+    (brotli before gzip). `q=0` excludes a coding, and `*` stands for any
+    coding the client did not list explicitly.
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+
+    Returns:
+        "br", "gzip" or None for the identity encoding
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether responses of this media type benefit from compression"""
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Encode a body with the given content coding
+
+    Args:
+        body: Identity-encoded bytes
+        encoding: "br" or "gzip"
+
+    Returns:
+        Encoded bytes
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+class CompressionStats:
+    """
+    Byte counters per content coding
+
+    `precompressed` counts responses whose encoded body was reused from the
+    cache instead of being compressed for the request.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, encoding: str, identity_bytes: int, encoded_bytes: int, precompressed: bool = False) -> None:
+        counters = self._counters.setdefault(
+            encoding,
+            {"responses": 0, "precompressed": 0, "identity_bytes": 0, "encoded_bytes": 0},
+        )
+        counters["responses"] += 1
+        counters["precompressed"] += int(precompressed)
+        counters["identity_bytes"] += identity_bytes
+        counters["encoded_bytes"] += encoded_bytes
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for encoding, counters in self._counters.items():
+            identity = counters["identity_bytes"]
+            result[encoding] = {
+                **counters,
+                "saved_bytes": identity - counters["encoded_bytes"],
+                "ratio": round(counters["encoded_bytes"] / identity, 4) if identity else 1.0,
+            }
+        return result
+
+    def reset(self) -> None:
+        self._counters.clear()
+
+
+# Shared counters for the middleware and precompressed payload responses
+compression_stats = CompressionStats()
@@ -0,0 +1,253 @@
+"""
+Metrics
+Counters, gauges and pre-bucketed histograms rendered in the Prometheus text exposition format
+"""
+import asyncio
+import bisect
+import logging
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits (sub-millisecond) up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Number = Union[int, float]
+# (name, type, help, [(label values, value)]) produced by a collector at scrape time
+Collected = Tuple[str, str, str, Sequence[Tuple[Dict[str, str], Number]]]
+
+
+class Counter:
+    """Monotonic counter"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Value that goes up and down"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: Number) -> None:
+        self.value = value
+
+    def inc(self, amount: Number = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: Number = 1) -> None:
+        self.value -= amount
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets
+
+    The bucket counts are allocated up front; observe() is a binary search and
+    three increments. Counts are per bucket and only made cumulative when
+    rendered.
+    """
+
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = sorted(buckets)
+        self.counts = [0] * (len(self.upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricFamily:
+    """
+    One metric name and its children, one per combination of label values
+
+    Children are created on first use and then reused, so recording a sample
+    for a label combination seen before allocates nothing new. Samples are
+    recorded from the event loop thread only, which is what makes plain
+    attribute updates safe without locks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        kind: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._children: Dict[Tuple[str, ...], Union[Counter, Gauge, Histogram]] = {}
+
+    def labels(self, *values: Union[str, int]) -> Union[Counter, Gauge, Histogram]:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            if self.kind == "histogram":
+                child = Histogram(self.buckets)
+            elif self.kind == "gauge":
+                child = Gauge()
+            else:
+                child = Counter()
+            self._children[values] = child
+        return child
+
+    def render(self, lines: List[str]) -> None:
+        if not self._children:
+            return
+        lines.append(f"# HELP {self.name} {escape_help(self.help)}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in self._children.items():
+            labels = dict(zip(self.labelnames, values))
+            if isinstance(child, Histogram):
+                cumulative = 0
+                for bound, count in zip(child.upper_bounds, child.counts):
+                    cumulative += count
+                    lines.append(sample(f"{self.name}_bucket", {**labels, "le": format_value(bound)}, cumulative))
+                lines.append(sample(f"{self.name}_bucket", {**labels, "le": "+Inf"}, child.count))
+                lines.append(sample(f"{self.name}_sum", labels, child.sum))
+                lines.append(sample(f"{self.name}_count", labels, child.count))
+            else:
+                lines.append(sample(self.name, labels, child.value))
+
+
+def escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: Number) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def sample(name: str, labels: Dict[str, str], value: Number) -> str:
+    """One exposition line, e.g. `name{label="value"} 1.5`"""
+    if not labels:
+        return f"{name} {format_value(value)}"
+    rendered = ",".join(f'{key}="{escape_label(str(label))}"' for key, label in labels.items())
+    return f"{name}{{{rendered}}} {format_value(value)}"
+
+
+class MetricsRegistry:
+    """
+    Metric families recorded as things happen, plus collectors read at scrape time
+
+    Collectors turn counters that already exist elsewhere (cache stats, circuit
+    breaker, rate limiters) into samples when /metrics is scraped, so those
+    code paths need no extra bookkeeping.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: List[Callable[[], Iterable[Collected]]] = []
+
+    def _family(self, name: str, help_text: str, kind: str, labelnames: Sequence[str], **kwargs) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, help_text, kind, labelnames, **kwargs)
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "counter", labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, help_text, "gauge", labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        return self._family(name, help_text, "histogram", labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Collected]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for family in self._families.values():
+            family.render(lines)
+        for collector in self._collectors:
+            try:
+                collected = list(collector())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+                continue
+            for name, kind, help_text, samples in collected:
+                lines.append(f"# HELP {name} {escape_help(help_text)}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(sample(name, labels, value) for labels, value in samples)
+        lines.append("")
+        return "\n".join(lines)
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag
+
+    A task sleeps for `interval` in a loop; how much later than requested it
+    wakes up is the time callbacks spent waiting for the loop, i.e. how long
+    blocking work delayed every request in flight.
+
+    Args:
+        histogram: Where lag samples are observed
+        interval: Seconds between measurements
+    """
+
+    def __init__(self, histogram: Histogram, interval: float):
+        self.histogram = histogram
+        self.interval = interval
+        self.last = 0.0
+        self._task: Optional["asyncio.Task"] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last = max(loop.time() - started - self.interval, 0.0)
+            self.histogram.observe(self.last)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Process-wide registry rendered by /metrics
+metrics = MetricsRegistry()
@@ -0,0 +1,126 @@
+"""
+Payload
+JSON document passed between the PokeAPI client, the cache and the API layer
+"""
+import hashlib
+import time
+from email.utils import formatdate
+from typing import Any, Dict, Optional
+from app.core.serialization import json_dumps, json_loads
+from app.infrastructure.compression import compress
+
+
+class Payload:
+    """
+    A JSON document with its serialized body and validators
+
+    Either the parsed data or the serialized body may be given; the other is
+    derived on first access and kept. A cached payload is therefore serialized
+    and hashed at most once, however many responses it is used for.
+
+    Compressed bodies are produced on demand per content coding and kept as
+    well, so a cached payload is compressed once per coding, not per response.
+
+    Upstream validators (ETag / Last-Modified from PokeAPI) are kept so that
+    an expired cache entry can be revalidated with a conditional GET.
+
+    `stale` is set on copies made by as_stale() when an expired document is
+    served: "revalidating" while a background refresh runs, "error" when
+    PokeAPI could not provide a fresh one.
+
+    Args:
+        data: Parsed JSON document
+        body: Serialized JSON document
+        upstream_etag: ETag header PokeAPI sent with the document
+        upstream_last_modified: Last-Modified header PokeAPI sent with the document
+        created_at: When the document was obtained (epoch seconds)
+    """
+
+    __slots__ = (
+        "_data", "_body", "_etag", "_encoded", "upstream_etag", "upstream_last_modified", "created_at", "stale",
+    )
+
+    def __init__(
+        self,
+        data: Any = None,
+        body: Optional[bytes] = None,
+        upstream_etag: Optional[str] = None,
+        upstream_last_modified: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ):
+        if data is None and body is None:
+            raise ValueError("Payload needs data or body")
+        self._data = data
+        self._body = body
+        self._etag: Optional[str] = None
+        self._encoded: Dict[str, bytes] = {}
+        self.upstream_etag = upstream_etag
+        self.upstream_last_modified = upstream_last_modified
+        self.created_at = time.time() if created_at is None else created_at
+        self.stale: Optional[str] = None
+
+    @property
+    def data(self) -> Any:
+        """Parsed document"""
+        if self._data is None:
+            self._data = json_loads(self._body)
+        return self._data
+
+    @property
+    def body(self) -> bytes:
+        """Serialized document, compact UTF-8 JSON"""
+        if self._body is None:
+            self._body = json_dumps(self._data)
+        return self._body
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag derived from the body"""
+        if self._etag is None:
+            self._etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        return self._etag
+
+    def encoded(self, encoding: str) -> bytes:
+        """Body compressed with the given content coding ("br" or "gzip")"""
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            encoded = self._encoded[encoding] = compress(self.body, encoding)
+        return encoded
+
+    def is_encoded(self, encoding: str) -> bool:
+        """Whether the body has already been compressed with this coding"""
+        return encoding in self._encoded
+
+    @property
+    def last_modified(self) -> str:
+        """Last-Modified header value: PokeAPI's if known, otherwise when we obtained it"""
+        return self.upstream_last_modified or formatdate(self.created_at, usegmt=True)
+
+    def as_stale(self, reason: str) -> "Payload":
+        """Copy marked as served stale, sharing the parsed data and encoded bodies"""
+        copy = Payload.__new__(Payload)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy.stale = reason
+        return copy
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this document with PokeAPI"""
+        headers = {}
+        if self.upstream_etag:
+            headers["If-None-Match"] = self.upstream_etag
+        if self.upstream_last_modified:
+            headers["If-Modified-Since"] = self.upstream_last_modified
+        return headers
+
+    def __getstate__(self):
+        # Persist the bodies only; data is re-parsed lazily after loading
+        return (self.body, self.upstream_etag, self.upstream_last_modified, self.created_at, self._encoded)
+
+    def __setstate__(self, state):
+        self._body, self.upstream_etag, self.upstream_last_modified, self.created_at = state[:4]
+        # Entries pickled before compressed bodies were stored have no fifth item
+        self._encoded = dict(state[4]) if len(state) > 4 else {}
+        self._data = None
+        self._etag = None
+        self.stale = None
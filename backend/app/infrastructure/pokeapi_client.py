@@ -3,107 +3,506 @@ PokeAPI Client
 Handles all communication with the external PokeAPI service
 This layer can be easily mocked for testing
 """
+import asyncio
+import logging
+import math
+import time
 import httpx
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Union
 from fastapi import HTTPException, status
 from app.core.config import get_settings
+from app.core.serialization import json_loads
+from app.core.tracing import span
+from app.infrastructure.metrics import metrics
+from app.infrastructure.payload import Payload
+from app.infrastructure.rate_limit import FCNTL_AVAILABLE, TokenBucket
+from app.infrastructure.resilience import (
+    HALF_OPEN, CircuitBreaker, LatencyTracker, RetryBudget, UpstreamError, backoff_delay,
+)
+from app.infrastructure.snapshot import SnapshotPokeAPIClient
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on installed extras
+    HTTP2_AVAILABLE = False
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+upstream_duration = metrics.histogram(
+    "pokeapi_request_duration_seconds",
+    "PokeAPI request latency by kind of call and outcome",
+    ("kind", "outcome"),
+)
+upstream_rejected = metrics.counter(
+    "pokeapi_requests_rejected_total",
+    "PokeAPI calls not sent because of the circuit breaker, the outbound rate limit or a spent deadline",
+    ("reason",),
+)
+
+# Larger than any PokeAPI resource list (moves, the largest, has about a thousand entries)
+RESOURCE_LIST_LIMIT = 100000
+
+
+def response_outcome(status_code: int) -> str:
+    """Metric label for an upstream answer"""
+    if status_code < 400:
+        return "ok"
+    if status_code == 404:
+        return "not_found"
+    return "client_error" if status_code < 500 else "server_error"
 
 
 class PokeAPIClient:
     """
     Client for interacting with PokeAPI
     Encapsulates all HTTP communication with the external service
+
+    A single connection-pooled httpx.AsyncClient is shared by every call, so
+    TCP/TLS handshakes are paid once per pooled connection instead of once per
+    proxied request. The pool is opened by the application lifespan (see
+    app/main.py) and lazily on first use otherwise.
+
+    Calls go through a circuit breaker, so an unhealthy PokeAPI is answered
+    with an immediate 503 instead of tying up a coroutine per request, and
+    each kind of call (list, detail, type, catalog, reference) gets a timeout
+    adapted to its observed latency instead of the flat POKEAPI_TIMEOUT. Transient
+    failures are retried, and slow requests optionally hedged, within a
+    per-call deadline and a shared retry budget. An optional token bucket
+    keeps outbound traffic within PokeAPI's fair-use limits by queueing
+    requests rather than letting PokeAPI throttle them.
     """
-    
-    def __init__(self):
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.base_url = settings.POKEAPI_BASE_URL
         self.timeout = settings.POKEAPI_TIMEOUT
-    
+        self.limits = httpx.Limits(
+            max_connections=settings.POKEAPI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.POKEAPI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.POKEAPI_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = settings.POKEAPI_HTTP2 and HTTP2_AVAILABLE
+        if settings.POKEAPI_HTTP2 and not HTTP2_AVAILABLE:
+            logger.warning("POKEAPI_HTTP2 is enabled but 'h2' is not installed, using HTTP/1.1")
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.POKEAPI_BREAKER_FAILURE_THRESHOLD,
+            min_calls=settings.POKEAPI_BREAKER_MIN_CALLS,
+            window_seconds=settings.POKEAPI_BREAKER_WINDOW_SECONDS,
+            open_seconds=settings.POKEAPI_BREAKER_OPEN_SECONDS,
+        )
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.retry_budget = RetryBudget(settings.POKEAPI_RETRY_BUDGET_RATIO, settings.POKEAPI_RETRY_BUDGET_MAX)
+        self.retries = 0
+        self.hedges = 0
+        if settings.POKEAPI_RATE_LIMIT_LOCK_FILE and not FCNTL_AVAILABLE:
+            logger.warning("POKEAPI_RATE_LIMIT_LOCK_FILE needs fcntl, limiting per process instead")
+        self.rate_limiter = TokenBucket(
+            rate=settings.POKEAPI_RATE_LIMIT_PER_SECOND,
+            burst=settings.POKEAPI_RATE_LIMIT_BURST,
+            lock_path=settings.POKEAPI_RATE_LIMIT_LOCK_FILE,
+        )
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled AsyncClient used for every upstream request"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2,
+            transport=self.transport,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared AsyncClient, created on first access if start() was not called"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self) -> None:
+        """Open the connection pool (called on application startup)"""
+        self.client
+
+    async def close(self) -> None:
+        """Close the connection pool (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def latency_for(self, kind: str) -> LatencyTracker:
+        """Latency window (and adaptive timeout) for one kind of call"""
+        tracker = self.latency.get(kind)
+        if tracker is None:
+            tracker = self.latency[kind] = LatencyTracker(
+                maximum=self.timeout,
+                minimum=min(settings.POKEAPI_TIMEOUT_MIN, self.timeout),
+                percentile=settings.POKEAPI_TIMEOUT_PERCENTILE,
+                multiplier=settings.POKEAPI_TIMEOUT_MULTIPLIER,
+                fallback_after=settings.POKEAPI_TIMEOUT_FALLBACK_AFTER,
+            )
+        return tracker
+
+    def health(self) -> Dict[str, Any]:
+        """Circuit breaker state, per-kind latency/timeout, retries and rate limiting, for /health"""
+        return {
+            "circuit_breaker": self.breaker.snapshot() if settings.POKEAPI_BREAKER_ENABLED else None,
+            "latency": {kind: tracker.snapshot() for kind, tracker in self.latency.items()},
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "retry_budget": {
+                "tokens": round(self.retry_budget.tokens, 2),
+                "exhausted": self.retry_budget.exhausted,
+            },
+            "rate_limit": self.rate_limiter.snapshot() if settings.POKEAPI_RATE_LIMIT_ENABLED else None,
+        }
+
+    async def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        not_found_detail: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        kind: str = "other",
+    ) -> httpx.Response:
+        """
+        Perform a GET against PokeAPI and map transport errors to HTTPException
+
+        Transient failures (timeouts, transport errors, 5xx) are retried up to
+        POKEAPI_MAX_RETRIES times with jittered exponential backoff, as long as
+        the retry budget has a token and the backoff fits in the POKEAPI_DEADLINE
+        left for this call. With POKEAPI_HEDGING, each attempt may also be
+        hedged (see _hedged).
+
+        Args:
+            path: Path relative to POKEAPI_BASE_URL
+            params: Query parameters
+            not_found_detail: If given, a 404 from PokeAPI becomes a 404 with this detail
+            headers: Extra request headers (e.g. conditional request validators)
+            kind: Call category for latency tracking and the adaptive timeout
+
+        Returns:
+            Successful (2xx or 304 Not Modified) httpx response
+
+        Raises:
+            HTTPException: 404 (when requested), 504 on timeout, 503 otherwise
+                (immediately, with Retry-After, while the circuit breaker is open)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.POKEAPI_DEADLINE
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(deadline, path, params, not_found_detail, headers, kind)
+            except UpstreamError as e:
+                if not e.retryable or attempt >= settings.POKEAPI_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, settings.POKEAPI_RETRY_BACKOFF_BASE, settings.POKEAPI_RETRY_BACKOFF_MAX)
+                if deadline - loop.time() <= delay or not self.retry_budget.withdraw():
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _hedged(
+        self,
+        deadline: float,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        not_found_detail: Optional[str],
+        headers: Optional[Dict[str, str]],
+        kind: str,
+    ) -> httpx.Response:
+        """
+        One attempt, hedged with a second identical request when the first is slow
+
+        If the first request has not answered after the POKEAPI_HEDGE_PERCENTILE
+        latency of this kind of call (and the retry budget allows), a second one
+        is sent and the first successful answer wins; the other is cancelled.
+        """
+        args = (deadline, path, params, not_found_detail, headers, kind)
+        hedge_after = self.latency_for(kind).quantile(settings.POKEAPI_HEDGE_PERCENTILE)
+        if not settings.POKEAPI_HEDGING or hedge_after is None:
+            return await self._attempt(*args)
+
+        tasks = {asyncio.ensure_future(self._attempt(*args))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done and self.retry_budget.withdraw():
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(self._attempt(*args)))
+
+            error: Optional[BaseException] = None
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Retrieve every finished task's exception before picking a winner
+                outcomes = [(task, task.exception()) for task in done]
+                for task, exception in outcomes:
+                    if exception is None:
+                        return task.result()
+                    error = exception
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _attempt(
+        self,
+        deadline: float,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        not_found_detail: Optional[str],
+        headers: Optional[Dict[str, str]],
+        kind: str,
+    ) -> httpx.Response:
+        """
+        A single request, guarded by the rate limiter and the circuit breaker
+
+        Timeouts, transport errors and 5xx responses count as failures for the
+        circuit breaker; any other answer (including 404) counts as a success.
+        The timeout adapts to observed latency and never runs past the deadline;
+        half-open breaker probes get the full POKEAPI_TIMEOUT, so a recovered
+        but slower upstream can close the breaker again.
+        """
+        if settings.POKEAPI_RATE_LIMIT_ENABLED:
+            max_wait = deadline - asyncio.get_running_loop().time()
+            with span("upstream_wait"):
+                acquired = await self.rate_limiter.acquire(max_wait=max_wait)
+            if not acquired:
+                upstream_rejected.labels("rate_limit").inc()
+                raise UpstreamError(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="PokeAPI rate limit would be exceeded before the deadline",
+                )
+        breaker = self.breaker if settings.POKEAPI_BREAKER_ENABLED else None
+        if breaker is not None and not breaker.allow():
+            upstream_rejected.labels("circuit_open").inc()
+            raise UpstreamError(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="PokeAPI is unavailable, try again later",
+                headers={"Retry-After": str(max(math.ceil(breaker.retry_after()), 1))},
+            )
+        tracker = self.latency_for(kind)
+        probing = breaker is not None and breaker.state == HALF_OPEN
+        timeout = tracker.timeout() if settings.POKEAPI_ADAPTIVE_TIMEOUT and not probing else self.timeout
+        started = time.monotonic()
+        timeout = min(timeout, deadline - asyncio.get_running_loop().time())
+        failed = None
+        outcome = "cancelled"
+        sent = False
+        try:
+            if timeout <= 0:
+                raise httpx.TimeoutException("deadline exceeded")
+            sent = True
+            with span("upstream"):
+                response = await self.client.get(path, params=params, headers=headers, timeout=timeout)
+            failed = response.status_code >= 500
+            outcome = response_outcome(response.status_code)
+            if not failed:
+                tracker.observe(time.monotonic() - started)
+            if response.status_code == 304:
+                return response
+            if response.status_code == 404 and not_found_detail is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=not_found_detail
+                )
+            response.raise_for_status()
+            return response
+        except httpx.TimeoutException:
+            if sent:
+                failed = True
+                outcome = "timeout"
+                # Slower than the timeout: without this the learned timeout could never grow
+                tracker.observe_timeout(timeout)
+            else:
+                # The caller's deadline ran out before sending: says nothing about PokeAPI's health
+                upstream_rejected.labels("deadline").inc()
+            raise UpstreamError(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="PokeAPI request timed out",
+                retryable=True,
+            )
+        except httpx.HTTPError as e:
+            if failed is None:
+                # Transport error: no response at all
+                failed = True
+                outcome = "transport_error"
+            raise UpstreamError(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Error fetching data from PokeAPI: {str(e)}",
+                retryable=failed,
+            )
+        finally:
+            if sent:
+                upstream_duration.labels(kind, outcome).observe(time.monotonic() - started)
+            if breaker is not None:
+                if failed is None:
+                    breaker.release()
+                elif failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+    def _payload(self, response: httpx.Response, previous: Optional[Payload]) -> Payload:
+        """
+        Wrap a response as a Payload, reusing the previous one on 304 Not Modified
+
+        The body bytes are kept as received; they are only parsed if a caller
+        needs the data, so passthrough responses never decode and re-encode JSON.
+        """
+        if response.status_code == 304 and previous is not None:
+            return previous
+        return Payload(
+            body=response.content,
+            upstream_etag=response.headers.get("etag"),
+            upstream_last_modified=response.headers.get("last-modified"),
+        )
+
+    async def fetch_pokemons(
+        self, offset: int = 0, limit: int = 20, previous: Optional[Payload] = None
+    ) -> Payload:
+        """
+        Fetch a paginated list of pokemons as a Payload
+
+        Args:
+            offset: Number of items to skip
+            limit: Number of items to return
+            previous: Earlier copy to revalidate with a conditional GET
+
+        Returns:
+            New payload, or `previous` if PokeAPI answered 304 Not Modified
+
+        Raises:
+            HTTPException: If the external API fails
+        """
+        response = await self._get(
+            "/pokemon",
+            params={"offset": offset, "limit": limit},
+            headers=previous.conditional_headers() if previous is not None else None,
+            # Whole-catalog loads are far slower than pages; keep their latency apart
+            kind="list" if limit <= 100 else "catalog",
+        )
+        return self._payload(response, previous)
+
+    async def fetch_pokemon(self, pokemon_id: str, previous: Optional[Payload] = None) -> Payload:
+        """
+        Fetch detailed information about a specific pokemon as a Payload
+
+        Args:
+            pokemon_id: Pokemon ID or name
+            previous: Earlier copy to revalidate with a conditional GET
+
+        Returns:
+            New payload, or `previous` if PokeAPI answered 304 Not Modified
+
+        Raises:
+            HTTPException: If pokemon not found or API fails
+        """
+        response = await self._get(
+            f"/pokemon/{pokemon_id.lower()}",
+            not_found_detail=f"Pokemon '{pokemon_id}' not found",
+            headers=previous.conditional_headers() if previous is not None else None,
+            kind="detail",
+        )
+        return self._payload(response, previous)
+
     async def get_pokemons(self, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
         """
         Fetch paginated list of pokemons
-        
+
         Args:
             offset: Number of items to skip
             limit: Number of items to return
-            
+
         Returns:
             Dictionary with pokemon list data
-            
+
         Raises:
             HTTPException: If the external API fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/pokemon",
-                    params={"offset": offset, "limit": limit}
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                    detail="PokeAPI request timed out"
-                )
-            except httpx.HTTPError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"Error fetching data from PokeAPI: {str(e)}"
-                )
-    
+        return (await self.fetch_pokemons(offset=offset, limit=limit)).data
+
     async def get_pokemon_by_id(self, pokemon_id: str) -> Dict[str, Any]:
         """
         Fetch detailed information about a specific pokemon
-        
+
         Args:
             pokemon_id: Pokemon ID or name
-            
+
         Returns:
             Dictionary with detailed pokemon data
-            
+
         Raises:
             HTTPException: If pokemon not found or API fails
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/pokemon/{pokemon_id.lower()}"
-                )
-                
-                if response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Pokemon '{pokemon_id}' not found"
-                    )
-                
-                response.raise_for_status()
-                return response.json()
-                
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                    detail="PokeAPI request timed out"
-                )
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Pokemon '{pokemon_id}' not found"
-                    )
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"Error fetching data from PokeAPI: {str(e)}"
-                )
-            except httpx.HTTPError as e:
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail=f"Error fetching data from PokeAPI: {str(e)}"
-                )
+        return (await self.fetch_pokemon(pokemon_id)).data
 
+    async def get_types(self) -> Dict[str, Any]:
+        """
+        Fetch the list of pokemon types
 
-# Singleton instance for dependency injection
-pokeapi_client = PokeAPIClient()
+        Returns:
+            Dictionary with type names and URLs
+
+        Raises:
+            HTTPException: If the external API fails
+        """
+        response = await self._get("/type", params={"limit": 100}, kind="type")
+        return json_loads(response.content)
+
+    async def get_resources(self, resource: str) -> Dict[str, Any]:
+        """
+        Fetch every named resource of one kind in a single page
+
+        Args:
+            resource: PokeAPI resource kind (e.g. "move", "ability", "type")
+
+        Returns:
+            Dictionary with the count and the {"name", "url"} results
+
+        Raises:
+            HTTPException: If the external API fails
+        """
+        response = await self._get(
+            f"/{resource}", params={"offset": 0, "limit": RESOURCE_LIST_LIMIT}, kind="reference"
+        )
+        return json_loads(response.content)
 
+    async def get_type(self, type_name: str) -> Dict[str, Any]:
+        """
+        Fetch a pokemon type, including every pokemon that has it
+
+        Args:
+            type_name: Type name (e.g. "fire")
+
+        Returns:
+            Dictionary with type data and its "pokemon" members
+
+        Raises:
+            HTTPException: If the type is not found or the API fails
+        """
+        response = await self._get(
+            f"/type/{type_name.lower()}",
+            not_found_detail=f"Type '{type_name}' not found",
+            kind="type",
+        )
+        return json_loads(response.content)
+
+
+def build_pokeapi_client() -> Union[PokeAPIClient, SnapshotPokeAPIClient]:
+    """
+    Create the upstream client from settings
+    Uses the memory-mapped snapshot when POKEAPI_SNAPSHOT_PATH is set
+    """
+    if settings.POKEAPI_SNAPSHOT_PATH:
+        return SnapshotPokeAPIClient(settings.POKEAPI_SNAPSHOT_PATH)
+    return PokeAPIClient()
+
+
+# Singleton instance for dependency injection
+pokeapi_client = build_pokeapi_client()
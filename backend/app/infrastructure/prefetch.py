@@ -0,0 +1,130 @@
+"""
+Prefetch Scheduler
+Runs speculative cache fills in the background under a concurrency and rate budget
+"""
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """
+    Background task runner for speculative fetches
+
+    Jobs are fire-and-forget asyncio tasks, deduplicated by key. At most
+    `max_concurrency` run at once, and job starts are paced to
+    `rate_per_second`, so prefetching can never flood PokeAPI. When
+    `max_pending` jobs are already queued, new ones are dropped rather than
+    queued: a late prefetch is worth nothing.
+
+    Without a rate and a pending limit, it runs jobs that must not be lost
+    (stale-while-revalidate refreshes) with bounded concurrency only.
+
+    Args:
+        max_concurrency: Jobs running at the same time
+        rate_per_second: Job starts per second across all jobs (None: unpaced)
+        max_pending: Jobs queued or running before new ones are dropped (None: never dropped)
+    """
+
+    def __init__(self, max_concurrency: int, rate_per_second: Optional[float], max_pending: Optional[int]):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.max_pending = max_pending
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._tasks: Dict[str, "asyncio.Task"] = {}
+        self._next_start = 0.0
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def pending(self) -> int:
+        """Number of jobs queued or running"""
+        return len(self._tasks)
+
+    def schedule(self, key: str, fn: Callable[[], Awaitable[object]]) -> bool:
+        """
+        Queue a job unless one with the same key is already pending
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine function performing the fetch
+
+        Returns:
+            Whether the job was queued
+        """
+        if key in self._tasks:
+            return False
+        if self.max_pending is not None and len(self._tasks) >= self.max_pending:
+            self.dropped += 1
+            return False
+        task = asyncio.ensure_future(self._run(key, fn))
+        self._tasks[key] = task
+        task.add_done_callback(partial(self._forget, key))
+        self.scheduled += 1
+        return True
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily per event loop (on Python 3.9 a semaphore binds to the loop it was made in)
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[object]]) -> None:
+        async with self._get_semaphore():
+            await self._pace()
+            try:
+                await fn()
+            except HTTPException as e:
+                # Upstream errors are expected (404s, outages); the real request will see them
+                self.failed += 1
+                logger.debug("Prefetch of %s failed: %s", key, e.detail)
+                return
+            except Exception:
+                self.failed += 1
+                logger.exception("Prefetch of %s failed", key)
+                return
+            self.completed += 1
+
+    async def _pace(self) -> None:
+        """Wait for this job's start slot so starts stay under rate_per_second"""
+        if self.rate_per_second is None:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self.rate_per_second
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _forget(self, key: str, task: "asyncio.Task") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def join(self) -> None:
+        """Wait until every pending job has finished"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Cancel pending jobs"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending(),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
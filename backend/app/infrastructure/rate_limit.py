@@ -0,0 +1,297 @@
+"""
+Rate Limiting
+GCRA rate limiters and a load shedder: the outbound token bucket pacing requests
+to PokeAPI, per-subject limits and the concurrency cap for inbound requests
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # pragma: no cover - not available on Windows
+    FCNTL_AVAILABLE = False
+
+STATE_SIZE = 32
+
+
+def gcra(tat: float, now: float, interval: float, burst: int) -> Tuple[float, float]:
+    """
+    Generic cell rate algorithm step
+
+    A bucket of `burst` tokens refilling one per `interval` is represented by
+    its theoretical arrival time (TAT) alone, so a check is O(1) in time and
+    state.
+
+    Args:
+        tat: Stored theoretical arrival time (0 for a full bucket)
+        now: Current time on the same clock
+        interval: Seconds per token
+        burst: Bucket size
+
+    Returns:
+        (wait, tat): seconds until a token is available, and the TAT to store
+        if the caller takes it
+    """
+    tat = max(tat, now)
+    return max(tat - (burst - 1) * interval - now, 0.0), tat + interval
+
+
+class TokenBucket:
+    """
+    Token bucket that queues callers instead of failing them
+
+    Tokens refill at `rate` per second up to `burst`. The bucket is kept as a
+    single theoretical arrival time (GCRA): each caller reserves the next free
+    slot and sleeps until it, so waiters are served strictly in arrival order
+    and no polling is needed. A caller is only turned away when its slot lies
+    further out than the `max_wait` it passes to acquire().
+
+    With `lock_path`, that arrival time is stored in the file and updated under
+    an exclusive flock, so every process using the same path shares one budget.
+
+    Args:
+        rate: Requests per second
+        burst: Requests that may go out back to back after an idle period
+        lock_path: Optional file shared by the worker processes on this host
+    """
+
+    def __init__(self, rate: float, burst: int, lock_path: Optional[str] = None):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.lock_path = lock_path if FCNTL_AVAILABLE else None
+        # Wall clock when shared: monotonic clocks are not comparable across processes
+        self._clock = time.time if self.lock_path else time.monotonic
+        self._tat = 0.0
+        self._fd: Optional[int] = None
+        self._fd_pid: Optional[int] = None
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def _open(self) -> int:
+        # flock locks belong to the open file, so a descriptor inherited over
+        # fork() would not exclude the parent: every process opens its own
+        pid = os.getpid()
+        if self._fd is None or self._fd_pid != pid:
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = pid
+        return self._fd
+
+    def _reserve(self, max_wait: float) -> Optional[float]:
+        """Claim the next slot and return the wait until it, or None if it is beyond max_wait"""
+        if self.lock_path is None:
+            wait, tat = gcra(self._tat, self._clock(), 1 / self.rate, self.burst)
+            if wait > max_wait:
+                return None
+            self._tat = tat
+            return wait
+        fd = self._open()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(fd, STATE_SIZE, 0).strip()
+            wait, tat = gcra(float(raw) if raw else 0.0, self._clock(), 1 / self.rate, self.burst)
+            if wait > max_wait:
+                return None
+            os.pwrite(fd, repr(tat).encode().ljust(STATE_SIZE), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        return wait
+
+    async def acquire(self, max_wait: float = math.inf) -> bool:
+        """
+        Wait for a token
+
+        Args:
+            max_wait: Longest acceptable wait in seconds
+
+        Returns:
+            True once the caller may send its request, False (without taking a
+            token) if that would take longer than max_wait
+        """
+        wait = self._reserve(max_wait)
+        if wait is None:
+            self.rejected += 1
+            return False
+        self.acquired += 1
+        if wait > 0:
+            self.delayed += 1
+            self.wait_seconds += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+        return True
+
+    def reset(self) -> None:
+        """Refill the local bucket and clear the counters"""
+        self._tat = 0.0
+        self.acquired = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Budget, queue depth and wait times, suitable for the /health payload"""
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "shared": self.lock_path is not None,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds, 3),
+            "wait_seconds_avg": round(self.wait_seconds / self.delayed, 4) if self.delayed else 0.0,
+            "wait_seconds_max": round(self.max_wait, 4),
+        }
+
+
+class KeyedRateLimiter:
+    """
+    Non-blocking GCRA limit per key (user, client IP)
+
+    Only the theoretical arrival time is kept per key, in an LRU-ordered dict
+    bounded by `max_keys`, so a check costs O(1) whatever the traffic. An
+    evicted key simply starts again with a full bucket.
+
+    Args:
+        rate: Requests per second allowed per key
+        burst: Requests a key may send back to back
+        max_keys: Keys tracked at most (least recently seen evicted)
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key: str) -> float:
+        """
+        Count one request for `key`
+
+        Returns:
+            0 if the request is allowed, otherwise the seconds until it would be
+        """
+        wait, tat = gcra(self._tats.get(key, 0.0), time.monotonic(), 1 / self.rate, self.burst)
+        if wait > 0:
+            self.limited += 1
+            return wait
+        self.allowed += 1
+        self._tats[key] = tat
+        self._tats.move_to_end(key)
+        if len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        return 0.0
+
+    def reset(self) -> None:
+        self._tats.clear()
+        self.allowed = 0
+        self.limited = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "subjects": len(self._tats),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class LoadShedder:
+    """
+    Global concurrency cap with a bounded FIFO queue
+
+    Up to `max_concurrent` requests run at once. Further requests wait in
+    arrival order; a request is shed (acquire() returns False) when
+    `queue_size` requests are already waiting or it has waited
+    `queue_timeout` seconds, so latency stays bounded instead of every request
+    slowing down together under overload.
+
+    Args:
+        max_concurrent: Requests running at the same time
+        queue_size: Requests allowed to wait for a slot
+        queue_timeout: Longest wait for a slot, in seconds
+    """
+
+    def __init__(self, max_concurrent: int, queue_size: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque["asyncio.Future"] = deque()
+        self.shed = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot
+
+        Returns:
+            True once the request may run (it must then call release()), False if shed
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.shed += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait timed out: it is ours
+                return True
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away: pass it on
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        return True
+
+    def release(self) -> None:
+        """Hand the slot to the longest waiting request, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def reset(self) -> None:
+        self.shed = 0
+        self.timed_out = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
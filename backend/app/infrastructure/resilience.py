@@ -0,0 +1,296 @@
+"""
+Upstream Resilience
+Circuit breaker, latency-based adaptive timeouts, retry backoff and retry budget for calls to PokeAPI
+"""
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from fastapi import HTTPException
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamError(HTTPException):
+    """
+    HTTPException for a failed PokeAPI call
+
+    `retryable` marks transient failures (timeouts, transport errors, 5xx)
+    that another attempt may fix; breaker rejections and client errors are
+    not retryable.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: str,
+        retryable: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+        self.retryable = retryable
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is unhealthy
+
+    Closed: calls go through; outcomes are kept for `window_seconds`. Once at
+    least `min_calls` were made in the window and the failure ratio reaches
+    `failure_threshold`, the breaker opens.
+    Open: calls are rejected immediately for `open_seconds`.
+    Half-open: up to `half_open_calls` probe calls go through. A successful
+    probe closes the breaker, a failed one opens it again.
+
+    Args:
+        failure_threshold: Failure ratio (0-1) that opens the breaker
+        min_calls: Calls needed in the window before the ratio is trusted
+        window_seconds: Length of the rolling outcome window
+        open_seconds: How long to reject calls before probing again
+        half_open_calls: Concurrent probes allowed while half-open
+    """
+
+    def __init__(
+        self,
+        failure_threshold: float,
+        min_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.opened = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._probes = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through (0 unless open)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(self.opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go upstream now
+
+        Every allowed call must be followed by record_success() or record_failure().
+        """
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)"""
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self) -> None:
+        if self.state == HALF_OPEN:
+            self._close()
+            return
+        self._record(False)
+
+    def record_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._record(True)
+        total = len(self._outcomes)
+        if self.state == CLOSED and total >= self.min_calls and self._failures / total >= self.failure_threshold:
+            self._open()
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        self._trim(now)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self._outcomes.clear()
+        self._failures = 0
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._probes = 0
+
+    def reset(self) -> None:
+        """Close the breaker and clear all counters"""
+        self._close()
+        self.opened = 0
+        self.rejected = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State and counters, suitable for the /health payload"""
+        self._trim(time.monotonic())
+        total = len(self._outcomes)
+        return {
+            "state": self.state,
+            "failure_rate": round(self._failures / total, 4) if total else 0.0,
+            "calls_in_window": total,
+            "retry_after": round(self.retry_after(), 3),
+            "times_opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """
+    Rolling window of upstream latencies with percentile lookup
+
+    Used to derive a timeout from what the upstream actually does: the
+    `percentile` latency times `multiplier`, clamped to [minimum, maximum].
+    Until `min_samples` latencies have been seen, `maximum` is used.
+
+    Attempts that time out are recorded at the timeout they hit (a lower
+    bound of their latency), so the timeout grows when the upstream slows
+    down. After `fallback_after` consecutive timeouts, `maximum` is used until
+    an attempt succeeds again.
+
+    Args:
+        maximum: Configured timeout, also the upper bound (seconds)
+        minimum: Lower bound for the adaptive timeout (seconds)
+        percentile: Latency percentile the timeout is based on (0-100)
+        multiplier: Headroom applied to that percentile
+        window: Number of recent latencies kept
+        min_samples: Latencies needed before adapting
+        fallback_after: Consecutive timeouts after which `maximum` is used (0 never falls back)
+    """
+
+    def __init__(
+        self,
+        maximum: float,
+        minimum: float,
+        percentile: float = 99,
+        multiplier: float = 3.0,
+        window: int = 500,
+        min_samples: int = 50,
+        fallback_after: int = 3,
+    ):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.fallback_after = fallback_after
+        self.consecutive_timeouts = 0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: Optional[list] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+        self.consecutive_timeouts = 0
+
+    def observe_timeout(self, seconds: float) -> None:
+        """Record an attempt that timed out after `seconds`"""
+        self._samples.append(seconds)
+        self._sorted = None
+        self.consecutive_timeouts += 1
+
+    def quantile(self, percentile: float) -> Optional[float]:
+        """Latency at the given percentile, or None before min_samples observations"""
+        if len(self._samples) < self.min_samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+        index = min(math.ceil(percentile / 100 * len(self._sorted)) - 1, len(self._sorted) - 1)
+        return self._sorted[max(index, 0)]
+
+    def timeout(self) -> float:
+        """Current timeout in seconds"""
+        latency = self.quantile(self.percentile)
+        if latency is None or 0 < self.fallback_after <= self.consecutive_timeouts:
+            return self.maximum
+        return min(max(latency * self.multiplier, self.minimum), self.maximum)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95, p99 = (self.quantile(p) for p in (50, 95, 99))
+        return {
+            "samples": len(self._samples),
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p95": round(p95, 4) if p95 is not None else None,
+            "p99": round(p99, 4) if p99 is not None else None,
+            "timeout": round(self.timeout(), 3),
+            "consecutive_timeouts": self.consecutive_timeouts,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter
+
+    Args:
+        attempt: Zero-based retry number
+        base: Delay ceiling for the first retry (seconds)
+        cap: Maximum delay ceiling (seconds)
+
+    Returns:
+        Random delay in [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RetryBudget:
+    """
+    Limits retries and hedged requests to a share of regular traffic
+
+    Every call deposits `ratio` tokens, up to `max_tokens`; every retry or
+    hedge withdraws a whole token and is skipped when none is left. In steady
+    state at most `ratio` extra attempts are made per call, so during an
+    outage retries cannot multiply the load on PokeAPI.
+
+    Args:
+        ratio: Tokens earned per call (e.g. 0.2 = one retry per five calls)
+        max_tokens: Bucket size, also the initial balance
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def withdraw(self) -> bool:
+        """Take a token for one extra attempt; False when the budget is spent"""
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        return True
+
+    def reset(self) -> None:
+        self.tokens = self.max_tokens
+        self.exhausted = 0
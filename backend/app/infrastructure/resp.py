@@ -0,0 +1,167 @@
+"""
+Redis Protocol Client
+Minimal asyncio client for RESP2 servers (Redis, Valkey, KeyDB, ...) with a small connection pool
+"""
+import asyncio
+from typing import Any, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class RespError(Exception):
+    """Error reply from the server, or a reply that could not be parsed"""
+
+
+def encode_command(*args: Union[str, bytes, int, float]) -> bytes:
+    """Encode a command as a RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """
+    Read one reply
+
+    Returns:
+        str for simple strings, int for integers, bytes (or None) for bulk
+        strings and a list (or None) for arrays
+
+    Raises:
+        RespError: For error replies (including an error element of an array,
+            raised once the whole array has been read)
+        ConnectionError: If the server closed the connection
+    """
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        # Every element is read before an error element is raised, so the connection stays in sync
+        items = []
+        error = None
+        for _ in range(length):
+            try:
+                items.append(await read_reply(reader))
+            except RespError as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return items
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+class RespClient:
+    """
+    Connection-pooled client for a Redis-compatible server
+
+    Each command borrows an idle connection (opening one if needed, at most
+    `pool_size` at a time) and returns it afterwards. A connection that fails
+    or times out is closed instead, so no reply can be read by the wrong
+    caller. Connections are bound to the event loop that opened them and are
+    dropped when the client is used from another one.
+
+    Args:
+        url: redis://[:password@]host[:port][/db]
+        pool_size: Maximum number of open connections
+        timeout: Seconds to wait for a connection or a reply
+    """
+
+    def __init__(self, url: str, pool_size: int = 10, timeout: float = 1.0):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme: {parts.scheme!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: List[Connection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    async def execute(self, *args: Union[str, bytes, int, float]) -> Any:
+        """
+        Send one command and return its reply
+
+        Raises:
+            RespError: For error replies
+            OSError: If the server cannot be reached (ConnectionError included)
+            asyncio.TimeoutError: If the server does not answer within `timeout`
+        """
+        async with self._get_semaphore():
+            connection = await asyncio.wait_for(self._acquire(), self.timeout)
+            try:
+                reply = await asyncio.wait_for(self._roundtrip(connection, encode_command(*args)), self.timeout)
+            except RespError:
+                # The reply was read in full, the connection is still in sync
+                self._idle.append(connection)
+                raise
+            except BaseException:
+                connection[1].close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily per event loop, together with the connections opened in it
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.close()
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+            self._loop = loop
+        return self._semaphore
+
+    async def _acquire(self) -> Connection:
+        if self._idle:
+            return self._idle.pop()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password is not None:
+                credentials = (self.username, self.password) if self.username else (self.password,)
+                await self._roundtrip((reader, writer), encode_command("AUTH", *credentials))
+            if self.db:
+                await self._roundtrip((reader, writer), encode_command("SELECT", self.db))
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def _roundtrip(connection: Connection, command: bytes) -> Any:
+        reader, writer = connection
+        writer.write(command)
+        await writer.drain()
+        return await read_reply(reader)
+
+    def close(self) -> None:
+        """Close the idle connections (ones in use are closed when their command fails)"""
+        for _, writer in self._idle:
+            try:
+                writer.close()
+            except RuntimeError:
+                # Opened in an event loop that has been closed since
+                pass
+        self._idle.clear()
@@ -0,0 +1,55 @@
+"""
+Single-flight
+Coalesces concurrent identical upstream fetches into one in-flight call
+"""
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key
+
+    The first caller for a key starts the work as a task; callers that arrive
+    while it is running await the same task. The result, or the exception
+    (including HTTPException 404/504 mappings), is delivered to every waiter.
+    A waiter that is cancelled does not cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future"] = {}
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being fetched"""
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn once for all concurrent callers of key
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            The shared result of fn
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(partial(self._forget, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(call)
+
+    def _forget(self, key: str, call: "asyncio.Future") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not call.cancelled():
+            call.exception()
@@ -0,0 +1,284 @@
+"""
+Catalog Snapshot
+Compact binary snapshot of the PokeAPI catalog and a memory-mapped client that
+serves reads from it with no network I/O
+
+File layout (little-endian):
+    header    32 bytes   magic, version, record count, metadata offset, metadata length
+    index     64 bytes per record, sorted by ID: id (u32), name (48 bytes, NUL padded),
+              blob offset (u64), blob length (u32)
+    blobs     detail JSON documents back to back, then the metadata JSON
+              (upstream base URL, creation time, type membership, and the
+              moves, abilities and types the details reference)
+"""
+import asyncio
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from app.core.serialization import json_dumps, json_loads
+from app.infrastructure.payload import Payload
+
+MAGIC = b"PKSNAP01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+RECORD = struct.Struct("<I48sQI")
+INDEX_OFFSET = HEADER.size
+
+# Where details reference each resource kind get_resources can list: (list field, item key)
+RESOURCE_FIELDS = {"move": ("moves", "move"), "ability": ("abilities", "ability"), "type": ("types", "type")}
+
+
+def collect_resources(details: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, str]]]:
+    """
+    The distinct resources of each RESOURCE_FIELDS kind referenced by the details, in ID order
+    """
+    by_url: Dict[str, Dict[str, Dict[str, str]]] = {resource: {} for resource in RESOURCE_FIELDS}
+    for detail in details:
+        for resource, (list_field, item_key) in RESOURCE_FIELDS.items():
+            for item in detail.get(list_field, []):
+                by_url[resource].setdefault(item[item_key]["url"], item[item_key])
+    return {
+        resource: sorted(items.values(), key=lambda item: int(item["url"].rstrip("/").rsplit("/", 1)[1]))
+        for resource, items in by_url.items()
+    }
+
+
+def write_snapshot(
+    path: str,
+    details: Iterable[Dict[str, Any]],
+    types: Dict[str, List[int]],
+    base_url: str,
+) -> int:
+    """
+    Write a snapshot file atomically
+
+    Args:
+        path: Destination file
+        details: PokeAPI detail payloads (any order)
+        types: Type name to member pokemon IDs
+        base_url: Upstream base URL, used to rebuild resource links
+
+    Returns:
+        Number of records written
+    """
+    details = list(details)
+    documents = sorted(
+        ((detail["id"], detail["name"], json_dumps(detail)) for detail in details),
+        key=lambda document: document[0],
+    )
+    metadata = json_dumps({
+        "base_url": base_url.rstrip("/"),
+        "created_at": time.time(),
+        "types": types,
+        "resources": collect_resources(details),
+    })
+    blob_offset = INDEX_OFFSET + RECORD.size * len(documents)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        offset = blob_offset
+        f.seek(INDEX_OFFSET)
+        for pokemon_id, name, body in documents:
+            encoded_name = name.encode()
+            if len(encoded_name) > 48:
+                raise ValueError(f"Pokemon name too long for snapshot index: {name}")
+            f.write(RECORD.pack(pokemon_id, encoded_name, offset, len(body)))
+            offset += len(body)
+        for _, _, body in documents:
+            f.write(body)
+        f.write(metadata)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(documents), offset, len(metadata)))
+    os.replace(tmp_path, path)
+    return len(documents)
+
+
+class SnapshotPokeAPIClient:
+    """
+    PokeAPIClient-compatible backend reading from a memory-mapped snapshot
+
+    ID lookups binary-search the fixed-width index directly in the mapping;
+    names resolve through a dict built once when the file is opened. Detail
+    documents are sliced out of the blob region, so a point read costs a
+    handful of microseconds plus JSON parsing.
+
+    Args:
+        path: Snapshot file written by write_snapshot (see app.tools.snapshot)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._by_name: Dict[str, int] = {}
+        self._metadata: Dict[str, Any] = {}
+        self._resources: Optional[Dict[str, List[Dict[str, str]]]] = None
+        self.base_url = ""
+
+    async def start(self) -> None:
+        """Map the snapshot file into memory"""
+        self._open()
+
+    async def close(self) -> None:
+        """Unmap the snapshot file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._resources = None
+
+    def health(self) -> Dict[str, Any]:
+        """Snapshot in use, for /health (there is no upstream to break or time out)"""
+        return {"snapshot": self.path, "created_at": self._metadata.get("created_at")}
+
+    def _open(self) -> mmap.mmap:
+        if self._mmap is None:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, count, meta_offset, meta_length = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC or version != VERSION:
+                mapped.close()
+                raise ValueError(f"{self.path} is not a version {VERSION} pokemon snapshot")
+            self._mmap = mapped
+            self._count = count
+            self._metadata = json_loads(mapped[meta_offset:meta_offset + meta_length])
+            self.base_url = self._metadata["base_url"]
+            self._resources = self._metadata.get("resources")
+            self._by_name = {
+                self._record(slot)[1]: slot for slot in range(count)
+            }
+        return self._mmap
+
+    def _record(self, slot: int) -> tuple:
+        pokemon_id, raw_name, offset, length = RECORD.unpack_from(self._mmap, INDEX_OFFSET + slot * RECORD.size)
+        return pokemon_id, raw_name.rstrip(b"\0").decode(), offset, length
+
+    def _find_slot(self, pokemon_id: int) -> Optional[int]:
+        mapped = self._open()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = struct.unpack_from("<I", mapped, INDEX_OFFSET + mid * RECORD.size)[0]
+            if current < pokemon_id:
+                lo = mid + 1
+            elif current > pokemon_id:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _resource_url(self, kind: str, pokemon_id: int) -> str:
+        return f"{self.base_url}/{kind}/{pokemon_id}/"
+
+    async def fetch_pokemons(self, offset: int = 0, limit: int = 20, previous: Optional[Payload] = None) -> Payload:
+        """Serve a list page as a Payload (snapshots never change, so `previous` is returned as is)"""
+        if previous is not None:
+            return previous
+        return Payload(data=await self.get_pokemons(offset=offset, limit=limit), created_at=self._metadata["created_at"])
+
+    async def fetch_pokemon(self, pokemon_id: str, previous: Optional[Payload] = None) -> Payload:
+        """Serve a pokemon detail as a Payload wrapping the stored JSON bytes"""
+        if previous is not None:
+            return previous
+        body = self._detail_bytes(pokemon_id)
+        return Payload(body=body, created_at=self._metadata["created_at"])
+
+    async def get_pokemons(self, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """
+        Serve a list page from the snapshot index, in PokeAPI's format
+        """
+        self._open()
+        end = min(offset + limit, self._count)
+        results = []
+        for slot in range(offset, end):
+            pokemon_id, name, _, _ = self._record(slot)
+            results.append({"name": name, "url": self._resource_url("pokemon", pokemon_id)})
+        return {
+            "count": self._count,
+            "next": f"{self.base_url}/pokemon?offset={end}&limit={limit}" if end < self._count else None,
+            "previous": f"{self.base_url}/pokemon?offset={max(offset - limit, 0)}&limit={limit}" if offset > 0 else None,
+            "results": results,
+        }
+
+    async def get_pokemon_by_id(self, pokemon_id: str) -> Dict[str, Any]:
+        """
+        Serve a pokemon detail from the blob region
+
+        Raises:
+            HTTPException: 404 if the pokemon is not in the snapshot
+        """
+        return json_loads(self._detail_bytes(pokemon_id))
+
+    def _detail_bytes(self, pokemon_id: str) -> bytes:
+        mapped = self._open()
+        key = pokemon_id.lower()
+        slot = self._find_slot(int(key)) if key.isdigit() else self._by_name.get(key)
+        if slot is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Pokemon '{pokemon_id}' not found"
+            )
+        _, _, offset, length = self._record(slot)
+        return mapped[offset:offset + length]
+
+    async def get_types(self) -> Dict[str, Any]:
+        """Serve the type list recorded in the snapshot metadata"""
+        self._open()
+        names = sorted(self._metadata["types"])
+        return {
+            "count": len(names),
+            "results": [{"name": name, "url": f"{self.base_url}/type/{name}/"} for name in names],
+        }
+
+    async def get_type(self, type_name: str) -> Dict[str, Any]:
+        """
+        Serve a type and its members from the snapshot metadata
+
+        Raises:
+            HTTPException: 404 if the type is not in the snapshot
+        """
+        self._open()
+        members = self._metadata["types"].get(type_name.lower())
+        if members is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Type '{type_name}' not found"
+            )
+        pokemon = []
+        for pokemon_id in members:
+            slot = self._find_slot(pokemon_id)
+            if slot is not None:
+                pokemon.append({
+                    "pokemon": {"name": self._record(slot)[1], "url": self._resource_url("pokemon", pokemon_id)},
+                })
+        return {"name": type_name.lower(), "pokemon": pokemon}
+
+    async def get_resources(self, resource: str) -> Dict[str, Any]:
+        """
+        List the moves, abilities or types referenced by the snapshot's pokemons
+
+        The lists are stored in the metadata by write_snapshot. Snapshots
+        written without them are scanned once, in a worker thread so the
+        event loop is not blocked, and the result is kept.
+
+        Raises:
+            HTTPException: 404 for other resource kinds
+        """
+        if resource not in RESOURCE_FIELDS:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Resource '{resource}' not in snapshot"
+            )
+        self._open()
+        if self._resources is None:
+            self._resources = await asyncio.to_thread(collect_resources, self._iter_details())
+        results = self._resources[resource]
+        return {"count": len(results), "results": results}
+
+    def _iter_details(self) -> Iterable[Dict[str, Any]]:
+        mapped = self._open()
+        for slot in range(self._count):
+            _, _, offset, length = self._record(slot)
+            yield json_loads(mapped[offset:offset + length])
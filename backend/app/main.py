@@ -2,14 +2,61 @@
 Main Application Entry Point
 Clean Architecture FastAPI application
 """
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 
 from app.core.config import get_settings
-from app.api.v1.endpoints import auth, pokemons
+from app.core.serialization import FastJSONResponse
+from app.api.compression import CompressionMiddleware
+from app.api.metrics import MetricsMiddleware, loop_lag
+from app.api.rate_limit import RateLimitMiddleware, load_shedder, login_limiter, user_limiter
+from app.api.tracing import TracingMiddleware, trace_log
+from app.api.v1.endpoints import auth, pokemons, reference
+from app.infrastructure.compression import compression_stats
+from app.infrastructure.metrics import metrics
+from app.infrastructure.pokeapi_client import pokeapi_client
+from app.services.pokemon_service import pokemon_service
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan
+    Opens the shared PokeAPI connection pool on startup (optionally preloading
+    the catalog index and warming the cache in the background) and closes it
+    on shutdown together with the shared cache tier, saving request counts
+    for the next warm-up. Event loop lag is sampled for /metrics while the
+    application runs.
+    """
+    await pokeapi_client.start()
+    if settings.METRICS_ENABLED:
+        loop_lag.start()
+    if settings.CATALOG_PRELOAD:
+        try:
+            await pokemon_service.get_catalog()
+        except HTTPException as e:
+            logger.warning("Catalog preload failed, it will be built on first search: %s", e.detail)
+    warm_up = asyncio.ensure_future(pokemon_service.warm_up(settings.PREFETCH_WARMUP_TOP_K))
+    yield
+    warm_up.cancel()
+    await asyncio.gather(warm_up, return_exceptions=True)
+    await pokemon_service.prefetcher.close()
+    await pokemon_service.revalidator.close()
+    await pokemon_service.save_popularity()
+    if pokemon_service.cache is not None:
+        pokemon_service.cache.close()
+    await pokeapi_client.close()
+    await loop_lag.stop()
+    if trace_log is not None:
+        trace_log.close()
+
 
 # API metadata
 description = """
@@ -55,13 +102,17 @@ tags_metadata = [
         "name": "Pokemons",
         "description": "Operations to retrieve pokemon information. **Authentication required**.",
     },
+    {
+        "name": "Reference",
+        "description": "Move, ability and type names for compact pokemon details. **Authentication required**.",
+    },
     {
         "name": "Root",
         "description": "Root endpoint with API information.",
     },
     {
         "name": "Health",
-        "description": "Health check endpoint for monitoring.",
+        "description": "Health check and metrics endpoints for monitoring.",
     },
 ]
 
@@ -73,6 +124,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     contact={
         "name": "API Support",
         "email": "support@example.com",
@@ -83,6 +136,15 @@ app = FastAPI(
     },
 )
 
+# Rate limits and load shedding (added first so 429/503 answers still get CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=user_limiter,
+        login=login_limiter,
+        shedder=load_shedder if settings.LOAD_SHED_MAX_CONCURRENT > 0 else None,
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -92,9 +154,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression for responses not already encoded by their endpoint
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Tracing (Server-Timing, sampled trace log, debug profiler) around everything but metrics
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, sample_rate=settings.TRACE_SAMPLE_RATE, log=trace_log)
+
+# Request metrics, outermost so rate-limited responses are measured too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="", tags=["Authentication"])
 app.include_router(pokemons.router, prefix="", tags=["Pokemons"])
+app.include_router(reference.router, prefix="", tags=["Reference"])
 
 
 @app.get("/", tags=["Root"])
@@ -110,7 +185,11 @@ async def root():
             "documentation": "/docs",
             "login": "/login",
             "pokemons": "/pokemons",
-            "pokemon_detail": "/pokemons/{id}"
+            "pokemon_detail": "/pokemons/{id}",
+            "pokemon_batch": "/pokemons/batch?ids=1,2,3",
+            "pokemon_export": "/pokemons/export?format=ndjson",
+            "reference": "/reference/{moves|abilities|types}",
+            "metrics": "/metrics"
         }
     }
 
@@ -119,14 +198,38 @@ async def root():
 async def health_check():
     """
     Health check endpoint for deployment monitoring
+    Reports "degraded" while the PokeAPI circuit breaker is not closed
     """
+    upstream = pokeapi_client.health()
+    breaker = upstream.get("circuit_breaker")
     return {
-        "status": "healthy",
+        "status": "degraded" if breaker and breaker["state"] != "closed" else "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "cache": pokemon_service.cache_stats(),
+        "compression": compression_stats.as_dict(),
+        "prefetch": pokemon_service.prefetcher.stats(),
+        "revalidate": pokemon_service.revalidator.stats(),
+        "upstream": upstream,
+        "rate_limit": {
+            "users": user_limiter.snapshot(),
+            "login": login_limiter.snapshot(),
+            "load_shedding": load_shedder.snapshot(),
+        },
     }
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=settings.METRICS_ENABLED)
+async def metrics_endpoint():
+    """
+    Metrics in the Prometheus text exposition format
+    Request and PokeAPI latency histograms, cache, limiter and event loop state
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,159 @@
+"""
+Catalog Index
+In-memory index of the full pokemon catalog for server-side search, filter and sort
+"""
+import difflib
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Upper bound used to fetch the whole catalog in a single list call
+CATALOG_MAX_SIZE = 100000
+
+STAT_COLUMNS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed", "height", "weight")
+
+
+def pokemon_id_from_url(url: str) -> int:
+    """Extract the numeric ID from a PokeAPI resource URL such as .../pokemon/25/"""
+    return int(url.rstrip("/").rsplit("/", 1)[-1])
+
+
+class CatalogIndex:
+    """
+    Immutable snapshot of the catalog
+
+    Holds an ID array with parallel name/URL columns, a sorted name column for
+    O(log n) prefix lookup, per-type ID sets and optional stat columns. Every
+    query sorts with the ID as tie-breaker, so pages of the same query never
+    overlap or skip entries.
+
+    Args:
+        entries: (id, name, url) for every pokemon
+        types: Type name to the IDs having that type
+        stats: Column name (see STAT_COLUMNS) to value per ID, if loaded
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[int, str, str]],
+        types: Dict[str, Set[int]],
+        stats: Optional[Dict[str, Dict[int, int]]] = None,
+    ):
+        rows = sorted(entries)
+        self.ids = array("l", (row[0] for row in rows))
+        self.names: List[str] = [row[1] for row in rows]
+        self.urls: List[str] = [row[2] for row in rows]
+        self._position: Dict[int, int] = {pokemon_id: i for i, pokemon_id in enumerate(self.ids)}
+
+        by_name = sorted(range(len(rows)), key=lambda i: (self.names[i], self.ids[i]))
+        self._sorted_names: List[str] = [self.names[i] for i in by_name]
+        self._sorted_positions = array("l", by_name)
+
+        self.types: Dict[str, frozenset] = {name: frozenset(ids) for name, ids in types.items()}
+        self.stats: Dict[str, Dict[int, int]] = stats or {}
+        self._orders: Dict[str, array] = {"id": array("l", range(len(rows))), "name": self._sorted_positions}
+        self._ranks: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _rank_from_order(self, order: Sequence[int]) -> array:
+        rank = array("l", [0]) * len(order)
+        for r, position in enumerate(order):
+            rank[position] = r
+        return rank
+
+    def sort_keys(self) -> List[str]:
+        """Columns that can be used in a sort expression"""
+        return ["id", "name", *self.stats]
+
+    def _order(self, column: str) -> array:
+        """Positions sorted by column (ID as tie-breaker), computed once per column"""
+        order = self._orders.get(column)
+        if order is None:
+            values = self.stats[column]
+            order = self._orders[column] = array(
+                "l", sorted(range(len(self.ids)), key=lambda i: (values.get(self.ids[i], -1), self.ids[i]))
+            )
+        return order
+
+    def _rank(self, column: str) -> array:
+        rank = self._ranks.get(column)
+        if rank is None:
+            rank = self._ranks[column] = self._rank_from_order(self._order(column))
+        return rank
+
+    def prefix_positions(self, prefix: str) -> List[int]:
+        """Positions of names starting with prefix, via binary search on the sorted name column"""
+        start = bisect_left(self._sorted_names, prefix)
+        end = bisect_left(self._sorted_names, prefix + "\uffff", lo=start)
+        return list(self._sorted_positions[start:end])
+
+    def fuzzy_positions(self, query: str, limit: int = 50) -> List[int]:
+        """Positions of the names closest to query (linear scan, for typo tolerance)"""
+        matches = difflib.get_close_matches(query, self.names, n=limit, cutoff=0.6)
+        wanted = set(matches)
+        return [i for i, name in enumerate(self.names) if name in wanted]
+
+    def query(
+        self,
+        search: Optional[str] = None,
+        fuzzy: bool = False,
+        type_name: Optional[str] = None,
+        sort: str = "id",
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[int, List[Dict[str, str]]]:
+        """
+        Search, filter, sort and paginate the catalog
+
+        Args:
+            search: Name prefix (or exact ID when numeric)
+            fuzzy: Match names approximately instead of by prefix
+            type_name: Only include pokemons of this type
+            sort: Column from sort_keys(), prefixed with "-" for descending
+            offset: Number of matches to skip
+            limit: Number of matches to return
+
+        Returns:
+            Tuple of (total matches, page of {name, url} items)
+
+        Raises:
+            ValueError: If the sort column is unknown
+        """
+        descending = sort.startswith("-")
+        column = sort.lstrip("-")
+        if column not in self.sort_keys():
+            raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(self.sort_keys())}")
+
+        positions: Optional[List[int]] = None
+        if search:
+            search = search.strip().lower()
+            if search.isdigit():
+                position = self._position.get(int(search))
+                positions = [] if position is None else [position]
+            elif fuzzy:
+                positions = self.fuzzy_positions(search)
+            else:
+                positions = self.prefix_positions(search)
+        if type_name is not None:
+            members = self.types.get(type_name.lower(), frozenset())
+            if positions is None:
+                positions = [self._position[i] for i in members if i in self._position]
+            else:
+                positions = [p for p in positions if self.ids[p] in members]
+
+        if positions is None:
+            # Whole catalog: slice the precomputed order instead of sorting
+            order = self._order(column)
+            total = len(order)
+            if descending:
+                start, stop = max(total - offset - limit, 0), max(total - offset, 0)
+                page = list(reversed(order[start:stop]))
+            else:
+                page = list(order[offset:offset + limit])
+        else:
+            ordered = sorted(positions, key=self._rank(column).__getitem__, reverse=descending)
+            total = len(ordered)
+            page = ordered[offset:offset + limit]
+        return total, [{"name": self.names[p], "url": self.urls[p]} for p in page]
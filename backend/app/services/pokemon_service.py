@@ -2,34 +2,168 @@
 Pokemon Service
 Contains business logic for pokemon operations
 """
-from typing import Dict, Any
-from app.infrastructure.pokeapi_client import PokeAPIClient
-from app.schemas.pokemon import PokemonListResponse
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
+from fastapi import HTTPException, status
+from app.core.config import get_settings
+from app.core.tracing import current_trace, span, traced
+from app.infrastructure.cache import TieredCache, build_cache
+from app.infrastructure.payload import Payload
+from app.infrastructure.pokeapi_client import PokeAPIClient, pokeapi_client
+from app.infrastructure.prefetch import PrefetchScheduler
+from app.infrastructure.singleflight import SingleFlight
+from app.schemas.pokemon import PokemonDetail, PokemonListResponse
+from app.services.catalog import CATALOG_MAX_SIZE, STAT_COLUMNS, CatalogIndex, pokemon_id_from_url
+from app.services.records import PokemonRecord, compact_document, resource_ref
+
+settings = get_settings()
+
+# Detail request counts are persisted under this cache key for the next worker's warm-up
+POPULARITY_KEY = "pokemon-popularity"
+POPULARITY_TTL_SECONDS = 30 * 24 * 3600
+POPULARITY_MAX_KEYS = 10000
+
+# Fields returned by view=summary: the ones the UI renders (see PokemonDetail)
+SUMMARY_FIELDS = tuple(PokemonDetail.model_fields)
+
+# Top-level fields of a PokeAPI pokemon document, the only ones fields= may select
+DETAIL_FIELDS = frozenset({
+    "abilities", "base_experience", "cries", "forms", "game_indices", "height", "held_items", "id",
+    "is_default", "location_area_encounters", "moves", "name", "order", "past_abilities", "past_types",
+    "species", "sprites", "stats", "types", "weight",
+})
+
+# Reference tables served by get_reference, by table name: view=compact replaces these resources by their IDs
+REFERENCE_KINDS = {"moves": "move", "abilities": "ability", "types": "type"}
+
+
+def normalize_pokemon_id(pokemon_id: str) -> str:
+    """
+    Normalize a pokemon ID or name so equivalent lookups share a cache key
+    "Pikachu" and " pikachu" become "pikachu", "025" becomes "25"
+    """
+    key = pokemon_id.strip().lower()
+    if key.isdigit():
+        key = str(int(key))
+    return key
+
+
+def projection_for(view: str = "full", fields: Optional[List[str]] = None) -> Optional[List[str]]:
+    """
+    Resolve the requested projection to a sorted field list
+
+    Args:
+        view: "full" or "summary"
+        fields: Explicit top-level fields, takes precedence over view
+
+    Returns:
+        Field list, or None for the unprojected payload
+
+    Raises:
+        HTTPException: 422 for fields that are not in DETAIL_FIELDS (each
+            projection is cached, so arbitrary names must not create entries)
+    """
+    if fields:
+        requested = {field.strip().lower() for field in fields if field.strip()}
+        unknown = requested - DETAIL_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return sorted(requested | {"id", "name"})
+    if view == "summary":
+        return sorted(SUMMARY_FIELDS)
+    return None
+
+
+def project_pokemon(detail: Dict[str, Any], fields: List[str], trim_sprites: bool = False) -> Dict[str, Any]:
+    """
+    Keep only the given top-level fields of a PokeAPI detail payload
+
+    Args:
+        detail: Full upstream payload
+        fields: Top-level fields to keep
+        trim_sprites: Drop the per-game "versions" sprite tree (summary view)
+    """
+    projected = {field: detail[field] for field in fields if field in detail}
+    if trim_sprites and isinstance(projected.get("sprites"), dict):
+        projected["sprites"] = {k: v for k, v in projected["sprites"].items() if k != "versions"}
+    return projected
 
 
 class PokemonService:
     """
     Handles pokemon-related business logic
     Acts as an intermediary between the API layer and infrastructure layer
+
+    Upstream responses are cached. Details are stored once under their numeric
+    ID, with a small alias entry mapping the name to that ID, so "Pikachu",
+    "pikachu" and "25" all resolve to the same cached payload.
+
+    Payloads hold the upstream bytes and are only parsed when a projection,
+    batch or index needs the data; plain list responses pass the bytes
+    straight through. Details are cached as compact PokemonRecords (shared
+    resource tables, packed rows) and rendered per response; with
+    CACHE_COMPACT_RECORDS off they are kept and passed through as bytes too.
+    The last CACHE_RENDERED_MAX_ENTRIES rendered details are kept, so hot
+    pokemons are neither re-rendered nor re-compressed per response.
+
+    Cache misses go through a single-flight group, so concurrent requests for
+    the same page or pokemon share one upstream call.
+
+    Expired entries are served stale instead of making users wait on PokeAPI:
+    within CACHE_STALE_WHILE_REVALIDATE seconds of expiry they are returned at
+    once and refreshed in the background; older ones (up to
+    CACHE_STALE_IF_ERROR) are returned when the refresh fails with a 5xx or
+    does not answer within CACHE_STALE_IF_ERROR_WAIT seconds.
+
+    Search, type filtering and sorting run against a CatalogIndex of the whole
+    catalog, loaded once from PokeAPI and rebuilt after CATALOG_TTL_SECONDS.
+
+    With PREFETCH_ENABLED, serving a list page schedules background fetches of
+    the next page and of the details on the page. Detail request counts feed
+    the startup warm-up (warm_up), which prefetches the most requested ones.
+
+    view=compact details reference moves, abilities and types by PokeAPI ID;
+    get_reference serves the ID to name tables, cached for
+    REFERENCE_TTL_SECONDS, so clients download that vocabulary once.
+
+    export_pokemons streams the details of the whole catalog with bounded
+    concurrency and memory, for bulk consumers.
     """
-    
-    def __init__(self, pokeapi_client: PokeAPIClient):
+
+    def __init__(self, pokeapi_client: PokeAPIClient, cache: Optional[TieredCache] = None):
         self.pokeapi_client = pokeapi_client
-    
-    async def get_pokemons_list(self, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        self.cache = cache
+        self.inflight = SingleFlight()
+        self.catalog: Optional[CatalogIndex] = None
+        self._catalog_built_at = 0.0
+        self.prefetcher = PrefetchScheduler(
+            settings.PREFETCH_CONCURRENCY, settings.PREFETCH_RATE_PER_SECOND, settings.PREFETCH_MAX_PENDING
+        )
+        # Stale-while-revalidate refreshes: never dropped or paced like speculative prefetches
+        self.revalidator = PrefetchScheduler(settings.CACHE_REVALIDATE_CONCURRENCY, None, None)
+        self.popularity: Counter = Counter()
+        self.stale_served: Counter = Counter()
+        # Rendered payloads of the most recently served records, with their compressed bodies
+        self.rendered: "OrderedDict[int, Tuple[PokemonRecord, Payload]]" = OrderedDict()
+
+    @traced("service")
+    async def get_pokemons_list(self, offset: int = 0, limit: int = 20) -> Payload:
         """
         Get paginated list of pokemons
-        
+
         Args:
             offset: Number of items to skip
             limit: Number of items to return
-            
+
         Returns:
-            Dictionary with paginated pokemon list
+            Payload with paginated pokemon list
         """
-        # Business logic can be added here
-        # For example: caching, data transformation, validation
-        
         # Validate pagination parameters
         if offset < 0:
             offset = 0
@@ -37,27 +171,472 @@ class PokemonService:
             limit = 20
         if limit > 100:
             limit = 100  # Max limit to prevent abuse
-        
-        return await self.pokeapi_client.get_pokemons(offset=offset, limit=limit)
-    
-    async def get_pokemon_detail(self, pokemon_id: str) -> Dict[str, Any]:
+
+        key = f"pokemons:{offset}:{limit}"
+        payload = await self._get_or_fetch(key, partial(self._fetch_list, key, offset, limit))
+        if settings.PREFETCH_ENABLED and self.cache is not None:
+            self._prefetch_adjacent(offset, limit, payload)
+        return payload
+
+    async def _get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Payload]], flight_key: Optional[str] = None
+    ) -> Payload:
+        """
+        Cached payload for key, falling back to a single-flight fetch (see the class docstring for stale entries)
+
+        Args:
+            key: Cache key
+            fetch: Coroutine function fetching the payload and storing it under key
+            flight_key: Single-flight key, if different from the cache key
+
+        Returns:
+            Fresh payload, or a copy of the cached one marked as stale
+
+        Raises:
+            HTTPException: If the fetch fails and no stale copy may be served
+        """
+        flight_key = flight_key or key
+        if self.cache is None:
+            return await self.inflight.do(flight_key, fetch)
+        with span("cache"):
+            cached, stale_for = await self.cache.lookup(key)
+        if cached is not None and stale_for < 0:
+            return cached
+        if cached is not None and stale_for <= settings.CACHE_STALE_WHILE_REVALIDATE:
+            self.revalidator.schedule(flight_key, partial(self.inflight.do, flight_key, fetch))
+            return self._serve_stale(cached, "revalidating")
+        if cached is None or stale_for > settings.CACHE_STALE_IF_ERROR:
+            return await self.inflight.do(flight_key, fetch)
+
+        try:
+            # The shared fetch keeps running (and refreshes the cache) if we stop waiting
+            return await asyncio.wait_for(self.inflight.do(flight_key, fetch), settings.CACHE_STALE_IF_ERROR_WAIT)
+        except asyncio.TimeoutError:
+            return self._serve_stale(cached, "error")
+        except HTTPException as e:
+            if e.status_code < 500:
+                raise
+            return self._serve_stale(cached, "error")
+
+    def _serve_stale(self, payload: Payload, reason: str) -> Payload:
+        self.stale_served[reason] += 1
+        return payload.as_stale(reason)
+
+    async def _fetch_list(self, key: str, offset: int, limit: int) -> Payload:
+        """Fetch (or revalidate an expired copy of) a list page and store it in the cache"""
+        previous = await self.cache.get_stale(key) if self.cache is not None else None
+        payload = await self.pokeapi_client.fetch_pokemons(offset=offset, limit=limit, previous=previous)
+        if self.cache is not None:
+            await self.cache.set(key, payload)
+        return payload
+
+    @traced("service")
+    async def get_pokemon_detail(
+        self,
+        pokemon_id: str,
+        view: str = "full",
+        fields: Optional[List[str]] = None,
+        record: bool = True,
+    ) -> Payload:
         """
         Get detailed information about a specific pokemon
-        
+
         Args:
             pokemon_id: Pokemon ID or name
-            
+            view: "full" for the PokeAPI payload, "summary" for the fields the UI
+                uses, "compact" for the PokeAPI payload with moves, abilities and
+                types as IDs into the get_reference tables
+            fields: Explicit top-level fields to return (overrides view)
+            record: Count the request for the warm-up ranking (off for internal loads)
+
         Returns:
-            Dictionary with detailed pokemon information
+            Payload with detailed pokemon information
         """
-        # Business logic can be added here
-        # For example: caching, data enrichment, favorite tracking
-        
-        return await self.pokeapi_client.get_pokemon_by_id(pokemon_id)
+        key = normalize_pokemon_id(pokemon_id)
+        projection = projection_for(view, fields)
+        if projection is None and view != "compact":
+            payload = await self._get_full_detail(key)
+            if record:
+                self._record_request(key)
+            return payload
+
+        # Projections and compact documents are computed once per pokemon and cached next to the full payload
+        projection_key = view if fields is None else ",".join(projection)
+        if self.cache is not None:
+            detail_id = await self._resolve_detail_id(key)
+            if detail_id is not None:
+                cached = await self.cache.get(f"pokemon:{detail_id}:{projection_key}")
+                if cached is not None:
+                    if record:
+                        self._record_request(key)
+                    return cached
+        detail = await self._get_full_detail(key)
+        if projection is None:
+            data = compact_document(detail.data, tuple(REFERENCE_KINDS.values()))
+        else:
+            data = project_pokemon(detail.data, projection, trim_sprites=fields is None)
+        projected = Payload(
+            data=data,
+            upstream_last_modified=detail.upstream_last_modified,
+            created_at=detail.created_at,
+        )
+        if detail.stale is not None:
+            # Not cached: the projection is recomputed once the detail is fresh again
+            projected.stale = detail.stale
+        elif self.cache is not None:
+            await self.cache.set(f"pokemon:{detail.data['id']}:{projection_key}", projected)
+        if record:
+            self._record_request(key)
+        return projected
+
+    async def _resolve_detail_id(self, key: str) -> Optional[str]:
+        """Map a normalized key to the cached numeric ID (names go through their alias entry)"""
+        # A name never changes ID, so an expired alias is still valid
+        return key if key.isdigit() else await self.cache.get_stale(f"pokemon-name:{key}")
+
+    async def _get_full_detail(self, key: str) -> Payload:
+        """Full upstream payload, from the cache or a single-flight fetch"""
+        detail_id = await self._resolve_detail_id(key) if self.cache is not None else None
+        fetch = partial(self._fetch_detail, key, detail_id)
+        if detail_id is None:
+            return await self.inflight.do(f"pokemon:{key}", fetch)
+        cached = await self._get_or_fetch(f"pokemon:{detail_id}", fetch, flight_key=f"pokemon:{key}")
+        return self._render(cached) if isinstance(cached, PokemonRecord) else cached
+
+    def _render(self, record: PokemonRecord) -> Payload:
+        """Payload of a record, reused while the same record is served"""
+        entry = self.rendered.get(record.id)
+        if entry is not None and entry[0] is record:
+            self.rendered.move_to_end(record.id)
+            return entry[1]
+        payload = record.to_payload()
+        self.rendered[record.id] = (record, payload)
+        self.rendered.move_to_end(record.id)
+        while len(self.rendered) > settings.CACHE_RENDERED_MAX_ENTRIES:
+            self.rendered.popitem(last=False)
+        return payload
+
+    async def _fetch_detail(self, key: str, detail_id: Optional[str] = None) -> Payload:
+        """Fetch (or revalidate an expired copy of) a pokemon and store it under its ID and name"""
+        previous = None
+        if self.cache is not None and detail_id is not None:
+            previous = await self.cache.get_stale(f"pokemon:{detail_id}")
+        # A cached record revalidates like a Payload and comes back as is on 304 Not Modified
+        payload = await self.pokeapi_client.fetch_pokemon(key, previous=previous)
+        if self.cache is None:
+            return payload
+        if settings.CACHE_COMPACT_RECORDS:
+            record = payload if isinstance(payload, PokemonRecord) else PokemonRecord.from_payload(payload)
+            await self.cache.set(f"pokemon:{record.id}", record)
+            if not key.isdigit():
+                await self.cache.set(f"pokemon-name:{record.name}", str(record.id))
+            # Rendered from the record even on a miss, so the ETag does not change once it is cached
+            return self._render(record)
+        if isinstance(payload, PokemonRecord):
+            # Cached before CACHE_COMPACT_RECORDS was turned off (shared tiers)
+            payload = payload.to_payload()
+        if key.isdigit():
+            # Already keyed by ID: store the raw body without parsing it
+            await self.cache.set(f"pokemon:{key}", payload)
+        else:
+            detail = payload.data
+            await self.cache.set(f"pokemon:{detail['id']}", payload)
+            await self.cache.set(f"pokemon-name:{detail['name']}", str(detail["id"]))
+        return payload
+
+    def _prefetch_detail(self, key: str) -> bool:
+        """Schedule a background fetch of a detail unless it is already cached"""
+        detail_key = f"pokemon:{key}"
+        if self.cache.contains(detail_key):
+            return False
+        detail_id = key if key.isdigit() else None
+        return self.prefetcher.schedule(
+            detail_key, partial(self.inflight.do, detail_key, partial(self._fetch_detail, key, detail_id))
+        )
+
+    def _prefetch_adjacent(self, offset: int, limit: int, payload: Payload) -> None:
+        """Schedule the next list page and the details on this page"""
+        page = payload.data
+        if page.get("next"):
+            next_offset = offset + limit
+            next_key = f"pokemons:{next_offset}:{limit}"
+            if not self.cache.contains(next_key):
+                self.prefetcher.schedule(
+                    next_key, partial(self.inflight.do, next_key, partial(self._fetch_list, next_key, next_offset, limit))
+                )
+        for item in page.get("results", []):
+            self._prefetch_detail(str(pokemon_id_from_url(item["url"])))
+
+    def _record_request(self, key: str) -> None:
+        """Count a detail request for the warm-up ranking, keeping the counter bounded"""
+        self.popularity[key] += 1
+        if len(self.popularity) > POPULARITY_MAX_KEYS:
+            self.popularity = Counter(dict(self.popularity.most_common(POPULARITY_MAX_KEYS // 2)))
+
+    async def warm_up(self, top_k: int) -> int:
+        """
+        Prefetch the details of the most requested pokemons
+
+        Uses the request counts saved by the previous worker (save_popularity)
+        merged with this one's; without any, IDs 1..top_k are loaded instead.
+        Fetches go through the prefetch scheduler's concurrency and rate budget.
+
+        Args:
+            top_k: Number of pokemons to load
+
+        Returns:
+            Number of details fetched (already cached ones are skipped)
+        """
+        if self.cache is None or top_k <= 0:
+            return 0
+        saved = await self.cache.get(POPULARITY_KEY)
+        if saved:
+            self.popularity.update(saved)
+        keys = [key for key, _ in self.popularity.most_common(top_k)] or [str(i) for i in range(1, top_k + 1)]
+
+        scheduled = 0
+        for key in keys:
+            if self.prefetcher.pending() >= self.prefetcher.max_pending:
+                await self.prefetcher.join()
+            scheduled += self._prefetch_detail(await self._resolve_detail_id(key) or key)
+        await self.prefetcher.join()
+        return scheduled
+
+    async def save_popularity(self) -> None:
+        """Persist detail request counts so the next worker can warm up with them"""
+        if self.cache is not None and self.popularity:
+            await self.cache.set(
+                POPULARITY_KEY, dict(self.popularity.most_common(POPULARITY_MAX_KEYS)), ttl=POPULARITY_TTL_SECONDS
+            )
+
+    @traced("service")
+    async def get_pokemon_details_batch(
+        self, pokemon_ids: List[str], view: str = "full", record: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Get details for several pokemons with bounded concurrency
+
+        Args:
+            pokemon_ids: Pokemon IDs or names; duplicates are fetched once
+            view: "full", "summary" or "compact", as for get_pokemon_detail
+            record: Count the requests for the warm-up ranking, as for get_pokemon_detail
+
+        Returns:
+            Dictionary with "results" (detail per ID) and "errors"
+            (status_code and detail per ID that failed), both keyed by the
+            normalized ID in request order
+        """
+        keys = list(dict.fromkeys(normalize_pokemon_id(i) for i in pokemon_ids))
+        semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+        async def fetch(key: str) -> Any:
+            async with semaphore:
+                try:
+                    return await self.get_pokemon_detail(key, view=view, record=record)
+                except HTTPException as e:
+                    return e
+
+        outcomes = await asyncio.gather(*(fetch(key) for key in keys))
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        for key, outcome in zip(keys, outcomes):
+            if isinstance(outcome, HTTPException):
+                errors[key] = {"status_code": outcome.status_code, "detail": outcome.detail}
+            else:
+                results[key] = outcome.data
+        return {"results": results, "errors": errors}
+
+    async def export_pokemons(self, view: str = "full") -> AsyncIterator[Payload]:
+        """
+        Stream the details of every pokemon in the catalog, in completion order
+
+        The upstream list is read one page of EXPORT_PAGE_SIZE at a time and
+        details are fetched EXPORT_CONCURRENCY at a time, through the cache.
+        A new fetch only starts once the consumer has taken a finished record,
+        so a slow reader slows the export down instead of being buffered for:
+        memory holds one list page and the fetches in flight, whatever the
+        size of the catalog.
+
+        Args:
+            view: "full" or "summary", as for get_pokemon_detail
+
+        Yields:
+            Payload per pokemon; one that cannot be fetched yields
+            {"id", "error": {"status_code", "detail"}} instead
+
+        Raises:
+            HTTPException: If a list page cannot be fetched
+        """
+        projection = projection_for(view)
+        keys = self._iter_catalog_keys()
+        pending: Set[asyncio.Future] = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max(settings.EXPORT_CONCURRENCY, 1):
+                    try:
+                        key = await keys.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                    else:
+                        pending.add(asyncio.ensure_future(self._export_record(key, projection)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await keys.aclose()
+
+    async def _iter_catalog_keys(self) -> AsyncIterator[str]:
+        """IDs of every pokemon in list order, reading one (cached) list page at a time"""
+        limit = min(max(settings.EXPORT_PAGE_SIZE, 1), 100)
+        offset = 0
+        while True:
+            key = f"pokemons:{offset}:{limit}"
+            page = (await self._get_or_fetch(key, partial(self._fetch_list, key, offset, limit))).data
+            for item in page["results"]:
+                yield str(pokemon_id_from_url(item["url"]))
+            if not page.get("next") or not page["results"]:
+                return
+            offset += limit
+
+    async def _export_record(self, key: str, projection: Optional[List[str]]) -> Payload:
+        """One exported record; not counted for the warm-up ranking, and projections are not cached"""
+        # Runs in its own task: keep per-record spans out of the request's trace, which would grow with the catalog
+        current_trace.set(None)
+        try:
+            detail = await self._get_full_detail(key)
+        except HTTPException as e:
+            return Payload(data={"id": int(key), "error": {"status_code": e.status_code, "detail": e.detail}})
+        if projection is None:
+            return detail
+        return Payload(
+            data=project_pokemon(detail.data, projection, trim_sprites=True),
+            upstream_last_modified=detail.upstream_last_modified,
+            created_at=detail.created_at,
+        )
+
+    @traced("service")
+    async def get_reference(self, table: str) -> Payload:
+        """
+        Get the ID to name table of moves, abilities or types used by view=compact
+
+        Args:
+            table: "moves", "abilities" or "types"
+
+        Returns:
+            Payload with the table name, its size and "names" keyed by PokeAPI ID
+        """
+        resource = REFERENCE_KINDS[table]
+        key = f"reference:{resource}"
+        return await self._get_or_fetch(key, partial(self._fetch_reference, key, table, resource))
+
+    async def _fetch_reference(self, key: str, table: str, resource: str) -> Payload:
+        """Fetch a full resource list from PokeAPI and store it as a reference table"""
+        listing = await self.pokeapi_client.get_resources(resource)
+        names: Dict[str, str] = {}
+        for item in listing["results"]:
+            ref = resource_ref(item)
+            if ref is not None:
+                names[str(ref[1])] = item["name"]
+        payload = Payload(data={"kind": table, "count": len(names), "names": names})
+        if self.cache is not None:
+            await self.cache.set(key, payload, ttl=settings.REFERENCE_TTL_SECONDS)
+        return payload
+
+    async def get_catalog(self) -> CatalogIndex:
+        """
+        Get the catalog index, building it on first use or once it is older than CATALOG_TTL_SECONDS
+        """
+        if self.catalog is None or time.monotonic() - self._catalog_built_at > settings.CATALOG_TTL_SECONDS:
+            catalog = await self.inflight.do("catalog", self._build_catalog)
+            if catalog is not self.catalog:
+                self.catalog = catalog
+                self._catalog_built_at = time.monotonic()
+        return self.catalog
+
+    async def _build_catalog(self) -> CatalogIndex:
+        """Load the full list, type membership and (optionally) stats from PokeAPI"""
+        listing = await self.pokeapi_client.get_pokemons(offset=0, limit=CATALOG_MAX_SIZE)
+        entries = [(pokemon_id_from_url(item["url"]), item["name"], item["url"]) for item in listing["results"]]
+
+        type_list = await self.pokeapi_client.get_types()
+        type_payloads = await asyncio.gather(
+            *(self.pokeapi_client.get_type(item["name"]) for item in type_list["results"])
+        )
+        types = {
+            payload["name"]: {pokemon_id_from_url(member["pokemon"]["url"]) for member in payload["pokemon"]}
+            for payload in type_payloads
+        }
+
+        stats = None
+        if settings.CATALOG_LOAD_STATS:
+            # Not user requests: loading every pokemon must not skew the warm-up ranking
+            details = await self.get_pokemon_details_batch([str(entry[0]) for entry in entries], record=False)
+            stats = {column: {} for column in STAT_COLUMNS}
+            for detail in details["results"].values():
+                stats["height"][detail["id"]] = detail["height"]
+                stats["weight"][detail["id"]] = detail["weight"]
+                for stat in detail["stats"]:
+                    if stat["stat"]["name"] in stats:
+                        stats[stat["stat"]["name"]][detail["id"]] = stat["base_stat"]
+        return CatalogIndex(entries, types, stats)
+
+    @traced("service")
+    async def search_pokemons(
+        self,
+        search: Optional[str] = None,
+        fuzzy: bool = False,
+        type_name: Optional[str] = None,
+        sort: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """
+        Search, filter and sort the full catalog
+
+        Args:
+            search: Name prefix, or exact ID when numeric
+            fuzzy: Match names approximately instead of by prefix
+            type_name: Only include pokemons of this type
+            sort: "id", "name" or a loaded stat column, "-" prefix for descending
+            offset: Number of matches to skip
+            limit: Number of matches to return
+
+        Returns:
+            Dictionary with "count" (total matches) and a page of "results"
+
+        Raises:
+            HTTPException: If the sort column is not available
+        """
+        catalog = await self.get_catalog()
+        try:
+            count, results = catalog.query(
+                search=search,
+                fuzzy=fuzzy,
+                type_name=type_name,
+                sort=sort or "id",
+                offset=max(offset, 0),
+                limit=min(max(limit, 1), 100),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        return {"count": count, "results": results}
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Cache hit/miss/eviction counters and stale responses served, or None when caching is disabled"""
+        if self.cache is None:
+            return None
+        return {**self.cache.stats(), "stale_served": dict(self.stale_served)}
+
+
+# Singleton instance, shared so the response cache lives across requests
+pokemon_service = PokemonService(pokeapi_client, cache=build_cache())
 
 
 # Factory function for dependency injection
 def get_pokemon_service() -> PokemonService:
-    from app.infrastructure.pokeapi_client import pokeapi_client
-    return PokemonService(pokeapi_client)
-
+    return pokemon_service
@@ -0,0 +1,373 @@
+"""
+Pokemon Records
+Compact normalized form of PokeAPI detail documents, kept in the cache instead of the upstream JSON
+
+A detail document is mostly references to other resources ({"name", "url"}
+objects for abilities, types, moves, versions, ...) repeated in every pokemon,
+and lists of same-shaped rows (abilities, stats, moves with their learn
+details). Normalization stores each referenced resource once in a shared
+table keyed by its PokeAPI ID, and packs such rows into one integer array.
+Records render back to the same document, key order included.
+"""
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.serialization import json_dumps
+from app.infrastructure.payload import Payload
+
+# Column kinds besides resource kinds (which are the resource's URL segment, e.g. "move")
+INT = 0
+BOOL = 1
+# Stored for None in integer columns
+NULL = -(2 ** 31)
+INT_MIN, INT_MAX = NULL + 1, 2 ** 31 - 1
+
+# Strings up to this length are interned (names, learn methods, ...); longer ones are mostly unique URLs
+INTERN_MAX_LENGTH = 40
+
+# (key, kind, nested columns or None); kind is INT, BOOL or a resource kind
+Column = Tuple[str, Any, Optional[tuple]]
+
+
+def resource_ref(value: Any) -> Optional[Tuple[str, int]]:
+    """
+    (kind, ID) of a named resource such as {"name": "static", "url": ".../ability/9/"}
+
+    Returns:
+        None unless value is exactly a name/URL pair whose URL ends in a numeric ID
+    """
+    if not isinstance(value, dict) or len(value) != 2:
+        return None
+    name, url = value.get("name"), value.get("url")
+    if not isinstance(name, str) or not isinstance(url, str) or tuple(value) != ("name", "url"):
+        return None
+    parts = url.rstrip("/").rsplit("/", 2)
+    if len(parts) != 3 or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
+
+def compact_document(value: Any, kinds: Tuple[str, ...]) -> Any:
+    """
+    Copy of a JSON value with the named resources of the given kinds replaced by their IDs
+
+    Args:
+        value: JSON value (e.g. a PokeAPI detail document)
+        kinds: Resource kinds to replace (e.g. ("move", "ability", "type"))
+    """
+    if isinstance(value, dict):
+        ref = resource_ref(value)
+        if ref is not None and ref[0] in kinds:
+            return ref[1]
+        return {key: compact_document(item, kinds) for key, item in value.items()}
+    if isinstance(value, list):
+        return [compact_document(item, kinds) for item in value]
+    return value
+
+
+class ResourceTable:
+    """
+    Named resources of one kind, shared by every record
+
+    Each resource is kept once, as the dict that records render, so every
+    document referencing it shares that object and its interned name.
+
+    Args:
+        kind: Resource kind, the URL segment before the ID (e.g. "move")
+    """
+
+    __slots__ = ("kind", "by_id")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.by_id: Dict[int, Dict[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __getitem__(self, resource_id: int) -> Dict[str, str]:
+        return self.by_id[resource_id]
+
+    def intern(self, resource_id: int, resource: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        The shared copy of a resource, added on first sight
+
+        Returns:
+            None if the ID is already known with another name or URL (the
+            caller then keeps its own copy, so rendering stays exact)
+        """
+        shared = self.by_id.get(resource_id)
+        if shared is None:
+            shared = self.by_id[resource_id] = {"name": sys.intern(resource["name"]), "url": resource["url"]}
+            return shared
+        if shared["name"] != resource["name"] or shared["url"] != resource["url"]:
+            return None
+        return shared
+
+
+class ResourceTables:
+    """One ResourceTable per resource kind, created on first use"""
+
+    def __init__(self):
+        self.tables: Dict[str, ResourceTable] = {}
+        # Column layouts and key tuples are shared between records too
+        self._layouts: Dict[tuple, tuple] = {}
+
+    def __getitem__(self, kind: str) -> ResourceTable:
+        table = self.tables.get(kind)
+        if table is None:
+            table = self.tables[kind] = ResourceTable(kind)
+        return table
+
+    def shared_layout(self, layout: tuple) -> tuple:
+        return self._layouts.setdefault(layout, layout)
+
+    def sizes(self) -> Dict[str, int]:
+        """Number of resources per kind"""
+        return {kind: len(table) for kind, table in sorted(self.tables.items())}
+
+
+# Shared by every record of the process
+resources = ResourceTables()
+
+
+@dataclass
+class PackedRows:
+    """
+    A list of same-shaped dicts packed into one integer array
+
+    Packable values are integers (None allowed), booleans, named resources
+    (stored by ID) and nested lists of same-shaped dicts (stored as a count
+    followed by their rows), e.g. a move with its version group details.
+    """
+
+    __slots__ = ("columns", "values", "count")
+
+    columns: Tuple[Column, ...]
+    values: array
+    count: int
+
+    @classmethod
+    def pack(cls, rows: List[Any], tables: ResourceTables) -> Optional["PackedRows"]:
+        """
+        Pack rows, or return None if they are not all the same packable shape
+        """
+        if not rows or not isinstance(rows[0], dict):
+            return None
+        columns = _columns_of(rows[0], tables)
+        if columns is None:
+            return None
+        values = array("i")
+        for row in rows:
+            if not _encode_row(row, columns, values, tables):
+                return None
+        return cls(columns, values, len(rows))
+
+    def unpack(self, tables: ResourceTables) -> List[Dict[str, Any]]:
+        return _decode_rows(self.columns, self.values, 0, self.count, tables)[0]
+
+
+def _columns_of(row: Dict[str, Any], tables: ResourceTables) -> Optional[Tuple[Column, ...]]:
+    """Column layout of a row, or None if some value cannot be packed"""
+    columns = []
+    for key, value in row.items():
+        if isinstance(value, bool):
+            columns.append((key, BOOL, None))
+        elif value is None or isinstance(value, int):
+            columns.append((key, INT, None))
+        elif isinstance(value, list):
+            nested = _columns_of(value[0], tables) if value and isinstance(value[0], dict) else None
+            if nested is None:
+                return None
+            columns.append((key, INT, nested))
+        else:
+            ref = resource_ref(value)
+            if ref is None:
+                return None
+            columns.append((key, ref[0], None))
+    return tables.shared_layout(tuple(columns))
+
+
+def _encode_row(row: Any, columns: Tuple[Column, ...], values: array, tables: ResourceTables) -> bool:
+    """Append a row's values; False if it does not match the columns exactly"""
+    if not isinstance(row, dict) or len(row) != len(columns):
+        return False
+    for (key, kind, nested), (row_key, value) in zip(columns, row.items()):
+        if key != row_key:
+            return False
+        if nested is not None:
+            if not isinstance(value, list):
+                return False
+            values.append(len(value))
+            if not all(_encode_row(item, nested, values, tables) for item in value):
+                return False
+        elif kind == BOOL:
+            if not isinstance(value, bool):
+                return False
+            values.append(value)
+        elif kind == INT:
+            if value is None:
+                values.append(NULL)
+            elif isinstance(value, int) and not isinstance(value, bool) and INT_MIN <= value <= INT_MAX:
+                values.append(value)
+            else:
+                return False
+        else:
+            ref = resource_ref(value)
+            if ref is None or ref[0] != kind or tables[kind].intern(ref[1], value) is None:
+                return False
+            values.append(ref[1])
+    return True
+
+
+def _decode_rows(
+    columns: Tuple[Column, ...], values: array, pos: int, count: int, tables: ResourceTables
+) -> Tuple[List[Dict[str, Any]], int]:
+    rows = []
+    for _ in range(count):
+        row: Dict[str, Any] = {}
+        for key, kind, nested in columns:
+            value = values[pos]
+            pos += 1
+            if nested is not None:
+                row[key], pos = _decode_rows(nested, values, pos, value, tables)
+            elif kind == INT:
+                row[key] = None if value == NULL else value
+            elif kind == BOOL:
+                row[key] = bool(value)
+            else:
+                row[key] = tables[kind][value]
+        rows.append(row)
+    return rows, pos
+
+
+def freeze(value: Any, tables: ResourceTables) -> Any:
+    """
+    Compact form of a JSON value: shared resources, packed rows, tuples and interned strings
+    """
+    if isinstance(value, dict):
+        ref = resource_ref(value)
+        if ref is not None:
+            shared = tables[ref[0]].intern(ref[1], value)
+            if shared is not None:
+                return shared
+        return {sys.intern(key): freeze(item, tables) for key, item in value.items()}
+    if isinstance(value, list):
+        packed = PackedRows.pack(value, tables)
+        if packed is not None:
+            return packed
+        return tuple(freeze(item, tables) for item in value)
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+def thaw(value: Any, tables: ResourceTables) -> Any:
+    """JSON value of a frozen one"""
+    if isinstance(value, PackedRows):
+        return value.unpack(tables)
+    if isinstance(value, tuple):
+        return [thaw(item, tables) for item in value]
+    if isinstance(value, dict):
+        return {key: thaw(item, tables) for key, item in value.items()}
+    return value
+
+
+@dataclass
+class PokemonRecord:
+    """
+    Normalized PokeAPI pokemon detail
+
+    Holds the document's key order (shared between records of the same
+    shape) and one frozen value per key, plus the upstream validators so an
+    expired record can be revalidated like a Payload. Pickles (for the shared
+    cache tiers) as the rendered JSON, since table IDs are only meaningful
+    together with this process's tables.
+    """
+
+    __slots__ = ("id", "name", "keys", "values", "upstream_etag", "upstream_last_modified", "created_at")
+
+    id: int
+    name: str
+    keys: Tuple[str, ...]
+    values: Tuple[Any, ...]
+    upstream_etag: Optional[str]
+    upstream_last_modified: Optional[str]
+    created_at: float
+
+    @classmethod
+    def from_payload(cls, payload: Payload, tables: ResourceTables = resources) -> "PokemonRecord":
+        """Normalize an upstream detail payload"""
+        detail = payload.data
+        keys = tables.shared_layout(tuple(sys.intern(key) for key in detail))
+        return cls(
+            id=detail["id"],
+            name=sys.intern(detail["name"]),
+            keys=keys,
+            values=tuple(freeze(detail[key], tables) for key in keys),
+            upstream_etag=payload.upstream_etag,
+            upstream_last_modified=payload.upstream_last_modified,
+            created_at=payload.created_at,
+        )
+
+    def to_dict(self, fields: Optional[List[str]] = None, tables: ResourceTables = resources) -> Dict[str, Any]:
+        """
+        Render the detail document
+
+        Args:
+            fields: Only render these top-level fields (in document order)
+        """
+        wanted = set(fields) if fields is not None else None
+        return {
+            key: thaw(value, tables)
+            for key, value in zip(self.keys, self.values)
+            if wanted is None or key in wanted
+        }
+
+    def to_payload(self) -> Payload:
+        """
+        Rendered payload holding only the serialized body
+
+        The rendered dict is not kept (it is several times larger than the
+        body); the rare callers that need the data parse it back.
+        """
+        return Payload(
+            body=json_dumps(self.to_dict()),
+            upstream_etag=self.upstream_etag,
+            upstream_last_modified=self.upstream_last_modified,
+            created_at=self.created_at,
+        )
+
+    def as_stale(self, reason: str) -> Payload:
+        """Rendered payload marked as served stale (see Payload.as_stale)"""
+        payload = self.to_payload()
+        payload.stale = reason
+        return payload
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this document with PokeAPI"""
+        headers = {}
+        if self.upstream_etag:
+            headers["If-None-Match"] = self.upstream_etag
+        if self.upstream_last_modified:
+            headers["If-Modified-Since"] = self.upstream_last_modified
+        return headers
+
+    def __reduce__(self):
+        return _record_from_body, (
+            json_dumps(self.to_dict()), self.upstream_etag, self.upstream_last_modified, self.created_at,
+        )
+
+
+def _record_from_body(
+    body: bytes, upstream_etag: Optional[str], upstream_last_modified: Optional[str], created_at: float
+) -> PokemonRecord:
+    return PokemonRecord.from_payload(
+        Payload(
+            body=body,
+            upstream_etag=upstream_etag,
+            upstream_last_modified=upstream_last_modified,
+            created_at=created_at,
+        )
+    )
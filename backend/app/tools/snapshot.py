@@ -0,0 +1,93 @@
+"""
+Snapshot Builder
+Crawls the whole PokeAPI catalog once and writes a binary snapshot that
+SnapshotPokeAPIClient can serve offline
+
+Usage (from backend/):
+    python -m app.tools.snapshot --output data/pokeapi.snap
+    POKEAPI_SNAPSHOT_PATH=data/pokeapi.snap uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from app.infrastructure.pokeapi_client import PokeAPIClient
+from app.infrastructure.snapshot import write_snapshot
+from app.services.catalog import CATALOG_MAX_SIZE, pokemon_id_from_url
+
+
+async def build_snapshot(
+    client: PokeAPIClient,
+    output: str,
+    concurrency: int = 16,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Crawl the catalog, its details and type membership into a snapshot file
+
+    Args:
+        client: Upstream client to crawl with
+        output: Destination snapshot file
+        concurrency: Maximum number of detail requests in flight
+        limit: Only crawl the first N pokemons (useful for quick local snapshots)
+
+    Returns:
+        Number of pokemons written
+    """
+    listing = await client.get_pokemons(offset=0, limit=limit or CATALOG_MAX_SIZE)
+    semaphore = asyncio.Semaphore(concurrency)
+    details: List[Dict[str, Any]] = []
+    failed: List[str] = []
+
+    async def fetch(name: str) -> None:
+        async with semaphore:
+            try:
+                details.append(await client.get_pokemon_by_id(name))
+            except HTTPException as e:
+                failed.append(f"{name}: {e.detail}")
+            done = len(details) + len(failed)
+            if done % 100 == 0:
+                print(f"  fetched {done}/{len(listing['results'])}", file=sys.stderr)
+
+    await asyncio.gather(*(fetch(item["name"]) for item in listing["results"]))
+
+    crawled = {detail["id"] for detail in details}
+    type_list = await client.get_types()
+    types: Dict[str, List[int]] = {}
+    for item in type_list["results"]:
+        payload = await client.get_type(item["name"])
+        types[payload["name"]] = [
+            pokemon_id
+            for pokemon_id in (pokemon_id_from_url(member["pokemon"]["url"]) for member in payload["pokemon"])
+            if pokemon_id in crawled
+        ]
+
+    for failure in failed:
+        print(f"  skipped {failure}", file=sys.stderr)
+    return write_snapshot(output, details, types, client.base_url)
+
+
+async def run(args: argparse.Namespace) -> None:
+    client = PokeAPIClient()
+    if args.base_url:
+        client.base_url = args.base_url
+    await client.start()
+    try:
+        written = await build_snapshot(client, args.output, args.concurrency, args.limit)
+    finally:
+        await client.close()
+    print(f"Wrote {written} pokemons to {args.output}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", required=True, help="snapshot file to write")
+    parser.add_argument("--concurrency", type=int, default=16, help="detail requests in flight")
+    parser.add_argument("--limit", type=int, default=None, help="only crawl the first N pokemons")
+    parser.add_argument("--base-url", default=None, help="override POKEAPI_BASE_URL")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks
+Standalone scripts that measure the backend against a local PokeAPI stub
+"""
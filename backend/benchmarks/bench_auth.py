@@ -0,0 +1,61 @@
+"""
+Auth dependency overhead benchmark
+
+Measures the per-request cost of the `get_current_user` dependency for a
+client that resends one bearer token, with the verified-token cache disabled
+(full JWT decode every time) and enabled.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth --requests 20000
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from app.api.dependencies import get_current_user  # noqa: E402
+from app.core import security  # noqa: E402
+
+
+def time_dependency(credentials: HTTPAuthorizationCredentials, requests: int) -> list:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        get_current_user(credentials)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2] * 1e6
+    p99 = ordered[int(len(ordered) * 0.99)] * 1e6
+    print(f"{label:<12} mean={statistics.mean(latencies) * 1e6:7.2f}us p50={p50:7.2f}us p99={p99:7.2f}us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = security.create_access_token({"sub": "admin"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    max_entries = security.token_cache.max_entries
+    security.token_cache.max_entries = 0
+    security.token_cache.clear()
+    uncached = time_dependency(credentials, args.requests)
+
+    security.token_cache.max_entries = max_entries
+    cached = time_dependency(credentials, args.requests)
+
+    report("no cache", uncached)
+    report("token cache", cached)
+    print(f"speedup      {statistics.mean(uncached) / statistics.mean(cached):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Passthrough CPU/allocation benchmark
+
+Compares, for list and detail calls, the per-request cost of turning an
+upstream PokeAPI response into our HTTP response body:
+
+- decode: parse the upstream JSON and re-serialize it through FastAPI's
+  jsonable_encoder/JSONResponse (the original code path)
+- passthrough: keep the upstream bytes in a Payload and send them as is
+
+Upstream traffic goes through an in-process MockTransport so the numbers are
+CPU time and allocations only, no network.
+
+Usage (from backend/):
+    python -m benchmarks.bench_passthrough --requests 500 --moves 80
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from fastapi import Response  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from app.infrastructure.pokeapi_client import PokeAPIClient  # noqa: E402
+from benchmarks.stub_upstream import FakePokeAPI  # noqa: E402
+
+
+def build_client(api: FakePokeAPI) -> PokeAPIClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        status_code, body, headers = api.handle(request.url.raw_path.decode())
+        return httpx.Response(status_code, content=body, headers=headers)
+
+    client = PokeAPIClient(transport=httpx.MockTransport(handler))
+    client.base_url = api.base_url
+    return client
+
+
+async def measure(render, requests: int) -> tuple:
+    """Mean CPU microseconds and mean peak KiB allocated per request"""
+    await render()  # warm up
+
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        await render()
+    cpu = (time.process_time() - cpu_started) / requests
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(requests, 100)):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await render()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return cpu * 1e6, sum(peaks) / len(peaks) / 1024
+
+
+async def run(args: argparse.Namespace) -> None:
+    api = FakePokeAPI(count=151, moves=args.moves)
+    client = build_client(api)
+    await client.start()
+
+    async def list_decode():
+        data = await client.get_pokemons(offset=0, limit=100)
+        return JSONResponse(content=jsonable_encoder(data)).body
+
+    async def list_passthrough():
+        payload = await client.fetch_pokemons(offset=0, limit=100)
+        return Response(content=payload.body, media_type="application/json").body
+
+    async def detail_decode():
+        data = await client.get_pokemon_by_id("25")
+        return JSONResponse(content=jsonable_encoder(data)).body
+
+    async def detail_passthrough():
+        payload = await client.fetch_pokemon("25")
+        return Response(content=payload.body, media_type="application/json").body
+
+    detail_size = len(api.handle("/api/v2/pokemon/25")[1])
+    print(f"detail payload: {detail_size / 1024:.1f} KiB ({args.moves} moves)")
+    print(f"{'call':<10}{'path':<14}{'cpu us/req':>12}{'peak KiB/req':>14}")
+    for call, decode, passthrough in (
+        ("list", list_decode, list_passthrough),
+        ("detail", detail_decode, detail_passthrough),
+    ):
+        for name, render in (("decode", decode), ("passthrough", passthrough)):
+            cpu, peak = await measure(render, args.requests)
+            print(f"{call:<10}{name:<14}{cpu:>12.1f}{peak:>14.1f}")
+
+    await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--moves", type=int, default=80, help="moves per detail payload")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
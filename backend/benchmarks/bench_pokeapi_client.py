@@ -0,0 +1,89 @@
+"""
+PokeAPIClient connection pooling benchmark
+
+Compares the previous behaviour (a fresh httpx.AsyncClient per upstream call)
+with the shared pooled client, against a local stub upstream. Reports upstream
+connections opened per request and request latency percentiles.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pokeapi_client --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.infrastructure.pokeapi_client import PokeAPIClient  # noqa: E402
+from benchmarks.stub_upstream import StubUpstream  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(call: Callable[[int], Awaitable[None]], requests: int, concurrency: int) -> List[float]:
+    """Run `requests` calls with at most `concurrency` in flight, returning latencies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    stub = StubUpstream(latency=args.latency)
+    await stub.start()
+
+    async def per_call(i: int) -> None:
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.get(f"{stub.url}/pokemon/{i % 151 + 1}")
+            response.raise_for_status()
+            response.json()
+
+    pooled_client = PokeAPIClient()
+    pooled_client.base_url = stub.url
+    await pooled_client.start()
+
+    async def pooled(i: int) -> None:
+        await pooled_client.get_pokemon_by_id(str(i % 151 + 1))
+
+    print(f"{'mode':<10}{'conns':>8}{'conns/req':>12}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    for name, call in (("per-call", per_call), ("pooled", pooled)):
+        stub.reset_counters()
+        started = time.perf_counter()
+        latencies = await drive(call, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:<10}{stub.connections:>8}{stub.connections / args.requests:>12.3f}"
+            f"{statistics.median(latencies) * 1000:>10.2f}{percentile(latencies, 95) * 1000:>10.2f}"
+            f"{args.requests / elapsed:>10.0f}"
+        )
+
+    await pooled_client.close()
+    await stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.002, help="stub upstream latency in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compact record memory benchmark
+
+Measures the memory held per cached pokemon detail as upstream bytes (the
+passthrough Payload), as parsed JSON and as a normalized PokemonRecord, plus
+the resident set growth of caching the whole catalog each way and the cost
+of normalizing and rendering a record. Each storage mode is measured in a
+fresh interpreter, so one mode's RSS growth cannot reuse memory freed by
+another.
+
+Real PokeAPI payloads can be passed as files, e.g.
+    curl -s https://pokeapi.co/api/v2/pokemon/charizard > charizard.json
+(each file is cached under --count distinct IDs); otherwise synthetic
+payloads from the local stub are used.
+
+Usage (from backend/):
+    python -m benchmarks.bench_records --count 1000 --moves 80
+    python -m benchmarks.bench_records charizard.json pikachu.json
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List, Optional
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.serialization import json_dumps  # noqa: E402
+from app.infrastructure.payload import Payload  # noqa: E402
+from app.services.records import PokemonRecord, resources  # noqa: E402
+from benchmarks.stub_upstream import FakePokeAPI  # noqa: E402
+
+
+def load_bodies(paths: List[str], count: int, moves: int) -> List[bytes]:
+    if paths:
+        documents = []
+        for path in paths:
+            with open(path, "rb") as f:
+                documents.append(json.load(f))
+        bodies = []
+        for i in range(count):
+            document = dict(documents[i % len(documents)], id=i + 1)
+            bodies.append(json_dumps(document))
+        return bodies
+    api = FakePokeAPI(count=count, moves=moves)
+    return [json_dumps(api.detail_payload(pokemon_id)) for pokemon_id in range(1, count + 1)]
+
+
+def rss_kib() -> Optional[int]:
+    """Resident set size of this process, from /proc (None off Linux)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        return None
+    return None
+
+
+def measure(bodies: List[bytes], make: Callable[[bytes], object]) -> tuple:
+    """Traced bytes per entry and RSS growth (KiB) for caching every body with `make`"""
+    gc.collect()
+    rss_before = rss_kib()
+    tracemalloc.start()
+    cache = {i: make(body) for i, body in enumerate(bodies)}
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    rss_after = rss_kib()
+    del cache
+    rss = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return traced / len(bodies), rss
+
+
+def parsed(body: bytes) -> Payload:
+    payload = Payload(body=body)
+    payload.data
+    return payload
+
+
+# Copies, so the bytes held by each entry are allocated while tracing
+MODES = {
+    "upstream bytes": lambda body: Payload(body=bytes(bytearray(body))),
+    "parsed JSON": lambda body: parsed(bytes(bytearray(body))),
+    "record": lambda body: PokemonRecord.from_payload(Payload(body=body)),
+}
+
+
+def measure_in_subprocess(mode: str, argv: List[str]) -> dict:
+    """Run measure() for one mode in a new interpreter and return its results"""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_records", *argv, "--mode", mode],
+        check=True, stdout=subprocess.PIPE, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="PokeAPI detail JSON files")
+    parser.add_argument("--count", type=int, default=1000, help="cached pokemons")
+    parser.add_argument("--moves", type=int, default=80, help="moves per synthetic payload")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.files, args.count, args.moves)
+    if args.mode is not None:
+        # Child run: measure one mode and report it to the parent as JSON
+        per_entry, rss = measure(bodies, MODES[args.mode])
+        print(json.dumps({"per_entry": per_entry, "rss": rss, "tables": resources.sizes()}))
+        return
+
+    print(f"{len(bodies)} details, {sum(map(len, bodies)) / len(bodies) / 1024:.1f} KiB of JSON each\n")
+    print(f"{'stored as':<16}{'bytes/entry':>14}{'RSS growth KiB':>16}")
+    argv = [*args.files, "--count", str(args.count), "--moves", str(args.moves)]
+    results = {label: measure_in_subprocess(label, argv) for label in MODES}
+    for label, result in results.items():
+        rss = result["rss"]
+        print(f"{label:<16}{result['per_entry']:>14,.0f}{rss if rss is not None else 'n/a':>16}")
+    print(f"\nshared resource tables: {results['record']['tables']}")
+
+    record = PokemonRecord.from_payload(Payload(body=bodies[0]))
+    normalize = min(timeit.repeat(
+        lambda: PokemonRecord.from_payload(Payload(body=bodies[0])), number=args.rounds, repeat=3
+    ))
+    render = min(timeit.repeat(lambda: json_dumps(record.to_dict()), number=args.rounds, repeat=3))
+    print(f"normalize {normalize / args.rounds * 1e6:.0f} us, render {render / args.rounds * 1e6:.0f} us per detail")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+JSON serialization benchmark
+
+Compares the stdlib json module with orjson for encoding (response
+rendering) and decoding (upstream parsing) of pokemon detail documents.
+
+Real PokeAPI payloads can be passed as files, e.g.
+    curl -s https://pokeapi.co/api/v2/pokemon/charizard > charizard.json
+otherwise synthetic payloads from the local stub are used.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --rounds 500 charizard.json
+"""
+import argparse
+import json
+import os
+import timeit
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core import serialization  # noqa: E402
+from benchmarks.stub_upstream import FakePokeAPI  # noqa: E402
+
+
+def load_documents(paths: list, moves: int) -> list:
+    if paths:
+        documents = []
+        for path in paths:
+            with open(path, "rb") as f:
+                documents.append((os.path.basename(path), json.load(f)))
+        return documents
+    api = FakePokeAPI(moves=moves)
+    return [(f"synthetic #{pokemon_id}", api.detail_payload(pokemon_id)) for pokemon_id in (6, 25, 150)]
+
+
+def per_call_us(fn, rounds: int) -> float:
+    return min(timeit.repeat(fn, number=rounds, repeat=3)) / rounds * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="PokeAPI detail JSON files")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--moves", type=int, default=80, help="moves per synthetic payload")
+    args = parser.parse_args()
+
+    if not serialization.ORJSON_AVAILABLE:
+        raise SystemExit("orjson is not installed (pip install orjson)")
+
+    print(f"{'document':<20}{'KiB':>8}{'op':>8}{'stdlib us':>12}{'orjson us':>12}{'speedup':>10}")
+    for name, document in load_documents(args.files, args.moves):
+        timings = {}
+        for backend in ("stdlib", "orjson"):
+            serialization.settings.JSON_BACKEND = backend
+            body = serialization.json_dumps(document)
+            timings[backend] = (
+                per_call_us(lambda: serialization.FastJSONResponse(document).body, args.rounds),
+                per_call_us(lambda: serialization.json_loads(body), args.rounds),
+            )
+        for index, op in enumerate(("dumps", "loads")):
+            stdlib, fast = timings["stdlib"][index], timings["orjson"][index]
+            print(f"{name:<20}{len(body) / 1024:>8.1f}{op:>8}{stdlib:>12.1f}{fast:>12.1f}{stdlib / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Snapshot point-read benchmark
+
+Crawls the local stub upstream into a temporary snapshot, then compares
+detail reads served from the memory-mapped file with reads through the pooled
+HTTP client.
+
+Usage (from backend/):
+    python -m benchmarks.bench_snapshot --reads 2000 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.infrastructure.pokeapi_client import PokeAPIClient  # noqa: E402
+from app.infrastructure.snapshot import SnapshotPokeAPIClient  # noqa: E402
+from app.tools.snapshot import build_snapshot  # noqa: E402
+from benchmarks.stub_upstream import FakePokeAPI, StubUpstream  # noqa: E402
+
+
+async def time_reads(read, reads: int, catalog_size: int) -> list:
+    latencies = []
+    for i in range(reads):
+        started = time.perf_counter()
+        await read(str(i % catalog_size + 1))
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    stub = StubUpstream(api=FakePokeAPI(count=args.count, moves=args.moves), latency=args.latency)
+    await stub.start()
+    http_client = PokeAPIClient()
+    http_client.base_url = stub.url
+    await http_client.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        started = time.perf_counter()
+        await build_snapshot(http_client, path, concurrency=32)
+        print(f"snapshot: {args.count} pokemons, {os.path.getsize(path) / 1024:.0f} KiB, "
+              f"built in {time.perf_counter() - started:.2f}s")
+
+        snapshot = SnapshotPokeAPIClient(path)
+        await snapshot.start()
+
+        async def index_only(pokemon_id: str) -> None:
+            snapshot._find_slot(int(pokemon_id))
+
+        http_reads = min(args.reads, 200)
+        rows = [
+            ("snapshot index lookup", await time_reads(index_only, args.reads, args.count)),
+            ("snapshot detail read", await time_reads(snapshot.get_pokemon_by_id, args.reads, args.count)),
+            ("pooled HTTP detail", await time_reads(http_client.get_pokemon_by_id, http_reads, args.count)),
+        ]
+        print(f"{'path':<24}{'reads':>8}{'p50 us':>12}{'mean us':>12}")
+        for name, latencies in rows:
+            print(f"{name:<24}{len(latencies):>8}{statistics.median(latencies) * 1e6:>12.1f}"
+                  f"{statistics.mean(latencies) * 1e6:>12.1f}")
+        await snapshot.close()
+
+    await http_client.close()
+    await stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000, help="catalog size")
+    parser.add_argument("--moves", type=int, default=80, help="moves per detail payload")
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Load test against a local PokeAPI stub
+
+Starts the stub upstream (benchmarks.stub_upstream) and app.main:app under
+uvicorn as separate processes, then drives /login, /pokemons and
+/pokemons/{id} with N concurrent virtual users for a fixed time each.
+Reports throughput, latency percentiles, status codes and server memory,
+and writes them as JSON so runs can be diffed between commits.
+
+The inbound rate limits are switched off unless --env RATE_LIMIT_ENABLED=true
+is passed, since every virtual user shares one account.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --users 50 --duration 10 --output before.json
+    python -m benchmarks.loadtest --users 50 --duration 10 --baseline before.json
+    python -m benchmarks.loadtest --latency 0.05 --error-rate 0.02 --env PREFETCH_ENABLED=true
+    python -m benchmarks.loadtest --workers 4 --shared-cache
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("login", "list", "detail")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> Dict[str, Any]:
+    """
+    Throughput and latency figures for one scenario
+
+    Args:
+        latencies: Seconds per completed request
+        statuses: Response count per status code (0 for transport errors)
+        elapsed: Wall-clock seconds the scenario ran
+
+    Returns:
+        JSON-serializable summary; latencies in milliseconds
+    """
+    ordered = sorted(latencies)
+    ok = sum(count for code, count in statuses.items() if 200 <= code < 400)
+    total = sum(statuses.values())
+    summary: Dict[str, Any] = {
+        "requests": total,
+        "errors": total - ok,
+        "error_rate": round((total - ok) / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+    if ordered:
+        summary["latency_ms"] = {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50": round(percentile(ordered, 50) * 1000, 3),
+            "p95": round(percentile(ordered, 95) * 1000, 3),
+            "p99": round(percentile(ordered, 99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3),
+        }
+    return summary
+
+
+def process_memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Resident and peak memory of a process and its children (uvicorn workers), in MiB
+
+    Reads /proc, so returns None on platforms without it.
+    """
+    totals = {"rss_mb": 0.0, "peak_rss_mb": 0.0}
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        totals["rss_mb"] += int(line.split()[1]) / 1024
+                    elif line.startswith("VmHWM:"):
+                        totals["peak_rss_mb"] += int(line.split()[1]) / 1024
+            try:
+                with open(f"/proc/{current}/task/{current}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+            except FileNotFoundError:
+                pass
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    return {key: round(value, 1) for key, value in totals.items()}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_stub(args: argparse.Namespace) -> "tuple[subprocess.Popen, str]":
+    """Start the stub upstream process and return it with its base URL"""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.stub_upstream",
+            "--latency", str(args.latency),
+            "--error-rate", str(args.error_rate),
+            "--count", str(args.count),
+            "--moves", str(args.moves),
+        ],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise SystemExit("stub upstream failed to start")
+    return process, url
+
+
+def start_redis() -> "tuple[subprocess.Popen, str]":
+    """Start the Redis stand-in process and return it with its URL"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_redis"], cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True
+    )
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise SystemExit("Redis stand-in failed to start")
+    return process, url
+
+
+def start_app(
+    args: argparse.Namespace, upstream_url: str, port: int, redis_url: Optional[str] = None
+) -> subprocess.Popen:
+    """Start app.main:app under uvicorn, configured to use the stub (and the shared cache, if given)"""
+    env = {
+        **os.environ,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "loadtest"),
+        "POKEAPI_BASE_URL": upstream_url,
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    if redis_url is not None:
+        env["CACHE_REDIS_URL"] = redis_url
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit("uvicorn did not become ready in time")
+
+
+def request_factory(scenario: str, count: int, token: str) -> Callable[[httpx.AsyncClient], Any]:
+    """Coroutine function issuing one request of the scenario"""
+    headers = {"Authorization": f"Bearer {token}"}
+    if scenario == "login":
+        credentials = {"username": "admin", "password": "admin"}
+        return lambda client: client.post("/login", json=credentials)
+    if scenario == "list":
+        pages = max(count // 20, 1)
+        return lambda client: client.get(
+            "/pokemons", params={"offset": random.randrange(pages) * 20, "limit": 20}, headers=headers
+        )
+    return lambda client: client.get(f"/pokemons/{random.randint(1, count)}", headers=headers)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, request: Callable[[httpx.AsyncClient], Any], users: int, duration: float
+) -> Dict[str, Any]:
+    """Run `users` concurrent virtual users sending requests back to back for `duration` seconds"""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                code = (await request(client)).status_code
+            except httpx.HTTPError:
+                code = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(users)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stub, upstream_url = start_stub(args)
+    redis, redis_url = start_redis() if args.shared_cache else (None, None)
+    port = args.port or free_port()
+    app = start_app(args, upstream_url, port, redis_url)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    results: Dict[str, Any] = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_until_ready(client, app)
+            login = await client.post("/login", json={"username": "admin", "password": "admin"})
+            token = login.json()["access_token"]
+            for scenario in args.scenarios:
+                request = request_factory(scenario, args.count, token)
+                if args.warmup:
+                    await run_scenario(client, request, args.users, args.warmup)
+                summary = await run_scenario(client, request, args.users, args.duration)
+                summary["server_memory"] = process_memory(app.pid)
+                results[scenario] = summary
+                print_summary(scenario, summary)
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+        stub.terminate()
+        stub.wait(timeout=10)
+        if redis is not None:
+            redis.terminate()
+            redis.wait(timeout=10)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "scenarios": results,
+    }
+
+
+def print_summary(scenario: str, summary: Dict[str, Any]) -> None:
+    latency = summary.get("latency_ms", {})
+    memory = summary.get("server_memory") or {}
+    print(
+        f"{scenario:<8}{summary['requests']:>9}{summary['throughput_rps']:>10.1f}"
+        f"{latency.get('p50', 0):>9.2f}{latency.get('p95', 0):>9.2f}{latency.get('p99', 0):>9.2f}"
+        f"{summary['error_rate'] * 100:>8.2f}%{memory.get('rss_mb', 0):>9.1f}"
+    )
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the relative change of throughput and tail latency against an earlier run"""
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'scenario':<10}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for scenario, summary in current["scenarios"].items():
+        before = baseline["scenarios"].get(scenario)
+        if before is None or "latency_ms" not in before or "latency_ms" not in summary:
+            continue
+        changes = [(summary["throughput_rps"], before["throughput_rps"])] + [
+            (summary["latency_ms"][p], before["latency_ms"][p]) for p in ("p50", "p95", "p99")
+        ]
+        cells = "".join(
+            f"{(now - then) / then * 100:>+9.1f}%" if then else f"{'n/a':>10}" for now, then in changes
+        )
+        print(f"{scenario:<10}{cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds per scenario first")
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=0, help="app port (0 picks a free one)")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub answers that are 500s")
+    parser.add_argument("--count", type=int, default=151, help="pokemons in the stub catalog")
+    parser.add_argument("--moves", type=int, default=20, help="moves per detail payload (drives payload size)")
+    parser.add_argument("--shared-cache", action="store_true",
+                        help="share the response cache between workers through the local Redis stand-in")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra app setting, may be repeated")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    print(f"{'scenario':<8}{'requests':>9}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}{'RSS MiB':>9}")
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
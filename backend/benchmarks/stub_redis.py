@@ -0,0 +1,163 @@
+"""
+Local Redis Stand-in
+A dependency-free, in-memory server speaking enough of the Redis protocol for the shared cache tier
+
+Supports PING, AUTH, SELECT, GET, SET (with EX/PX), DEL, EXISTS, DBSIZE,
+FLUSHDB and SCAN (with MATCH/COUNT). Keys expire lazily on access, which the
+cache cannot tell apart from Redis' own expiry.
+
+Run on its own (e.g. for the load test with several workers), printing its URL on stdout:
+    python -m benchmarks.stub_redis --port 6390
+"""
+import argparse
+import asyncio
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.infrastructure.resp import read_reply
+
+
+def encode_reply(value: Any) -> bytes:
+    """Encode a reply: str as a simple string, Exception as an error, bytes/None as bulk, list as array"""
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode()
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+
+
+class StubRedis:
+    """
+    In-memory Redis stand-in served over TCP
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+        password: Required AUTH password, if any
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        credentials = f":{self.password}@" if self.password else ""
+        return f"redis://{credentials}{self.host}:{self.port}/0"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authenticated = self.password is None
+        try:
+            while True:
+                try:
+                    command = await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    return
+                self.commands += 1
+                name = command[0].upper()
+                if not authenticated and name != b"AUTH":
+                    reply: Any = Exception("NOAUTH Authentication required.")
+                else:
+                    try:
+                        reply = self.execute(name, command[1:])
+                    except Exception as e:
+                        reply = e
+                    if name == b"AUTH" and reply == "OK":
+                        authenticated = True
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, name: bytes, args: List[bytes]) -> Any:
+        """Run one command against the in-memory data"""
+        if name == b"PING":
+            return "PONG"
+        if name == b"AUTH":
+            if args[-1].decode() != self.password:
+                raise ValueError("WRONGPASS invalid password")
+            return "OK"
+        if name == b"SELECT":
+            return "OK"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"SET":
+            expires_at = None
+            options = [arg.upper() for arg in args[2::2]]
+            for option, amount in zip(options, args[3::2]):
+                if option == b"PX":
+                    expires_at = time.monotonic() + int(amount) / 1000
+                elif option == b"EX":
+                    expires_at = time.monotonic() + int(amount)
+            self.data[args[0]] = (args[1], expires_at)
+            return "OK"
+        if name == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == b"EXISTS":
+            return sum(self._get(key) is not None for key in args)
+        if name == b"DBSIZE":
+            return len(self.data)
+        if name == b"FLUSHDB":
+            self.data.clear()
+            return "OK"
+        if name == b"SCAN":
+            # The whole keyspace fits in one page
+            pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+            keys = [
+                key for key in list(self.data)
+                if fnmatch.fnmatchcase(key.decode(), pattern) and self._get(key) is not None
+            ]
+            return [b"0", keys]
+        raise ValueError(f"unknown command '{name.decode()}'")
+
+
+async def serve(args: argparse.Namespace) -> None:
+    stub = StubRedis(host=args.host, port=args.port, password=args.password)
+    await stub.start()
+    print(stub.url, flush=True)
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--password", help="require AUTH with this password")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Local PokeAPI Stub
+A deterministic, dependency-free stand-in for PokeAPI used by benchmarks and tests
+
+FakePokeAPI generates PokeAPI-shaped payloads for a synthetic catalog.
+StubUpstream serves it over plain HTTP/1.1 with keep-alive and counts the
+connections it accepts, so benchmarks can report handshakes per request.
+
+Run on its own (e.g. for the load test), printing its base URL on stdout:
+    python -m benchmarks.stub_upstream --port 8081 --latency 0.02 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+KNOWN_NAMES = {
+    1: "bulbasaur", 2: "ivysaur", 3: "venusaur", 4: "charmander",
+    5: "charmeleon", 6: "charizard", 7: "squirtle", 8: "wartortle",
+    9: "blastoise", 10: "caterpie", 25: "pikachu", 26: "raichu",
+    39: "jigglypuff", 52: "meowth", 54: "psyduck", 94: "gengar",
+    133: "eevee", 143: "snorlax", 150: "mewtwo", 151: "mew",
+}
+TYPE_NAMES = [
+    "normal", "fire", "water", "electric", "grass", "ice", "fighting",
+    "poison", "ground", "flying", "psychic", "bug", "rock", "ghost",
+    "dragon", "dark", "steel", "fairy",
+]
+STAT_NAMES = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+ABILITY_NAMES = ["overgrow", "blaze", "torrent", "static", "levitate", "intimidate", "pressure"]
+MOVE_COUNT = 900
+# Validator sent with every document; the fake catalog never changes
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+Response = Tuple[int, bytes, Dict[str, str]]
+
+
+class FakePokeAPI:
+    """
+    Synthetic PokeAPI catalog
+
+    Args:
+        count: Number of pokemons in the catalog
+        moves: Number of move entries per detail payload (drives payload size)
+        base_url: Public base URL used when building resource links
+    """
+
+    def __init__(self, count: int = 151, moves: int = 20, base_url: str = "https://pokeapi.co/api/v2"):
+        self.count = count
+        self.moves = moves
+        self.base_url = base_url.rstrip("/")
+        self.not_modified = 0
+
+    def name_for(self, pokemon_id: int) -> str:
+        return KNOWN_NAMES.get(pokemon_id, f"pokemon-{pokemon_id}")
+
+    def id_for(self, key: str) -> Optional[int]:
+        """Resolve an ID or name to an ID, or None if unknown"""
+        key = key.lower()
+        if key.isdigit():
+            pokemon_id = int(key)
+            return pokemon_id if 1 <= pokemon_id <= self.count else None
+        for pokemon_id, name in KNOWN_NAMES.items():
+            if name == key and pokemon_id <= self.count:
+                return pokemon_id
+        if key.startswith("pokemon-") and key[8:].isdigit():
+            return self.id_for(key[8:])
+        return None
+
+    def types_for(self, pokemon_id: int) -> List[str]:
+        first = TYPE_NAMES[pokemon_id % len(TYPE_NAMES)]
+        second = TYPE_NAMES[(pokemon_id * 7) % len(TYPE_NAMES)]
+        if pokemon_id % 3 == 0 and second != first:
+            return [first, second]
+        return [first]
+
+    def _resource(self, kind: str, name: str, index: int) -> Dict[str, str]:
+        return {"name": name, "url": f"{self.base_url}/{kind}/{index}/"}
+
+    def list_payload(self, offset: int, limit: int) -> Dict:
+        offset = max(offset, 0)
+        end = min(offset + limit, self.count)
+        results = [
+            self._resource("pokemon", self.name_for(i), i)
+            for i in range(offset + 1, end + 1)
+        ]
+        next_url = (
+            f"{self.base_url}/pokemon?offset={end}&limit={limit}" if end < self.count else None
+        )
+        previous_url = (
+            f"{self.base_url}/pokemon?offset={max(offset - limit, 0)}&limit={limit}" if offset > 0 else None
+        )
+        return {"count": self.count, "next": next_url, "previous": previous_url, "results": results}
+
+    def detail_payload(self, pokemon_id: int) -> Dict:
+        name = self.name_for(pokemon_id)
+        sprite = f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{pokemon_id}.png"
+        return {
+            "id": pokemon_id,
+            "name": name,
+            "height": 3 + pokemon_id % 20,
+            "weight": 40 + (pokemon_id * 13) % 900,
+            "base_experience": 50 + pokemon_id % 200,
+            "order": pokemon_id,
+            "is_default": True,
+            "abilities": [
+                {
+                    "ability": self._resource("ability", ABILITY_NAMES[(pokemon_id + k) % len(ABILITY_NAMES)], (pokemon_id + k) % len(ABILITY_NAMES) + 1),
+                    "is_hidden": k == 1,
+                    "slot": k + 1,
+                }
+                for k in range(2)
+            ],
+            "types": [
+                {"slot": slot + 1, "type": self._resource("type", type_name, TYPE_NAMES.index(type_name) + 1)}
+                for slot, type_name in enumerate(self.types_for(pokemon_id))
+            ],
+            "stats": [
+                {
+                    "base_stat": 20 + (pokemon_id * (k + 3)) % 130,
+                    "effort": k % 2,
+                    "stat": self._resource("stat", stat_name, k + 1),
+                }
+                for k, stat_name in enumerate(STAT_NAMES)
+            ],
+            "sprites": {
+                "front_default": sprite,
+                "back_default": sprite.replace("/pokemon/", "/pokemon/back/"),
+                "other": {"official-artwork": {"front_default": sprite.replace("/pokemon/", "/pokemon/other/official-artwork/")}},
+                "versions": {"generation-i": {"red-blue": {"front_default": sprite}}},
+            },
+            "forms": [self._resource("pokemon-form", name, pokemon_id)],
+            "game_indices": [
+                {"game_index": pokemon_id, "version": self._resource("version", f"version-{k}", k)}
+                for k in range(1, 11)
+            ],
+            "moves": [
+                {
+                    "move": self._resource("move", f"move-{(pokemon_id + k) % MOVE_COUNT + 1}", (pokemon_id + k) % MOVE_COUNT + 1),
+                    "version_group_details": [
+                        {
+                            "level_learned_at": k % 50,
+                            "move_learn_method": self._resource("move-learn-method", "level-up", 1),
+                            "version_group": self._resource("version-group", "red-blue", 1),
+                        }
+                    ],
+                }
+                for k in range(self.moves)
+            ],
+        }
+
+    def resource_list_payload(self, kind: str, names: List[str]) -> Dict:
+        """Every resource of a kind in one page, with IDs numbered from 1"""
+        return {
+            "count": len(names),
+            "next": None,
+            "previous": None,
+            "results": [self._resource(kind, name, i + 1) for i, name in enumerate(names)],
+        }
+
+    def type_payload(self, type_name: str) -> Optional[Dict]:
+        if type_name not in TYPE_NAMES:
+            return None
+        return {
+            "id": TYPE_NAMES.index(type_name) + 1,
+            "name": type_name,
+            "pokemon": [
+                {"pokemon": self._resource("pokemon", self.name_for(i), i), "slot": self.types_for(i).index(type_name) + 1}
+                for i in range(1, self.count + 1)
+                if type_name in self.types_for(i)
+            ],
+        }
+
+    def handle(self, path: str) -> Response:
+        """
+        Answer a GET request path (including query string) like PokeAPI would
+
+        Returns:
+            Tuple of (status code, JSON body bytes, extra headers)
+        """
+        parts = urlsplit(path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        segments = [s for s in parts.path.split("/") if s]
+        if "v2" in segments:
+            segments = segments[segments.index("v2") + 1:]
+
+        payload: Optional[Dict] = None
+        if segments == ["pokemon"]:
+            payload = self.list_payload(int(query.get("offset", 0)), int(query.get("limit", 20)))
+        elif len(segments) == 2 and segments[0] == "pokemon":
+            pokemon_id = self.id_for(segments[1])
+            if pokemon_id is not None:
+                payload = self.detail_payload(pokemon_id)
+        elif segments == ["type"]:
+            payload = self.resource_list_payload("type", TYPE_NAMES)
+        elif segments == ["ability"]:
+            payload = self.resource_list_payload("ability", ABILITY_NAMES)
+        elif segments == ["move"]:
+            payload = self.resource_list_payload("move", [f"move-{i}" for i in range(1, MOVE_COUNT + 1)])
+        elif len(segments) == 2 and segments[0] == "type":
+            payload = self.type_payload(segments[1])
+
+        if payload is None:
+            return 404, b"Not Found", {"Content-Type": "text/plain"}
+        return 200, json.dumps(payload).encode(), {"Content-Type": "application/json; charset=utf-8"}
+
+    def respond(self, path: str, headers: Dict[str, str]) -> Response:
+        """
+        Like handle(), but with ETag / Last-Modified validators and 304 answers
+        to matching If-None-Match requests
+
+        Args:
+            path: Request path including query string
+            headers: Request headers with lower-case names
+        """
+        status_code, body, extra = self.handle(path)
+        if status_code != 200:
+            return status_code, body, extra
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        extra = {**extra, "ETag": etag, "Last-Modified": LAST_MODIFIED}
+        if headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return 304, b"", extra
+        return status_code, body, extra
+
+
+class StubUpstream:
+    """
+    Minimal asyncio HTTP/1.1 server in front of FakePokeAPI
+
+    Args:
+        api: Catalog to serve
+        latency: Seconds to wait before answering each request
+        error_rate: Probability (0..1) of answering with a 500
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        seed: Seed for the fault-injection random draws
+        slow_rate: Probability (0..1) of waiting `slow_latency` instead of `latency`
+        slow_latency: Latency of the slow tail, in seconds
+        reset_rate: Probability (0..1) of closing the connection without answering
+    """
+
+    def __init__(
+        self,
+        api: Optional[FakePokeAPI] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        reset_rate: float = 0.0,
+    ):
+        self.api = api or FakePokeAPI()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.reset_rate = reset_rate
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as POKEAPI_BASE_URL"""
+        return f"http://{self.host}:{self.port}/api/v2"
+
+    def reset_counters(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> "StubUpstream":
+        """Run the server on a private event loop in a daemon thread"""
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    async def _respond(self, request_line: str, headers: Dict[str, str]) -> Optional[Response]:
+        """Answer one request, or None to drop the connection"""
+        self.requests += 1
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            await asyncio.sleep(self.slow_latency)
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+        if self.reset_rate and self._random.random() < self.reset_rate:
+            return None
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 500, b"Internal Server Error", {"Content-Type": "text/plain"}
+        try:
+            _, path, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, b"Bad Request", {"Content-Type": "text/plain"}
+        return self.api.respond(path, headers)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                headers = {
+                    k.strip().lower(): v.strip()
+                    for k, _, v in (line.partition(":") for line in lines[1:] if line)
+                }
+                response = await self._respond(lines[0], headers)
+                if response is None:
+                    break
+                status_code, body, extra = response
+                keep_alive = headers.get("connection", "").lower() != "close"
+                response_headers = {
+                    "Content-Length": str(len(body)),
+                    "Connection": "keep-alive" if keep_alive else "close",
+                    "Date": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+                    **extra,
+                }
+                head_out = f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'Error'}\r\n"
+                head_out += "".join(f"{k}: {v}\r\n" for k, v in response_headers.items())
+                writer.write(head_out.encode("latin-1") + b"\r\n" + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    stub = StubUpstream(
+        api=FakePokeAPI(count=args.count, moves=args.moves),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        host=args.host,
+        port=args.port,
+        seed=args.seed,
+    )
+    await stub.start()
+    print(stub.url, flush=True)
+    await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--count", type=int, default=151, help="pokemons in the catalog")
+    parser.add_argument("--moves", type=int, default=20, help="moves per detail payload (drives payload size)")
+    parser.add_argument("--seed", type=int, default=0)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,90 @@
 Pytest Configuration and Fixtures
 Shared test configuration and reusable fixtures
 """
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core.security import token_cache
+from app.api.rate_limit import load_shedder, login_limiter, user_limiter
 from app.services.auth_service import auth_service
+from app.infrastructure.pokeapi_client import pokeapi_client
+from app.services.pokemon_service import pokemon_service
+from benchmarks.stub_upstream import FakePokeAPI
+
+
+@pytest.fixture(autouse=True)
+async def reset_pokemon_service():
+    """
+    Start every test with an empty response cache and no catalog index
+    """
+    if pokemon_service.cache is not None:
+        await pokemon_service.cache.clear()
+    pokemon_service.catalog = None
+    pokemon_service.popularity.clear()
+    pokemon_service.rendered.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_token_cache():
+    """
+    Start every test with no remembered token verifications
+    """
+    token_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """
+    Start every test with full rate limit buckets
+    """
+    user_limiter.reset()
+    login_limiter.reset()
+    load_shedder.reset()
+    yield
 
 
 @pytest.fixture
 def client():
     """
     Create a test client for the FastAPI application
+    Runs the application lifespan so the shared PokeAPI pool is opened and closed
+    """
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def fake_pokeapi():
     """
-    return TestClient(app)
+    Route PokeAPI traffic to an in-memory fake catalog instead of the network
+
+    The fake records every requested upstream path in `fake.calls`, and
+    `fake.fail_with` can be set to an exception to raise for every request.
+    """
+    fake = FakePokeAPI(base_url=pokeapi_client.base_url)
+    fake.calls = []
+    fake.fail_with = None
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fake.calls.append(request.url.path)
+        if fake.fail_with is not None:
+            raise fake.fail_with
+        status_code, body, headers = fake.respond(request.url.raw_path.decode(), dict(request.headers))
+        return httpx.Response(status_code, content=body, headers=headers)
+
+    original_transport = pokeapi_client.transport
+    pokeapi_client.transport = httpx.MockTransport(handler)
+    pokeapi_client._client = None
+    pokeapi_client.breaker.reset()
+    pokeapi_client.retry_budget.reset()
+    pokeapi_client.rate_limiter.reset()
+    pokeapi_client.latency.clear()
+    yield fake
+    pokeapi_client.transport = original_transport
+    pokeapi_client._client = None
 
 
 @pytest.fixture
@@ -34,4 +106,3 @@ def auth_headers(auth_token):
     Get headers with authentication token
     """
     return {"Authorization": f"Bearer {auth_token}"}
-
@@ -2,8 +2,12 @@
 Authentication Tests
 Tests for login and authentication functionality
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import pytest
-from fastapi import status
+from fastapi import HTTPException, status
+from app.core import security
 
 
 class TestAuthentication:
@@ -54,3 +58,59 @@ class TestAuthentication:
         # JWT tokens have 3 parts separated by dots
         assert len(auth_token.split(".")) == 3
 
+
+
+class TestTokenCache:
+    """Test suite for the verified-token cache"""
+
+    def test_repeat_verification_skips_decode(self, monkeypatch):
+        """Test that a verified token is answered from the cache without decoding"""
+        token = security.create_access_token({"sub": "admin"}, timedelta(minutes=5))
+        assert security.verify_token(token) == "admin"
+
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("token decoded again")
+
+        monkeypatch.setattr(security.jwt, "decode", fail_decode)
+        assert security.verify_token(token) == "admin"
+
+    def test_entry_evicted_at_exp(self, monkeypatch):
+        """Test that a cached token stops being served once its exp has passed"""
+        token = security.create_access_token({"sub": "admin"}, timedelta(minutes=5))
+        security.verify_token(token)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 600)
+
+        assert security.token_cache.get(token) is None
+        assert len(security.token_cache._entries) == 0
+
+    def test_invalid_token_not_cached(self):
+        """Test that tokens failing verification are never remembered"""
+        with pytest.raises(HTTPException):
+            security.verify_token("not.a.token")
+        assert security.token_cache.get("not.a.token") is None
+
+    def test_lru_bound(self):
+        """Test that the cache holds at most max_entries tokens"""
+        cache = security.TokenCache(max_entries=2)
+        for name in ("a", "b", "c"):
+            cache.set(name, name, time.time() + 60)
+
+        assert cache.get("a") is None
+        assert cache.get("c") == "c"
+
+    def test_concurrent_access(self):
+        """Test that lookups, expiries and evictions from many threads never raise"""
+        cache = security.TokenCache(max_entries=8)
+
+        def churn(worker: int) -> None:
+            for i in range(2000):
+                token = f"token-{(worker + i) % 16}"
+                # Half the entries are already expired, so lookups evict them
+                cache.set(token, token, time.time() + (60 if i % 2 else -1))
+                cache.get(token)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(churn, range(8)))
+
+        assert len(cache._entries) <= 8
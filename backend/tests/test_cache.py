@@ -0,0 +1,298 @@
+"""
+Cache Tests
+Tests for the tiered response cache and its use in the pokemon service
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.infrastructure.cache import MemoryCache, RedisCache, SQLiteCache, TieredCache
+from app.infrastructure.pokeapi_client import PokeAPIClient
+from app.infrastructure.resp import RespClient, RespError, read_reply
+from app.main import app
+from app.services.pokemon_service import PokemonService, normalize_pokemon_id, pokemon_service
+from benchmarks.stub_redis import StubRedis
+from benchmarks.stub_upstream import FakePokeAPI
+
+
+class TestMemoryCache:
+    """Test suite for the in-process LRU tier"""
+
+    async def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = MemoryCache(max_entries=2, ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+
+        assert await cache.get("a") == 1
+        assert await cache.get("b") is None
+        assert cache.stats.evictions == 1
+
+    async def test_ttl_expiry(self, monkeypatch):
+        """Test that expired entries are misses but remain available for revalidation"""
+        cache = MemoryCache(max_entries=10, ttl=5)
+        await cache.set("a", 1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+        assert await cache.get("a") is None
+        assert cache.stats.misses == 1
+        assert await cache.get_stale("a") == 1
+
+
+class TestTieredCache:
+    """Test suite for the memory + disk cache"""
+
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that a new cache instance reads entries persisted by a previous one"""
+        path = str(tmp_path / "cache.db")
+        first = TieredCache(MemoryCache(10, 60), SQLiteCache(path, 60))
+        await first.set("pokemon:25", {"id": 25, "name": "pikachu"})
+        first.shared.close()
+
+        second = TieredCache(MemoryCache(10, 60), SQLiteCache(path, 60))
+        assert await second.get("pokemon:25") == {"id": 25, "name": "pikachu"}
+        assert second.stats()["disk"]["hits"] == 1
+
+        # Promoted into memory on the first read
+        assert await second.get("pokemon:25") == {"id": 25, "name": "pikachu"}
+        assert second.stats()["memory"]["hits"] == 1
+        second.shared.close()
+
+    async def test_promotion_keeps_remaining_ttl(self, tmp_path):
+        """Test that a shared hit is not fresh in memory for longer than in the shared tier"""
+        cache = TieredCache(MemoryCache(10, 3600), SQLiteCache(str(tmp_path / "cache.db"), 3600))
+        await cache.shared.set("a", 1, ttl=10)
+        await cache.shared.set("b", 2, ttl=10)
+
+        assert await cache.get("a") == 1
+        assert (await cache.lookup("b"))[0] == 2
+        for key in ("a", "b"):
+            assert cache.memory._entries[key][1] - time.monotonic() <= 10
+        cache.shared.close()
+
+    async def test_disk_tier_is_bounded(self, tmp_path):
+        """Test that long-expired rows are pruned and the row count is capped"""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), 60, max_entries=5, retain_stale=30, prune_every=1)
+        await cache.set("long-expired", 0, ttl=-60)
+        await cache.set("recently-expired", 0, ttl=-10)
+        for i in range(10):
+            await cache.set(f"page:{i}", i, ttl=60 + i)
+
+        rows = [key for (key,) in cache._conn.execute("SELECT key FROM cache ORDER BY expires_at")]
+        assert rows == [f"page:{i}" for i in range(5, 10)]
+        assert cache.stats.evictions == 6
+        cache.close()
+
+    async def test_reopens_after_close(self, tmp_path):
+        """Test that a closed disk tier reconnects on its next access instead of failing"""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), 60)
+        await cache.set("pokemon:25", {"id": 25})
+        cache.close()
+
+        assert cache._conn is None
+        assert await cache.get("pokemon:25") == {"id": 25}
+        cache.close()
+
+    async def test_unreadable_row_is_a_miss(self, tmp_path):
+        """Test that a corrupt disk entry is dropped and read as a miss instead of failing"""
+        cache = SQLiteCache(str(tmp_path / "cache.db"), 60)
+        cache._execute(
+            "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?)", ("pokemon:25", b"garbage", time.time() + 60)
+        )
+
+        assert await cache.lookup("pokemon:25") == (None, 0.0)
+        assert cache.stats.errors == 1
+        assert cache._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+        cache.close()
+
+
+@pytest.fixture
+async def redis_server():
+    """Local Redis stand-in, stopped after the test"""
+    server = StubRedis(password="secret")
+    await server.start()
+    yield server
+    await server.stop()
+
+
+class TestRespClient:
+    """Test suite for the Redis protocol client"""
+
+    async def test_commands_and_replies(self, redis_server):
+        """Test simple, bulk, integer, nil and array replies over one authenticated connection"""
+        client = RespClient(redis_server.url)
+
+        assert await client.execute("PING") == "PONG"
+        assert await client.execute("SET", "k", b"\x00\r\nv") == "OK"
+        assert await client.execute("GET", "k") == b"\x00\r\nv"
+        assert await client.execute("GET", "missing") is None
+        assert await client.execute("DEL", "k", "missing") == 1
+        assert await client.execute("SCAN", 0) == [b"0", []]
+        assert len(client._idle) == 1
+        client.close()
+
+    async def test_error_reply_keeps_connection(self, redis_server):
+        """Test that error replies are raised without dropping the pooled connection"""
+        client = RespClient(redis_server.url)
+
+        with pytest.raises(RespError):
+            await client.execute("NOPE")
+        assert await client.execute("PING") == "PONG"
+        assert len(client._idle) == 1
+        client.close()
+
+    async def test_error_inside_array_reads_whole_reply(self):
+        """Test that an error element is raised only after the rest of its array has been read"""
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"*3\r\n:1\r\n-ERR bad element\r\n$1\r\nx\r\n+PONG\r\n")
+
+        with pytest.raises(RespError, match="bad element"):
+            await read_reply(reader)
+        assert await read_reply(reader) == "PONG"
+
+    def test_rejects_other_schemes(self):
+        """Test that only redis:// URLs are accepted"""
+        with pytest.raises(ValueError):
+            RespClient("memcached://localhost")
+
+
+class TestRedisCache:
+    """Test suite for the shared Redis tier"""
+
+    async def test_workers_share_entries(self, redis_server):
+        """Test that an entry written by one worker's cache is a hit for another's"""
+        first = TieredCache(MemoryCache(10, 60), RedisCache(redis_server.url, 60))
+        second = TieredCache(MemoryCache(10, 60), RedisCache(redis_server.url, 60))
+        await first.set("pokemon:25", {"id": 25, "name": "pikachu"})
+
+        assert await second.get("pokemon:25") == {"id": 25, "name": "pikachu"}
+        assert second.stats()["redis"]["hits"] == 1
+        assert second.memory.contains("pokemon:25")
+
+    async def test_expired_entries_kept_for_stale_serving(self, redis_server):
+        """Test that entries outlive their TTL on the server by retain_stale"""
+        cache = RedisCache(redis_server.url, 60, retain_stale=600)
+        await cache.set("pokemon:25", "old", ttl=-30)
+
+        assert await cache.get("pokemon:25") is None
+        value, stale_for = await cache.lookup("pokemon:25")
+        assert value == "old"
+        assert 29 < stale_for < 60
+        assert await cache.get_stale("pokemon:25") == "old"
+
+    async def test_clear_only_own_prefix(self, redis_server):
+        """Test that clear() leaves keys outside the prefix alone"""
+        cache = RedisCache(redis_server.url, 60)
+        await cache.set("a", 1)
+        await cache.client.execute("SET", "other:a", "1")
+        await cache.clear()
+
+        assert set(redis_server.data) == {b"other:a"}
+
+    async def test_unreadable_entry_is_a_miss(self, redis_server):
+        """Test that a corrupt shared entry is deleted and read as a miss instead of failing"""
+        cache = RedisCache(redis_server.url, 60)
+        await cache.client.execute("SET", "pokeapi:pokemon:25", b"garbage")
+
+        assert await cache.get("pokemon:25") is None
+        assert cache.stats.errors == 1
+        assert redis_server.data == {}
+        await cache.set("pokemon:25", {"id": 25})
+        assert await cache.get("pokemon:25") == {"id": 25}
+        cache.close()
+
+    async def test_unavailable_server_degrades_to_misses(self, redis_server):
+        """Test that a stopped server turns reads into misses and writes into no-ops"""
+        await redis_server.stop()
+        cache = TieredCache(MemoryCache(10, 60), RedisCache(redis_server.url, 60, timeout=0.2))
+        await cache.set("pokemon:25", {"id": 25})
+
+        assert await cache.memory.get_stale("pokemon:25") == {"id": 25}
+        assert await cache.shared.get("pokemon:25") is None
+        assert cache.stats()["redis"]["errors"] == 1
+
+    async def test_outage_skipped_until_backoff_expires(self, redis_server):
+        """Test that after a failure the server is not waited on again until the backoff has passed"""
+        cache = RedisCache(redis_server.url, 60, timeout=0.2, backoff=0.3)
+        await cache.set("a", 1)
+        real_execute = cache.client.execute
+
+        async def time_out(*args):
+            await asyncio.sleep(0.2)
+            raise asyncio.TimeoutError
+
+        cache.client.execute = time_out
+        await cache.get("a")
+        started = time.monotonic()
+        for _ in range(10):
+            assert await cache.get("a") is None
+        assert time.monotonic() - started < 0.1
+        assert cache.stats.errors == 1
+
+        cache.client.execute = real_execute
+        await asyncio.sleep(0.3)
+        assert await cache.get("a") == 1
+        cache.close()
+
+    async def test_service_workers_share_upstream_fetches(self, redis_server):
+        """Test that a second service (worker) does not refetch what the first one fetched"""
+        fake = FakePokeAPI()
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.raw_path.decode())
+            status_code, body, headers = fake.handle(request.url.raw_path.decode())
+            return httpx.Response(status_code, content=body, headers=headers)
+
+        upstream = PokeAPIClient(transport=httpx.MockTransport(handler))
+        upstream.base_url = fake.base_url
+        workers = [
+            PokemonService(upstream, cache=TieredCache(MemoryCache(100, 60), RedisCache(redis_server.url, 60)))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            await worker.get_pokemon_detail("25")
+            await worker.get_pokemons_list(offset=0, limit=5)
+
+        assert calls == ["/api/v2/pokemon/25", "/api/v2/pokemon?offset=0&limit=5"]
+
+
+class TestPokemonServiceCache:
+    """Test suite for caching in the pokemon service"""
+
+    def test_shared_tier_closed_on_shutdown(self, tmp_path, monkeypatch):
+        """Test that the app lifespan releases the shared tier's connection on shutdown"""
+        cache = TieredCache(MemoryCache(10, 60), SQLiteCache(str(tmp_path / "cache.db"), 60))
+        monkeypatch.setattr(pokemon_service, "cache", cache)
+        with TestClient(app):
+            assert cache.shared._conn is not None
+
+        assert cache.shared._conn is None
+
+    def test_normalize_pokemon_id(self):
+        """Test that equivalent IDs and names normalize to one key"""
+        assert normalize_pokemon_id(" Pikachu ") == "pikachu"
+        assert normalize_pokemon_id("025") == "25"
+
+    def test_name_and_id_share_cache_entry(self, client, auth_headers, fake_pokeapi):
+        """Test that name, mixed-case name and ID lookups hit one cached detail"""
+        for pokemon_id in ("Pikachu", "pikachu", "25"):
+            response = client.get(f"/pokemons/{pokemon_id}", headers=auth_headers)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["id"] == 25
+
+        assert fake_pokeapi.calls == ["/api/v2/pokemon/pikachu"]
+
+    def test_list_is_cached(self, client, auth_headers, fake_pokeapi):
+        """Test that repeated list pages are served from the cache"""
+        for _ in range(3):
+            response = client.get("/pokemons", params={"limit": 5}, headers=auth_headers)
+            assert response.status_code == status.HTTP_200_OK
+
+        assert len(fake_pokeapi.calls) == 1
+        assert pokemon_service.cache_stats()["memory"]["hits"] >= 2
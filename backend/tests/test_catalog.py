@@ -0,0 +1,128 @@
+"""
+Catalog Index Tests
+Tests for server-side search, filter and sort over the full catalog
+"""
+import pytest
+from fastapi import status
+from app.services import pokemon_service as pokemon_service_module
+from app.services.catalog import CatalogIndex, pokemon_id_from_url
+from app.services.pokemon_service import pokemon_service
+
+
+def make_index() -> CatalogIndex:
+    entries = [
+        (1, "bulbasaur", "https://pokeapi.co/api/v2/pokemon/1/"),
+        (4, "charmander", "https://pokeapi.co/api/v2/pokemon/4/"),
+        (5, "charmeleon", "https://pokeapi.co/api/v2/pokemon/5/"),
+        (6, "charizard", "https://pokeapi.co/api/v2/pokemon/6/"),
+        (25, "pikachu", "https://pokeapi.co/api/v2/pokemon/25/"),
+    ]
+    types = {"fire": {4, 5, 6}, "grass": {1}, "electric": {25}}
+    stats = {"attack": {1: 49, 4: 52, 5: 64, 6: 84, 25: 55}}
+    return CatalogIndex(entries, types, stats)
+
+
+class TestCatalogIndex:
+    """Test suite for the in-memory catalog index"""
+
+    def test_pokemon_id_from_url(self):
+        """Test ID extraction from PokeAPI resource URLs"""
+        assert pokemon_id_from_url("https://pokeapi.co/api/v2/pokemon/25/") == 25
+        assert pokemon_id_from_url("https://pokeapi.co/api/v2/pokemon/10001") == 10001
+
+    def test_prefix_search(self):
+        """Test that prefix search returns every matching name in ID order"""
+        count, results = make_index().query(search="Char")
+
+        assert count == 3
+        assert [r["name"] for r in results] == ["charmander", "charmeleon", "charizard"]
+
+    def test_numeric_search_matches_id(self):
+        """Test that a numeric search is an exact ID lookup"""
+        count, results = make_index().query(search="25")
+
+        assert count == 1
+        assert results[0]["name"] == "pikachu"
+
+    def test_fuzzy_search(self):
+        """Test that fuzzy search tolerates typos"""
+        _, results = make_index().query(search="pikachuu", fuzzy=True)
+
+        assert [r["name"] for r in results] == ["pikachu"]
+
+    def test_type_filter_and_descending_stat_sort(self):
+        """Test combining a type filter with a descending stat sort"""
+        count, results = make_index().query(type_name="FIRE", sort="-attack")
+
+        assert count == 3
+        assert [r["name"] for r in results] == ["charizard", "charmeleon", "charmander"]
+
+    def test_pages_are_consistent(self):
+        """Test that consecutive pages cover the sorted catalog exactly once"""
+        index = make_index()
+        _, full = index.query(sort="-name", limit=10)
+        pages = [index.query(sort="-name", offset=offset, limit=2)[1] for offset in (0, 2, 4)]
+
+        assert [r for page in pages for r in page] == full
+        assert [r["name"] for r in full] == sorted((r["name"] for r in full), reverse=True)
+
+    def test_unknown_sort_is_rejected(self):
+        """Test that sorting by an unavailable column raises ValueError"""
+        with pytest.raises(ValueError):
+            make_index().query(sort="speed")
+
+
+class TestPokemonSearchEndpoint:
+    """Test suite for search, filter and sort on /pokemons"""
+
+    def test_search_by_prefix(self, client, auth_headers, fake_pokeapi):
+        """Test prefix search through the endpoint"""
+        response = client.get("/pokemons", params={"search": "pik"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == 1
+        assert data["results"][0]["name"] == "pikachu"
+        assert data["next"] is None
+
+    def test_type_filter_pagination_links(self, client, auth_headers, fake_pokeapi):
+        """Test that filtered pages link to the next page of the same query"""
+        response = client.get(
+            "/pokemons",
+            params={"type": "fire", "sort": "-name", "limit": 2},
+            headers=auth_headers
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] > 2
+        assert "type=fire" in data["next"] and "offset=2" in data["next"]
+
+        next_page = client.get(data["next"], headers=auth_headers).json()
+        names = [r["name"] for r in data["results"] + next_page["results"]]
+        assert names == sorted(names, reverse=True)
+
+    def test_catalog_is_loaded_once(self, client, auth_headers, fake_pokeapi):
+        """Test that repeated searches reuse the index instead of calling PokeAPI"""
+        client.get("/pokemons", params={"search": "a"}, headers=auth_headers)
+        calls = len(fake_pokeapi.calls)
+        client.get("/pokemons", params={"search": "b"}, headers=auth_headers)
+
+        assert len(fake_pokeapi.calls) == calls
+
+    def test_stats_load_does_not_count_as_requests(self, client, auth_headers, fake_pokeapi, monkeypatch):
+        """Test that loading every detail for stat sorting leaves the warm-up ranking untouched"""
+        monkeypatch.setattr(pokemon_service_module.settings, "CATALOG_LOAD_STATS", True)
+        response = client.get("/pokemons", params={"sort": "-speed", "limit": 3}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert pokemon_service.popularity == {}
+
+        client.get("/pokemons/25", headers=auth_headers)
+        assert pokemon_service.popularity == {"25": 1}
+
+    def test_invalid_sort(self, client, auth_headers, fake_pokeapi):
+        """Test that an unavailable sort column returns 422"""
+        response = client.get("/pokemons", params={"sort": "speed"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
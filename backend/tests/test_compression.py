@@ -0,0 +1,117 @@
+"""
+Compression Tests
+Tests for content-coding negotiation, the compression middleware and precompressed payloads
+"""
+import gzip
+import pickle
+import pytest
+from fastapi import status
+from app.infrastructure import compression
+from app.infrastructure.compression import BROTLI_AVAILABLE, compression_stats, negotiate_encoding
+from app.infrastructure.payload import Payload
+
+
+@pytest.fixture(autouse=True)
+def reset_compression_stats():
+    """
+    Start every test with empty compression counters
+    """
+    compression_stats.reset()
+    yield
+
+
+class TestNegotiation:
+    """Test suite for Accept-Encoding negotiation"""
+
+    def test_prefers_brotli_then_gzip(self):
+        """Test that brotli wins over gzip when both are accepted equally"""
+        expected = "br" if BROTLI_AVAILABLE else "gzip"
+        assert negotiate_encoding("gzip, deflate, br") == expected
+        assert negotiate_encoding("gzip") == "gzip"
+
+    def test_gzip_only_without_brotli(self, monkeypatch):
+        """Test that negotiation falls back to gzip when the brotli package is missing"""
+        monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+
+        assert negotiate_encoding("gzip, deflate, br") == "gzip"
+        assert negotiate_encoding("br") is None
+
+    def test_quality_values(self):
+        """Test that q-values rank codings and q=0 excludes them"""
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.9") == "gzip"
+        assert negotiate_encoding("gzip;q=0") is None
+        assert negotiate_encoding("*;q=0.1, br;q=0") == "gzip"
+
+    def test_identity_only(self):
+        """Test that unknown or missing codings fall back to identity"""
+        assert negotiate_encoding(None) is None
+        assert negotiate_encoding("identity, deflate") is None
+
+
+class TestPayloadEncoding:
+    """Test suite for compressed bodies kept on payloads"""
+
+    def test_compressed_once_and_pickled(self):
+        """Test that the encoded body is reused and survives the disk tier round trip"""
+        payload = Payload(data={"name": "pikachu", "moves": ["thunderbolt"] * 200})
+        encoded = payload.encoded("gzip")
+
+        assert payload.encoded("gzip") is encoded
+        assert gzip.decompress(encoded) == payload.body
+
+        restored = pickle.loads(pickle.dumps(payload))
+        assert restored.is_encoded("gzip")
+        assert restored.encoded("gzip") == encoded
+
+
+class TestCompressedResponses:
+    """Test suite for compressed endpoint responses"""
+
+    def test_detail_sent_precompressed_on_repeat(self, client, auth_headers, fake_pokeapi):
+        """Test that a cached detail is compressed on the first hit and reused afterwards"""
+        headers = {**auth_headers, "Accept-Encoding": "gzip"}
+        first = client.get("/pokemons/25", headers=headers)
+        second = client.get("/pokemons/25", headers=headers)
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in first.headers["vary"]
+        assert second.json() == first.json()
+
+        stats = compression_stats.as_dict()["gzip"]
+        assert stats["responses"] == 2
+        assert stats["precompressed"] == 1
+        assert stats["saved_bytes"] > 0
+
+    def test_encodings_have_distinct_etags(self, client, auth_headers, fake_pokeapi):
+        """Test that identity and gzip representations carry different strong ETags"""
+        plain = client.get("/pokemons/25", headers={**auth_headers, "Accept-Encoding": "identity"})
+        encoded = client.get("/pokemons/25", headers={**auth_headers, "Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] != encoded.headers["etag"]
+
+        revalidated = client.get(
+            "/pokemons/25",
+            headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": encoded.headers["etag"]}
+        )
+        assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_small_responses_not_compressed(self, client):
+        """Test that bodies below the size threshold are sent as is"""
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_middleware_compresses_other_json(self, client, auth_headers, fake_pokeapi):
+        """Test that large JSON responses built outside the payload path are compressed"""
+        response = client.get(
+            "/pokemons/batch",
+            params={"ids": ",".join(str(i) for i in range(1, 11))},
+            headers={**auth_headers, "Accept-Encoding": "gzip"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["results"]) == 10
+        assert compression_stats.as_dict()["gzip"]["precompressed"] == 0
@@ -0,0 +1,88 @@
+"""
+HTTP Caching Tests
+Tests for ETag / Last-Modified validators and conditional GET on /pokemons endpoints
+"""
+import time
+import pytest
+from fastapi import status
+from app.api.http_cache import etag_matches, not_modified_since
+from app.services import pokemon_service as pokemon_service_module
+from app.services.pokemon_service import pokemon_service
+
+
+class TestValidators:
+    """Test suite for validator comparison helpers"""
+
+    def test_etag_matches(self):
+        """Test weak comparison and lists in If-None-Match"""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('W/"abc"', '"abc"')
+        assert etag_matches('"x", "abc"', '"abc"')
+        assert etag_matches("*", '"abc"')
+        assert not etag_matches('"x"', '"abc"')
+
+    def test_not_modified_since(self):
+        """Test If-Modified-Since date comparison"""
+        last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+        assert not_modified_since("Mon, 01 Jan 2024 00:00:00 GMT", last_modified)
+        assert not not_modified_since("Sun, 31 Dec 2023 00:00:00 GMT", last_modified)
+        assert not not_modified_since("not a date", last_modified)
+
+
+class TestConditionalGet:
+    """Test suite for conditional requests against the endpoints"""
+
+    @pytest.mark.parametrize("path", ["/pokemons/25", "/pokemons?limit=5", "/pokemons?search=char"])
+    def test_if_none_match_returns_304(self, client, auth_headers, fake_pokeapi, path):
+        """Test that a matching ETag yields an empty 304"""
+        first = client.get(path, headers=auth_headers)
+        etag = first.headers["etag"]
+
+        assert first.status_code == status.HTTP_200_OK
+        assert first.headers["cache-control"].startswith("private, max-age=")
+        assert "last-modified" in first.headers
+
+        second = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+    def test_changed_etag_returns_body(self, client, auth_headers, fake_pokeapi):
+        """Test that a stale client ETag gets the full body"""
+        response = client.get("/pokemons/25", headers={**auth_headers, "If-None-Match": '"stale"'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == 25
+
+    def test_etag_is_stable(self, client, auth_headers, fake_pokeapi):
+        """Test that the same document always has the same ETag"""
+        first = client.get("/pokemons/pikachu", headers=auth_headers)
+        second = client.get("/pokemons/25", headers=auth_headers)
+
+        assert first.headers["etag"] == second.headers["etag"]
+
+    def test_if_modified_since_returns_304(self, client, auth_headers, fake_pokeapi):
+        """Test Last-Modified based revalidation"""
+        first = client.get("/pokemons/25", headers=auth_headers)
+        response = client.get(
+            "/pokemons/25",
+            headers={**auth_headers, "If-Modified-Since": first.headers["last-modified"]}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_expired_entry_is_revalidated_upstream(self, client, auth_headers, fake_pokeapi, monkeypatch):
+        """Test that an expired cache entry is revalidated with PokeAPI via If-None-Match"""
+        monkeypatch.setattr(pokemon_service_module.settings, "CACHE_STALE_WHILE_REVALIDATE", 0)
+        first = client.get("/pokemons/25", headers=auth_headers)
+        cached = pokemon_service.cache.memory._entries["pokemon:25"][0]
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + pokemon_service.cache.memory.ttl + 1)
+        second = client.get("/pokemons/25", headers=auth_headers)
+
+        assert fake_pokeapi.calls == ["/api/v2/pokemon/25", "/api/v2/pokemon/25"]
+        assert fake_pokeapi.not_modified == 1
+        assert second.content == first.content
+        assert pokemon_service.cache.memory._entries["pokemon:25"][0] is cached
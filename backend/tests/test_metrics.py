@@ -0,0 +1,128 @@
+"""
+Metrics Tests
+Tests for histograms, the text exposition format and the /metrics endpoint
+"""
+import asyncio
+import time
+import httpx
+from app.infrastructure.metrics import Histogram, LoopLagMonitor, MetricsRegistry
+
+
+def scrape(client) -> dict:
+    """Parse /metrics into {series: value}"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = float(value)
+    return samples
+
+
+class TestRegistry:
+    """Test suite for metric families and rendering"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that each bucket counts the observations at or below its bound"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.01, 0.1))
+        for value in (0.003, 0.01, 0.02, 20):
+            histogram.labels("/a").observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_seconds_bucket{route="/a",le="0.01"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+        assert "# TYPE latency_seconds histogram" in lines
+
+    def test_children_are_reused(self):
+        """Test that a label combination maps to the same child every time"""
+        registry = MetricsRegistry()
+        family = registry.counter("events_total", "Events", ("kind",))
+
+        assert family.labels("a") is family.labels("a")
+        assert isinstance(family.labels("b"), type(family.labels("a")))
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes, backslashes and newlines cannot break the format"""
+        registry = MetricsRegistry()
+        registry.counter("events_total", "Events", ("path",)).labels('a"b\\c\nd').inc()
+
+        assert 'events_total{path="a\\"b\\\\c\\nd"} 1' in registry.render().splitlines()
+
+    def test_collectors_are_read_at_scrape_time(self):
+        """Test that collector samples reflect state when rendered"""
+        registry = MetricsRegistry()
+        state = {"queued": 1}
+        registry.register_collector(lambda: [("queued", "gauge", "Queued", [({}, state["queued"])])])
+        state["queued"] = 7
+
+        assert "queued 7" in registry.render().splitlines()
+
+
+class TestLoopLagMonitor:
+    """Test suite for event loop lag measurement"""
+
+    async def test_detects_blocking_work(self):
+        """Test that a blocking call shows up as lag"""
+        monitor = LoopLagMonitor(Histogram(), interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.05)
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+
+        assert monitor.histogram.count >= 2
+        assert monitor.histogram.sum >= 0.03
+
+
+class TestMetricsEndpoint:
+    """Test suite for /metrics"""
+
+    def test_exposition_format(self, client):
+        """Test that /metrics is served as Prometheus text"""
+        response = client.get("/metrics")
+
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+    def test_requests_counted_per_route_template(self, client, auth_headers, fake_pokeapi):
+        """Test that requests are labelled with the route template and status"""
+        series = 'http_request_duration_seconds_count{method="GET",route="/pokemons/{pokemon_id}",status="200"}'
+        before = scrape(client).get(series, 0)
+
+        client.get("/pokemons/25", headers=auth_headers)
+        client.get("/pokemons/150", headers=auth_headers)
+        client.get("/no-such-path")
+        samples = scrape(client)
+
+        assert samples[series] == before + 2
+        assert samples['http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}'] >= 1
+        assert samples["http_requests_in_flight"] == 1
+
+    def test_upstream_calls_by_kind_and_outcome(self, client, auth_headers, fake_pokeapi):
+        """Test that PokeAPI calls are recorded with their outcome"""
+        ok = 'pokeapi_request_duration_seconds_count{kind="detail",outcome="ok"}'
+        failed = 'pokeapi_request_duration_seconds_count{kind="detail",outcome="transport_error"}'
+        before = scrape(client)
+
+        client.get("/pokemons/25", headers=auth_headers)
+        fake_pokeapi.fail_with = httpx.ConnectError("connection refused")
+        client.get("/pokemons/26", headers=auth_headers)
+        samples = scrape(client)
+
+        assert samples[ok] == before.get(ok, 0) + 1
+        assert samples[failed] > before.get(failed, 0)
+
+    def test_cache_hit_ratio(self, client, auth_headers, fake_pokeapi):
+        """Test that cache lookups are reflected in the hit ratio"""
+        client.get("/pokemons/25", headers=auth_headers)
+        client.get("/pokemons/25", headers=auth_headers)
+        samples = scrape(client)
+
+        assert 0 < samples['pokemon_cache_hit_ratio{tier="memory"}'] <= 1
+        assert samples['pokemon_cache_hits_total{tier="memory"}'] >= 1
+        assert samples['pokeapi_circuit_breaker_state{state="closed"}'] == 1
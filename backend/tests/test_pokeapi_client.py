@@ -0,0 +1,57 @@
+"""
+PokeAPI Client Tests
+Tests for the pooled upstream client, run against an in-memory fake PokeAPI
+"""
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+from app.main import app
+from app.infrastructure.pokeapi_client import pokeapi_client
+
+
+class TestPokeAPIClient:
+    """Test suite for the shared PokeAPI client"""
+
+    async def test_calls_share_one_async_client(self, fake_pokeapi):
+        """Test that consecutive calls reuse the same pooled AsyncClient"""
+        await pokeapi_client.get_pokemons(offset=0, limit=5)
+        first = pokeapi_client.client
+        detail = await pokeapi_client.get_pokemon_by_id("Pikachu")
+
+        assert pokeapi_client.client is first
+        assert detail["name"] == "pikachu"
+        assert fake_pokeapi.calls == ["/api/v2/pokemon", "/api/v2/pokemon/pikachu"]
+        await pokeapi_client.close()
+
+    def test_lifespan_opens_and_closes_pool(self, fake_pokeapi):
+        """Test that the application lifespan manages the pool"""
+        with TestClient(app):
+            assert pokeapi_client._client is not None
+            assert not pokeapi_client._client.is_closed
+
+        assert pokeapi_client._client is None
+
+    async def test_not_found_maps_to_404(self, fake_pokeapi):
+        """Test that an unknown pokemon becomes a 404"""
+        with pytest.raises(HTTPException) as exc_info:
+            await pokeapi_client.get_pokemon_by_id("missingno")
+
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+        assert "not found" in exc_info.value.detail
+
+    @pytest.mark.parametrize(
+        "error, expected_status",
+        [
+            (httpx.ReadTimeout("timed out"), status.HTTP_504_GATEWAY_TIMEOUT),
+            (httpx.ConnectError("refused"), status.HTTP_503_SERVICE_UNAVAILABLE),
+        ],
+    )
+    async def test_transport_errors_are_mapped(self, fake_pokeapi, error, expected_status):
+        """Test that timeouts and connection errors map to 504 and 503"""
+        fake_pokeapi.fail_with = error
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pokeapi_client.get_pokemons()
+
+        assert exc_info.value.status_code == expected_status
@@ -5,8 +5,14 @@ Tests for pokemon-related endpoints
 Note: Some tests make real API calls to PokeAPI and may fail if the service is down.
 These are integration tests that verify the complete flow.
 """
+import asyncio
+import json
+from unittest.mock import ANY
+import httpx
 import pytest
 from fastapi import status
+from app.services import pokemon_service as pokemon_service_module
+from app.services.pokemon_service import pokemon_service
 
 
 class TestPokemonEndpoints:
@@ -159,3 +165,267 @@ class TestRootEndpoints:
         assert "timestamp" in data
         assert "version" in data
 
+
+
+class TestPokemonBatchEndpoint:
+    """Test suite for the batch detail endpoint (uses the in-memory fake PokeAPI)"""
+
+    def test_batch_without_auth(self, client):
+        """Test that the batch endpoint requires authentication"""
+        response = client.get("/pokemons/batch", params={"ids": "1,2"})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_batch_returns_partial_results(self, client, auth_headers, fake_pokeapi):
+        """Test that found pokemons and per-ID errors are returned together"""
+        response = client.get(
+            "/pokemons/batch",
+            params={"ids": "1, Pikachu,missingno,1"},
+            headers=auth_headers
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert list(data["results"]) == ["1", "pikachu"]
+        assert data["results"]["pikachu"]["id"] == 25
+        assert data["errors"]["missingno"]["status_code"] == status.HTTP_404_NOT_FOUND
+        assert len(fake_pokeapi.calls) == 3
+
+    def test_batch_rejects_too_many_ids(self, client, auth_headers):
+        """Test that the number of IDs per batch is bounded"""
+        ids = ",".join(str(i) for i in range(1, 100))
+        response = client.get("/pokemons/batch", params={"ids": ids}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_batch_rejects_empty_ids(self, client, auth_headers):
+        """Test that an empty ID list is rejected"""
+        response = client.get("/pokemons/batch", params={"ids": " , "}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestPokemonDetailProjection:
+    """Test suite for view=summary and fields= on the detail endpoint"""
+
+    def test_summary_view(self, client, auth_headers, fake_pokeapi):
+        """Test that the summary view keeps only the UI fields and is much smaller"""
+        full = client.get("/pokemons/25", headers=auth_headers)
+        summary = client.get("/pokemons/25", params={"view": "summary"}, headers=auth_headers)
+
+        assert summary.status_code == status.HTTP_200_OK
+        data = summary.json()
+        assert set(data) == {"id", "name", "height", "weight", "abilities", "types", "sprites", "stats"}
+        assert "versions" not in data["sprites"]
+        assert len(summary.content) * 3 < len(full.content)
+
+    def test_fields_projection(self, client, auth_headers, fake_pokeapi):
+        """Test that explicit fields are returned along with id and name"""
+        response = client.get("/pokemons/pikachu", params={"fields": "types, weight"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.json()) == {"id", "name", "types", "weight"}
+
+    def test_projection_is_cached(self, client, auth_headers, fake_pokeapi):
+        """Test that projected results are cached separately from the full payload"""
+        for _ in range(2):
+            client.get("/pokemons/Pikachu", params={"view": "summary"}, headers=auth_headers)
+
+        assert fake_pokeapi.calls == ["/api/v2/pokemon/pikachu"]
+        assert "pokemon:25:summary" in pokemon_service.cache.memory._entries
+
+    def test_cached_projection_counts_toward_popularity(self, client, auth_headers, fake_pokeapi):
+        """Test that projection cache hits are counted for the warm-up ranking too"""
+        for _ in range(2):
+            client.get("/pokemons/25", params={"view": "summary"}, headers=auth_headers)
+
+        assert pokemon_service.popularity == {"25": 2}
+
+    def test_equivalent_fields_share_cache_entry(self, client, auth_headers, fake_pokeapi):
+        """Test that field order, case and duplicates do not create new projections"""
+        for fields in ("weight,types", "types, weight", "Types,weight,types,id"):
+            client.get("/pokemons/25", params={"fields": fields}, headers=auth_headers)
+
+        projections = [key for key in pokemon_service.cache.memory._entries if key.startswith("pokemon:25:")]
+        assert projections == ["pokemon:25:id,name,types,weight"]
+
+    def test_unknown_fields_rejected(self, client, auth_headers, fake_pokeapi):
+        """Test that unknown field names are rejected before any cache entry is created"""
+        response = client.get("/pokemons/25", params={"fields": "types,bogus"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert "bogus" in response.json()["detail"]
+        assert fake_pokeapi.calls == []
+
+    def test_invalid_view(self, client, auth_headers):
+        """Test that unknown views are rejected"""
+        response = client.get("/pokemons/25", params={"view": "tiny"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestCompactView:
+    """Test suite for view=compact details and the /reference tables they point into"""
+
+    def test_reference_without_auth(self, client):
+        """Test that reference tables require authentication"""
+        response = client.get("/reference/moves")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_reference_table(self, client, auth_headers, fake_pokeapi):
+        """Test that a table maps PokeAPI IDs to names and is sent with a long max-age"""
+        response = client.get("/reference/abilities", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["kind"] == "abilities"
+        assert data["count"] == 7
+        assert data["names"]["4"] == "static"
+        assert response.headers["cache-control"] == "private, max-age=86400"
+
+    def test_reference_is_cached(self, client, auth_headers, fake_pokeapi):
+        """Test that the upstream list is fetched once and revalidations get 304"""
+        first = client.get("/reference/moves", headers=auth_headers)
+        second = client.get("/reference/moves", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+
+        assert first.json()["count"] == 900
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert fake_pokeapi.calls == ["/api/v2/move"]
+
+    def test_unknown_reference_table(self, client, auth_headers):
+        """Test that only moves, abilities and types are served"""
+        response = client.get("/reference/stats", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_compact_view_resolves_through_reference(self, client, auth_headers, fake_pokeapi):
+        """Test that moves, abilities and types become IDs of the reference tables"""
+        full = client.get("/pokemons/25", headers=auth_headers).json()
+        compact = client.get("/pokemons/25", params={"view": "compact"}, headers=auth_headers).json()
+        names = {
+            table: client.get(f"/reference/{table}", headers=auth_headers).json()["names"]
+            for table in ("moves", "abilities", "types")
+        }
+
+        assert [names["moves"][str(move["move"])] for move in compact["moves"]] == [
+            move["move"]["name"] for move in full["moves"]
+        ]
+        assert [names["abilities"][str(a["ability"])] for a in compact["abilities"]] == [
+            a["ability"]["name"] for a in full["abilities"]
+        ]
+        assert [names["types"][str(t["type"])] for t in compact["types"]] == [t["type"]["name"] for t in full["types"]]
+        # Other resources are left as they are
+        assert compact["stats"] == full["stats"]
+        assert compact["moves"][0]["version_group_details"] == full["moves"][0]["version_group_details"]
+
+    def test_compact_view_is_cached(self, client, auth_headers, fake_pokeapi):
+        """Test that the compact document is cached next to the full payload"""
+        for _ in range(2):
+            client.get("/pokemons/pikachu", params={"view": "compact"}, headers=auth_headers)
+
+        assert fake_pokeapi.calls == ["/api/v2/pokemon/pikachu"]
+        assert "pokemon:25:compact" in pokemon_service.cache.memory._entries
+
+    def test_fields_override_compact_view(self, client, auth_headers, fake_pokeapi):
+        """Test that explicit fields return the resources in full"""
+        response = client.get("/pokemons/25", params={"view": "compact", "fields": "types"}, headers=auth_headers)
+
+        assert set(response.json()) == {"id", "name", "types"}
+        assert isinstance(response.json()["types"][0]["type"], dict)
+
+
+class TestPassthrough:
+    """Test suite for serving upstream bytes without a JSON round trip (CACHE_COMPACT_RECORDS off)"""
+
+    @pytest.fixture(autouse=True)
+    def passthrough(self, monkeypatch):
+        """Keep details as upstream bytes instead of compact records"""
+        monkeypatch.setattr(pokemon_service_module.settings, "CACHE_COMPACT_RECORDS", False)
+
+    @pytest.mark.parametrize(
+        "path, upstream_path",
+        [("/pokemons/25", "/api/v2/pokemon/25"), ("/pokemons?limit=5", "/api/v2/pokemon?offset=0&limit=5")],
+    )
+    def test_body_is_upstream_bytes(self, client, auth_headers, fake_pokeapi, path, upstream_path):
+        """Test that list and detail bodies are the exact bytes PokeAPI sent"""
+        response = client.get(path, headers={**auth_headers, "Accept-Encoding": "identity"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == fake_pokeapi.handle(upstream_path)[1]
+
+    def test_detail_by_id_is_not_parsed(self, client, auth_headers, fake_pokeapi):
+        """Test that a cached detail fetched by ID keeps only its raw body"""
+        client.get("/pokemons/25", headers=auth_headers)
+        cached = pokemon_service.cache.memory._entries["pokemon:25"][0]
+
+        assert cached._data is None
+
+
+class TestPokemonExport:
+    """Test suite for the streaming NDJSON export (uses the in-memory fake PokeAPI)"""
+
+    @staticmethod
+    def records(response) -> list:
+        """Parse an NDJSON response body"""
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_export_without_auth(self, client):
+        """Test that the export requires authentication"""
+        response = client.get("/pokemons/export")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_export_streams_whole_catalog(self, client, auth_headers, fake_pokeapi):
+        """Test that every pokemon is exported once, across several list pages"""
+        response = client.get("/pokemons/export", params={"format": "ndjson"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = self.records(response)
+        assert sorted(record["id"] for record in records) == list(range(1, 152))
+        assert "moves" in records[0]
+        assert fake_pokeapi.calls.count("/api/v2/pokemon") == 2
+
+    def test_export_summary_view(self, client, auth_headers, fake_pokeapi):
+        """Test that view=summary exports only the summary fields"""
+        response = client.get("/pokemons/export", params={"view": "summary"}, headers=auth_headers)
+
+        record = self.records(response)[0]
+        assert set(record) == {"id", "name", "height", "weight", "abilities", "types", "sprites", "stats"}
+
+    def test_export_reports_missing_details(self, client, auth_headers, fake_pokeapi):
+        """Test that a pokemon whose detail fails is exported as an error record"""
+        client.get("/pokemons", params={"offset": 100, "limit": 100}, headers=auth_headers)
+        fake_pokeapi.count = 140
+
+        records = self.records(client.get("/pokemons/export", headers=auth_headers))
+
+        errors = {record["id"]: record["error"] for record in records if "error" in record}
+        assert len(records) == 151
+        assert sorted(errors) == list(range(141, 152))
+        assert errors[141]["status_code"] == status.HTTP_404_NOT_FOUND
+
+    def test_export_list_failure_ends_with_error_line(self, client, auth_headers, fake_pokeapi):
+        """Test that an upstream failure after the headers were sent is reported in the stream"""
+        fake_pokeapi.fail_with = httpx.ConnectError("down")
+
+        response = client.get("/pokemons/export", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert self.records(response) == [
+            {"error": {"status_code": status.HTTP_503_SERVICE_UNAVAILABLE, "detail": ANY}}
+        ]
+
+    async def test_export_applies_backpressure(self, fake_pokeapi, monkeypatch):
+        """Test that details are only fetched as fast as records are consumed"""
+        monkeypatch.setattr(pokemon_service_module.settings, "EXPORT_CONCURRENCY", 4)
+        export = pokemon_service.export_pokemons()
+
+        taken = [await export.__anext__() for _ in range(5)]
+        await asyncio.sleep(0.05)
+        await export.aclose()
+
+        details = [path for path in fake_pokeapi.calls if path.startswith("/api/v2/pokemon/")]
+        assert len(taken) == 5
+        assert len(details) <= 5 + 4
@@ -0,0 +1,153 @@
+"""
+Prefetch Tests
+Tests for the background prefetch scheduler, adjacent-page prefetching and the startup warm-up
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.infrastructure.cache import MemoryCache, TieredCache
+from app.infrastructure.pokeapi_client import PokeAPIClient
+from app.infrastructure.prefetch import PrefetchScheduler
+from app.services import pokemon_service as pokemon_service_module
+from app.services.pokemon_service import POPULARITY_KEY, PokemonService
+from benchmarks.stub_upstream import FakePokeAPI
+
+
+@pytest.fixture
+def upstream():
+    """
+    PokeAPI client answering from the fake catalog, recording requested paths
+    """
+    fake = FakePokeAPI()
+    fake.calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fake.calls.append(request.url.raw_path.decode())
+        status_code, body, headers = fake.handle(request.url.raw_path.decode())
+        return httpx.Response(status_code, content=body, headers=headers)
+
+    client = PokeAPIClient(transport=httpx.MockTransport(handler))
+    client.base_url = fake.base_url
+    client.calls = fake.calls
+    return client
+
+
+class TestPrefetchScheduler:
+    """Test suite for the scheduler's budgets"""
+
+    async def test_deduplicates_and_counts(self):
+        """Test that a pending key is not queued twice and outcomes are counted"""
+        scheduler = PrefetchScheduler(max_concurrency=2, rate_per_second=1000, max_pending=10)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        async def fail():
+            raise HTTPException(status_code=404, detail="Pokemon not found")
+
+        assert scheduler.schedule("a", work)
+        assert not scheduler.schedule("a", work)
+        scheduler.schedule("b", fail)
+        await scheduler.join()
+
+        assert len(calls) == 1
+        assert scheduler.stats() == {"pending": 0, "scheduled": 2, "completed": 1, "failed": 1, "dropped": 0}
+
+    async def test_concurrency_and_pending_limits(self):
+        """Test that running jobs never exceed max_concurrency and overflow is dropped"""
+        scheduler = PrefetchScheduler(max_concurrency=2, rate_per_second=1000, max_pending=5)
+        running = []
+        peak = []
+
+        async def work():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        queued = [scheduler.schedule(str(i), work) for i in range(8)]
+        await scheduler.join()
+
+        assert queued.count(True) == 5
+        assert scheduler.dropped == 3
+        assert max(peak) == 2
+
+    async def test_rate_budget(self):
+        """Test that job starts are paced to rate_per_second"""
+        scheduler = PrefetchScheduler(max_concurrency=10, rate_per_second=100, max_pending=10)
+        starts = []
+
+        async def work():
+            starts.append(time.monotonic())
+
+        for i in range(5):
+            scheduler.schedule(str(i), work)
+        await scheduler.join()
+
+        assert starts[-1] - starts[0] >= 0.035
+
+
+class TestAdjacentPrefetch:
+    """Test suite for prefetching after a list page is served"""
+
+    async def test_next_page_and_details_prefetched(self, upstream, monkeypatch):
+        """Test that serving a page fills the cache with the next page and its details"""
+        monkeypatch.setattr(pokemon_service_module.settings, "PREFETCH_ENABLED", True)
+        service = PokemonService(upstream, cache=TieredCache(MemoryCache(100, 60)))
+        service.prefetcher.rate_per_second = 1000
+
+        await service.get_pokemons_list(offset=0, limit=3)
+        await service.prefetcher.join()
+
+        assert service.cache.contains("pokemons:3:3")
+        assert all(service.cache.contains(f"pokemon:{i}") for i in (1, 2, 3))
+
+        calls = len(upstream.calls)
+        detail = await service.get_pokemon_detail("2")
+        assert detail.data["name"] == "ivysaur"
+        assert len(upstream.calls) == calls
+
+    async def test_disabled_by_default(self, upstream):
+        """Test that nothing is prefetched unless PREFETCH_ENABLED is set"""
+        service = PokemonService(upstream, cache=TieredCache(MemoryCache(100, 60)))
+
+        await service.get_pokemons_list(offset=0, limit=3)
+
+        assert service.prefetcher.scheduled == 0
+        assert len(upstream.calls) == 1
+
+
+class TestWarmUp:
+    """Test suite for the startup warm-up"""
+
+    async def test_uses_saved_popularity(self, upstream):
+        """Test that a new worker preloads the pokemons the previous one served most"""
+        cache = TieredCache(MemoryCache(100, 60))
+        previous = PokemonService(upstream, cache=cache)
+        for pokemon_id in ("25", "25", "25", "150", "150", "4"):
+            await previous.get_pokemon_detail(pokemon_id)
+        await previous.save_popularity()
+        saved = await cache.get(POPULARITY_KEY)
+        await cache.clear()
+        await cache.set(POPULARITY_KEY, saved)
+
+        fresh = PokemonService(upstream, cache=cache)
+        fresh.prefetcher.rate_per_second = 1000
+        loaded = await fresh.warm_up(top_k=2)
+
+        assert loaded == 2
+        assert cache.contains("pokemon:25")
+        assert cache.contains("pokemon:150")
+        assert not cache.contains("pokemon:4")
+
+    async def test_defaults_to_first_ids(self, upstream):
+        """Test that without saved counts IDs 1..top_k are preloaded"""
+        service = PokemonService(upstream, cache=TieredCache(MemoryCache(100, 60)))
+        service.prefetcher.rate_per_second = 1000
+
+        assert await service.warm_up(top_k=3) == 3
+        assert sorted(upstream.calls) == ["/api/v2/pokemon/1", "/api/v2/pokemon/2", "/api/v2/pokemon/3"]
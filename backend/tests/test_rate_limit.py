@@ -0,0 +1,288 @@
+"""
+Rate Limit Tests
+Tests for the outbound token bucket, inbound per-subject limits and load shedding
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.api.rate_limit import load_shedder, login_limiter, user_limiter
+from app.core.config import Settings
+from app.core.security import create_access_token
+from app.infrastructure import pokeapi_client as pokeapi_client_module
+from app.infrastructure.pokeapi_client import PokeAPIClient
+from app.infrastructure.rate_limit import FCNTL_AVAILABLE, KeyedRateLimiter, LoadShedder, TokenBucket
+from benchmarks.stub_upstream import FakePokeAPI
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestTokenBucket:
+    """Test suite for the in-process bucket"""
+
+    async def test_burst_then_paced(self):
+        """Test that `burst` requests go out at once and the rest at `rate`"""
+        bucket = TokenBucket(rate=100, burst=5)
+
+        started = time.monotonic()
+        for _ in range(10):
+            assert await bucket.acquire()
+
+        assert time.monotonic() - started >= 0.045
+        assert bucket.acquired == 10
+        assert bucket.delayed == 5
+
+    async def test_waiters_served_in_arrival_order(self):
+        """Test that queued callers get their tokens first come, first served"""
+        bucket = TokenBucket(rate=200, burst=1)
+        served = []
+
+        async def caller(index: int):
+            await bucket.acquire()
+            served.append(index)
+
+        await asyncio.gather(*(caller(i) for i in range(8)))
+
+        assert served == list(range(8))
+        assert bucket.waiting == 0
+
+    async def test_rejects_beyond_max_wait_without_taking_a_token(self):
+        """Test that a caller is turned away only when its slot is past max_wait"""
+        bucket = TokenBucket(rate=10, burst=1)
+        assert await bucket.acquire()
+
+        assert not await bucket.acquire(max_wait=0.01)
+        assert bucket.rejected == 1
+        assert bucket.acquired == 1
+
+        started = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - started < 0.15
+
+    async def test_snapshot_reports_queue_and_waits(self):
+        """Test that the snapshot exposes queue depth and wait times"""
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+
+        assert bucket.snapshot()["queue_depth"] == 1
+        await waiter
+        snapshot = bucket.snapshot()
+        assert snapshot["queue_depth"] == 0
+        assert snapshot["delayed"] == 1
+        assert 0 < snapshot["wait_seconds_max"] <= 0.02
+
+
+@pytest.mark.skipif(not FCNTL_AVAILABLE, reason="needs fcntl")
+class TestSharedBucket:
+    """Test suite for the budget shared through a lock file"""
+
+    async def test_buckets_on_one_file_share_the_budget(self, tmp_path):
+        """Test that two limiters using the same lock file draw from one bucket"""
+        path = str(tmp_path / "limit")
+        first = TokenBucket(rate=1, burst=1, lock_path=path)
+        second = TokenBucket(rate=1, burst=1, lock_path=path)
+
+        assert await first.acquire()
+        assert not await second.acquire(max_wait=0)
+
+    async def test_budget_shared_with_another_process(self, tmp_path):
+        """Test that a token taken by another worker process is not handed out again"""
+        path = str(tmp_path / "limit")
+        script = (
+            "import asyncio\n"
+            "from app.infrastructure.rate_limit import TokenBucket\n"
+            f"asyncio.run(TokenBucket(rate=1, burst=2, lock_path={path!r}).acquire())\n"
+        )
+        subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, check=True)
+
+        bucket = TokenBucket(rate=1, burst=2, lock_path=path)
+        assert await bucket.acquire(max_wait=0)
+        assert not await bucket.acquire(max_wait=0)
+
+
+class TestClientRateLimit:
+    """Test suite for the limiter in PokeAPIClient"""
+
+    @pytest.fixture
+    def limited_client(self, monkeypatch):
+        """
+        PokeAPIClient with a 50/s limit and no burst, answering from the fake catalog
+        """
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_RATE_LIMIT_PER_SECOND", 50.0)
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_RATE_LIMIT_BURST", 1)
+        api = FakePokeAPI()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status_code, body, headers = api.handle(request.url.raw_path.decode())
+            return httpx.Response(status_code, content=body, headers=headers)
+
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.base_url = api.base_url
+        return client
+
+    async def test_requests_are_paced(self, limited_client):
+        """Test that concurrent fetches are queued to the configured rate"""
+        started = time.monotonic()
+        await asyncio.gather(*(limited_client.fetch_pokemon(str(i)) for i in range(1, 6)))
+
+        assert time.monotonic() - started >= 0.075
+        rate_limit = limited_client.health()["rate_limit"]
+        assert rate_limit["acquired"] == 5
+        assert rate_limit["delayed"] == 4
+        await limited_client.close()
+
+    async def test_gives_up_at_the_deadline(self, limited_client, monkeypatch):
+        """Test that a request is failed with 504 if its token comes after the deadline"""
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_DEADLINE", 0.05)
+        limited_client.rate_limiter.rate = 1
+
+        await limited_client.fetch_pokemon("1")
+        with pytest.raises(HTTPException) as exc_info:
+            await limited_client.fetch_pokemon("2")
+
+        assert exc_info.value.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert limited_client.rate_limiter.rejected == 1
+        await limited_client.close()
+
+
+class TestKeyedRateLimiter:
+    """Test suite for the per-subject GCRA limiter"""
+
+    def test_burst_then_limited_with_retry_after(self):
+        """Test that a key gets `burst` requests, then a wait of about one interval"""
+        limiter = KeyedRateLimiter(rate=2, burst=3, max_keys=10)
+
+        assert [limiter.hit("alice") for _ in range(3)] == [0, 0, 0]
+        retry_after = limiter.hit("alice")
+
+        assert retry_after == pytest.approx(0.5, abs=0.01)
+        assert limiter.hit("bob") == 0
+        assert (limiter.allowed, limiter.limited) == (4, 1)
+
+    def test_tracked_keys_are_bounded(self):
+        """Test that state is kept for at most max_keys subjects"""
+        limiter = KeyedRateLimiter(rate=1, burst=1, max_keys=3)
+        for i in range(10):
+            limiter.hit(str(i))
+
+        assert limiter.snapshot()["subjects"] == 3
+
+    @pytest.mark.parametrize("name", [
+        "RATE_LIMIT_PER_SECOND", "RATE_LIMIT_LOGIN_PER_MINUTE", "POKEAPI_RATE_LIMIT_PER_SECOND",
+        "PREFETCH_RATE_PER_SECOND", "RATE_LIMIT_BURST",
+    ])
+    def test_zero_rates_rejected_by_settings(self, name):
+        """Test that a zero rate or burst fails at startup instead of dividing by zero on a request"""
+        with pytest.raises(ValidationError):
+            Settings(SECRET_KEY="x", **{name: 0})
+
+
+class TestLoadShedder:
+    """Test suite for the concurrency cap"""
+
+    async def test_queues_in_order_beyond_the_cap(self):
+        """Test that requests over the cap wait and get slots first come, first served"""
+        shedder = LoadShedder(max_concurrent=1, queue_size=10, queue_timeout=1)
+        started = []
+
+        async def request(index: int):
+            assert await shedder.acquire()
+            started.append(index)
+            await asyncio.sleep(0.01)
+            shedder.release()
+
+        await asyncio.gather(*(request(i) for i in range(4)))
+
+        assert started == [0, 1, 2, 3]
+        assert shedder.snapshot()["active"] == 0
+
+    async def test_sheds_when_queue_full_or_wait_too_long(self):
+        """Test that a full queue and an expired wait both shed the request"""
+        shedder = LoadShedder(max_concurrent=1, queue_size=1, queue_timeout=0.05)
+        assert await shedder.acquire()
+
+        queued = asyncio.ensure_future(shedder.acquire())
+        await asyncio.sleep(0)
+        assert not await shedder.acquire()
+        assert not await queued
+
+        assert (shedder.shed, shedder.timed_out) == (1, 1)
+        shedder.release()
+        assert await shedder.acquire()
+
+    async def test_slot_handed_over_as_wait_times_out(self, monkeypatch):
+        """Test that a slot released to a waiter at its timeout is used, not leaked"""
+        shedder = LoadShedder(max_concurrent=1, queue_size=1, queue_timeout=1)
+        assert await shedder.acquire()
+
+        async def release_then_time_out(future, timeout):
+            # The holder hands its slot over in the same iteration the timeout fires
+            shedder.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", release_then_time_out)
+        acquired = await shedder.acquire()
+        monkeypatch.undo()
+
+        assert acquired
+        assert shedder.timed_out == 0
+        shedder.release()
+        assert (shedder.active, len(shedder._waiters)) == (0, 0)
+
+
+class TestRateLimitMiddleware:
+    """Test suite for limits applied to API requests"""
+
+    def test_login_limited_per_ip(self, client):
+        """Test that repeated logins from one address get 429 with Retry-After"""
+        credentials = {"username": "admin", "password": "wrong"}
+        codes = [client.post("/login", json=credentials).status_code for _ in range(login_limiter.burst)]
+        response = client.post("/login", json=credentials)
+
+        assert set(codes) == {401}
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_pokemons_limited_per_user(self, client, fake_pokeapi, monkeypatch):
+        """Test that each user has their own budget and /health is never limited"""
+        monkeypatch.setattr(user_limiter, "burst", 2)
+        monkeypatch.setattr(user_limiter, "rate", 0.1)
+        ash = {"Authorization": f"Bearer {create_access_token({'sub': 'ash'})}"}
+        misty = {"Authorization": f"Bearer {create_access_token({'sub': 'misty'})}"}
+
+        codes = [client.get("/pokemons/25", headers=ash).status_code for _ in range(3)]
+
+        assert codes == [200, 200, 429]
+        assert client.get("/pokemons/25", headers=misty).status_code == 200
+        assert all(client.get("/health").status_code == 200 for _ in range(5))
+        assert client.get("/health").json()["rate_limit"]["users"]["limited"] == 1
+
+    def test_requests_without_valid_token_limited_per_ip(self, client, monkeypatch):
+        """Test that invalid tokens cannot be rotated to dodge the limit"""
+        monkeypatch.setattr(user_limiter, "burst", 1)
+        monkeypatch.setattr(user_limiter, "rate", 0.1)
+
+        first = client.get("/pokemons", headers={"Authorization": "Bearer one"})
+        second = client.get("/pokemons", headers={"Authorization": "Bearer two"})
+
+        assert first.status_code == status.HTTP_401_UNAUTHORIZED
+        assert second.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_overload_is_shed_with_503(self, client, auth_headers, fake_pokeapi, monkeypatch):
+        """Test that requests get 503 with Retry-After when no slot or queue space is left"""
+        monkeypatch.setattr(load_shedder, "max_concurrent", 0)
+        monkeypatch.setattr(load_shedder, "queue_size", 0)
+
+        response = client.get("/pokemons/25", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert int(response.headers["Retry-After"]) >= 1
+        assert load_shedder.shed == 1
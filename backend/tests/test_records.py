@@ -0,0 +1,139 @@
+"""
+Record Tests
+Tests for normalizing pokemon details into compact records and serving them from the cache
+"""
+import json
+import pickle
+import tracemalloc
+from app.core.serialization import json_dumps
+from app.infrastructure.payload import Payload
+from app.services.pokemon_service import pokemon_service
+from app.services.records import PackedRows, PokemonRecord, ResourceTables, compact_document, freeze, thaw
+from benchmarks.stub_upstream import FakePokeAPI
+
+
+def record_of(document: dict, tables: ResourceTables) -> PokemonRecord:
+    """Normalize a detail document with the given tables"""
+    return PokemonRecord.from_payload(Payload(body=json.dumps(document).encode()), tables)
+
+
+class TestNormalization:
+    """Test suite for PokemonRecord round trips"""
+
+    def test_renders_same_document(self):
+        """Test that a record renders the upstream document, key order included"""
+        document = FakePokeAPI(moves=30).detail_payload(25)
+        tables = ResourceTables()
+        record = record_of(document, tables)
+
+        assert json_dumps(record.to_dict(tables=tables)) == json_dumps(document)
+
+    def test_rows_packed_and_resources_shared(self):
+        """Test that repeated rows are packed and resources are stored once across records"""
+        tables = ResourceTables()
+        api = FakePokeAPI(moves=30)
+        first, second = record_of(api.detail_payload(1), tables), record_of(api.detail_payload(2), tables)
+        values = dict(zip(first.keys, first.values))
+
+        assert isinstance(values["moves"], PackedRows)
+        assert isinstance(values["stats"], PackedRows)
+        assert first.keys is second.keys
+        assert len(tables["stat"]) == 6
+        assert first.to_dict(tables=tables)["stats"][0]["stat"] is second.to_dict(tables=tables)["stats"][0]["stat"]
+
+    def test_irregular_rows_kept_as_is(self):
+        """Test that rows of mixed shapes, strings or floats fall back to plain values"""
+        tables = ResourceTables()
+        values = [
+            [{"a": 1}, {"b": 2}],
+            [{"a": 1, "b": "text"}],
+            [{"a": 1.5}],
+            [{"a": 1}, {"a": True}],
+            [{"a": []}],
+        ]
+        for value in values:
+            frozen = freeze(value, tables)
+            assert not isinstance(frozen, PackedRows)
+            assert thaw(frozen, tables) == value
+
+    def test_conflicting_resource_not_merged(self):
+        """Test that a resource ID seen with another name keeps its own copy"""
+        tables = ResourceTables()
+        url = "https://pokeapi.co/api/v2/type/13/"
+        rows = [{"slot": 1, "type": {"name": "electric", "url": url}}]
+        renamed = [{"slot": 1, "type": {"name": "electrik", "url": url}}]
+        freeze(rows, tables)
+
+        assert thaw(freeze(renamed, tables), tables) == renamed
+
+    def test_nullable_and_boolean_columns(self):
+        """Test that None and booleans survive packing"""
+        tables = ResourceTables()
+        rows = [{"order": None, "is_hidden": False}, {"order": 3, "is_hidden": True}]
+        frozen = freeze(rows, tables)
+
+        assert isinstance(frozen, PackedRows)
+        assert thaw(frozen, tables) == rows
+
+    def test_pickles_as_document(self):
+        """Test that a record survives the shared cache tiers with its validators"""
+        document = FakePokeAPI().detail_payload(25)
+        record = PokemonRecord.from_payload(
+            Payload(body=json.dumps(document).encode(), upstream_etag='"abc"', created_at=123.0)
+        )
+        restored = pickle.loads(pickle.dumps(record))
+
+        assert restored.to_dict() == document
+        assert restored.conditional_headers() == {"If-None-Match": '"abc"'}
+        assert restored.created_at == 123.0
+
+    def test_smaller_than_upstream_bytes(self):
+        """Test that a cached record holds several times less memory than the upstream body"""
+        api = FakePokeAPI(moves=80)
+        bodies = [json.dumps(api.detail_payload(i)).encode() for i in range(1, 51)]
+        tables = ResourceTables()
+        PokemonRecord.from_payload(Payload(body=bodies[0]), tables)
+
+        tracemalloc.start()
+        records = [PokemonRecord.from_payload(Payload(body=body), tables) for body in bodies]
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(records) == 50
+        assert held * 3 < sum(len(json_dumps(json.loads(body))) for body in bodies)
+
+    def test_compact_document(self):
+        """Test that only resources of the given kinds are replaced by their IDs"""
+        document = FakePokeAPI(moves=3).detail_payload(25)
+        compact = compact_document(document, ("move", "type"))
+
+        assert [move["move"] for move in compact["moves"]] == [26, 27, 28]
+        assert [t["type"] for t in compact["types"]] == [8]
+        assert compact["abilities"] == document["abilities"]
+        assert compact["moves"][0]["version_group_details"] == document["moves"][0]["version_group_details"]
+
+
+class TestServiceRecords:
+    """Test suite for details cached as records"""
+
+    def test_cache_holds_record(self, client, auth_headers, fake_pokeapi):
+        """Test that details are cached as records and rendered with a stable ETag"""
+        first = client.get("/pokemons/pikachu", headers=auth_headers)
+        second = client.get("/pokemons/25", headers=auth_headers)
+
+        assert isinstance(pokemon_service.cache.memory._entries["pokemon:25"][0], PokemonRecord)
+        assert second.json() == first.json() == json.loads(fake_pokeapi.handle("/api/v2/pokemon/25")[1])
+        assert second.headers["etag"] == first.headers["etag"]
+        assert fake_pokeapi.calls == ["/api/v2/pokemon/pikachu"]
+
+    def test_rendered_payload_reused(self, client, auth_headers, fake_pokeapi):
+        """Test that a hot record is rendered and compressed once"""
+        headers = {**auth_headers, "Accept-Encoding": "gzip"}
+        client.get("/pokemons/25", headers=headers)
+        rendered = pokemon_service.rendered[25][1]
+        client.get("/pokemons/25", headers=headers)
+
+        assert pokemon_service.rendered[25][1] is rendered
+        assert rendered.is_encoded("gzip")
+        # Only bytes are kept for rendered details, not the document's dicts
+        assert rendered._data is None
@@ -0,0 +1,387 @@
+"""
+Resilience Tests
+Tests for the PokeAPI circuit breaker, adaptive timeouts, retries and hedging
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from app.infrastructure import pokeapi_client as pokeapi_client_module
+from app.infrastructure.pokeapi_client import PokeAPIClient, pokeapi_client
+from app.infrastructure.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker, RetryBudget, backoff_delay,
+)
+from benchmarks.stub_upstream import FakePokeAPI, StubUpstream
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=0.5, min_calls=4, window_seconds=30, open_seconds=10)
+
+
+class TestCircuitBreaker:
+    """Test suite for breaker state transitions"""
+
+    def test_opens_at_failure_threshold(self):
+        """Test that the breaker opens once enough calls failed in the window"""
+        breaker = make_breaker()
+        for failed in (False, True, False):
+            breaker.allow()
+            breaker.record_failure() if failed else breaker.record_success()
+        assert breaker.state == CLOSED
+
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.rejected == 1
+
+    def test_half_open_probe(self, monkeypatch):
+        """Test that after open_seconds one probe is let through and decides the state"""
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.allow()
+            breaker.record_failure()
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + 22)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_released_probe_can_be_retried(self, monkeypatch):
+        """Test that a cancelled probe does not leave the breaker stuck half-open"""
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.allow()
+            breaker.record_failure()
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+
+        assert breaker.allow()
+        breaker.release()
+        assert breaker.allow()
+
+
+class TestLatencyTracker:
+    """Test suite for adaptive timeouts"""
+
+    def test_uses_maximum_until_enough_samples(self):
+        """Test that the configured timeout applies before min_samples latencies"""
+        tracker = LatencyTracker(maximum=30, minimum=1, min_samples=10)
+        for _ in range(9):
+            tracker.observe(0.2)
+
+        assert tracker.timeout() == 30
+
+    def test_adapts_to_percentile(self):
+        """Test that the timeout follows the latency percentile within its bounds"""
+        tracker = LatencyTracker(maximum=30, minimum=0.5, percentile=99, multiplier=3, min_samples=10)
+        for i in range(100):
+            tracker.observe(0.5 if i == 99 else 0.1)
+        assert tracker.timeout() == pytest.approx(0.5)
+
+        for _ in range(10):
+            tracker.observe(2.0)
+        assert tracker.timeout() == pytest.approx(6.0)
+
+    def test_timeouts_raise_timeout_and_fall_back(self):
+        """Test that timed-out attempts count as latency and repeated ones restore the maximum"""
+        tracker = LatencyTracker(maximum=30, minimum=0.05, percentile=99, multiplier=3, min_samples=10, fallback_after=3)
+        for _ in range(100):
+            tracker.observe(0.01)
+        assert tracker.timeout() == pytest.approx(0.05)
+
+        tracker.observe_timeout(0.05)
+        tracker.observe_timeout(0.05)
+        assert tracker.timeout() == pytest.approx(0.15)
+        tracker.observe_timeout(0.15)
+        assert tracker.timeout() == 30
+
+        # The recorded timeouts still count, so the timeout stays above them
+        tracker.observe(0.2)
+        assert tracker.timeout() == pytest.approx(0.45)
+
+
+class TestPokeAPIClientResilience:
+    """Test suite for the breaker and timeouts in PokeAPIClient"""
+
+    async def test_fails_fast_when_open(self, monkeypatch):
+        """Test that once the breaker opens, calls are rejected without reaching PokeAPI"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(502)
+
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.breaker = make_breaker()
+        for _ in range(4):
+            with pytest.raises(HTTPException):
+                await client.fetch_pokemon("25")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await client.fetch_pokemon("25")
+
+        assert len(calls) == 4
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert int(exc_info.value.headers["Retry-After"]) >= 1
+        await client.close()
+
+    async def test_not_found_counts_as_success(self):
+        """Test that 404s from PokeAPI never open the breaker"""
+        api = FakePokeAPI()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status_code, body, headers = api.handle(request.url.raw_path.decode())
+            return httpx.Response(status_code, content=body, headers=headers)
+
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.base_url = api.base_url
+        client.breaker = make_breaker()
+        for _ in range(6):
+            with pytest.raises(HTTPException):
+                await client.fetch_pokemon("missingno")
+
+        assert client.breaker.state == CLOSED
+        await client.close()
+
+    async def test_spent_deadline_does_not_open_breaker(self, monkeypatch):
+        """Test that calls whose deadline ran out before sending are not counted against PokeAPI"""
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(200, json={})
+
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_DEADLINE", 0)
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.breaker = make_breaker()
+        for _ in range(6):
+            with pytest.raises(HTTPException) as exc_info:
+                await client.fetch_pokemon("25")
+            assert exc_info.value.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+        assert calls == []
+        assert client.breaker.state == CLOSED
+        await client.close()
+
+    async def test_timeout_adapts_per_kind(self, monkeypatch):
+        """Test that requests carry a timeout derived from that kind's observed latency"""
+        api = FakePokeAPI()
+        timeouts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            timeouts.append(request.extensions["timeout"]["read"])
+            status_code, body, headers = api.handle(request.url.raw_path.decode())
+            return httpx.Response(status_code, content=body, headers=headers)
+
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.base_url = api.base_url
+        tracker = client.latency_for("detail")
+        for _ in range(tracker.min_samples):
+            tracker.observe(0.01)
+
+        await client.fetch_pokemon("25")
+        await client.fetch_pokemons(limit=5)
+
+        assert timeouts[0] == pytest.approx(tracker.minimum)
+        assert timeouts[1] == pytest.approx(client.timeout, abs=0.1)
+        await client.close()
+
+    async def test_half_open_probe_uses_full_timeout(self):
+        """Test that a breaker probe is not cut short by the learned timeout"""
+        api = FakePokeAPI()
+        timeouts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            timeouts.append(request.extensions["timeout"]["read"])
+            status_code, body, headers = api.handle(request.url.raw_path.decode())
+            return httpx.Response(status_code, content=body, headers=headers)
+
+        client = PokeAPIClient(transport=httpx.MockTransport(handler))
+        client.base_url = api.base_url
+        client.breaker = make_breaker()
+        tracker = client.latency_for("detail")
+        for _ in range(tracker.min_samples):
+            tracker.observe(0.01)
+        client.breaker.state = HALF_OPEN
+
+        await client.fetch_pokemon("25")
+
+        assert timeouts == [pytest.approx(client.timeout, abs=0.1)]
+        assert client.breaker.state == CLOSED
+        await client.close()
+
+
+class TestHealthReportsBreaker:
+    """Test suite for breaker state on /health"""
+
+    def test_health_degraded_while_open(self, client, fake_pokeapi):
+        """Test that /health reports the breaker state and a degraded status while open"""
+        healthy = client.get("/health").json()
+        assert healthy["status"] == "healthy"
+        assert healthy["upstream"]["circuit_breaker"]["state"] == CLOSED
+
+        pokeapi_client.breaker._open()
+        degraded = client.get("/health").json()
+
+        assert degraded["status"] == "degraded"
+        assert degraded["upstream"]["circuit_breaker"]["state"] == OPEN
+        pokeapi_client.breaker.reset()
+
+
+@pytest.fixture
+async def stub():
+    """
+    Fault-injecting PokeAPI stub server on a local port
+    """
+    server = StubUpstream(seed=7)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+async def stub_client(stub, monkeypatch):
+    """
+    PokeAPIClient pointed at the stub, with near-zero backoff and no breaker
+    """
+    monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_BREAKER_ENABLED", False)
+    monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_RETRY_BACKOFF_BASE", 0.001)
+    client = PokeAPIClient()
+    client.base_url = stub.url
+    yield client
+    await client.close()
+
+
+class TestRetryPrimitives:
+    """Test suite for backoff and the retry budget"""
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test that delays stay within the exponential ceiling and the cap"""
+        delays = [backoff_delay(attempt, base=0.1, cap=0.5) for attempt in range(6) for _ in range(50)]
+
+        assert all(0 <= delay <= 0.5 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_budget_limits_extra_attempts(self):
+        """Test that withdrawals are limited to the deposited share of calls"""
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        assert budget.exhausted == 1
+
+
+class TestRetriesAgainstStub:
+    """Test suite for retries, deadlines and hedging against the stub server"""
+
+    async def test_transient_errors_are_retried(self, stub, stub_client, monkeypatch):
+        """Test that calls succeed despite a 30% upstream error rate"""
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_MAX_RETRIES", 4)
+        stub_client.retry_budget = RetryBudget(ratio=1, max_tokens=100)
+        stub.error_rate = 0.3
+
+        details = [await stub_client.get_pokemon_by_id(str(i)) for i in range(1, 21)]
+
+        assert [detail["id"] for detail in details] == list(range(1, 21))
+        assert stub_client.retries > 0
+        assert stub.requests == 20 + stub_client.retries
+
+    async def test_connection_resets_are_retried(self, stub, stub_client):
+        """Test that a dropped connection is retried like a 5xx"""
+        stub.reset_rate = 0.3
+
+        details = [await stub_client.get_pokemon_by_id(str(i)) for i in range(1, 6)]
+
+        assert len(details) == 5
+
+    async def test_budget_caps_retries_during_outage(self, stub, stub_client):
+        """Test that a total outage costs at most the budget in extra requests"""
+        stub.error_rate = 1.0
+        stub_client.retry_budget = RetryBudget(ratio=0, max_tokens=3)
+
+        for i in range(10):
+            with pytest.raises(HTTPException) as exc_info:
+                await stub_client.get_pokemon_by_id(str(i + 1))
+            assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        assert stub.requests == 10 + 3
+
+    async def test_not_found_is_not_retried(self, stub, stub_client):
+        """Test that client errors go straight back to the caller"""
+        with pytest.raises(HTTPException) as exc_info:
+            await stub_client.get_pokemon_by_id("missingno")
+
+        assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+        assert stub.requests == 1
+
+    async def test_deadline_bounds_total_time(self, stub, stub_client, monkeypatch):
+        """Test that retries never run past POKEAPI_DEADLINE"""
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_DEADLINE", 0.3)
+        stub.latency = 0.2
+        stub.error_rate = 1.0
+
+        started = time.monotonic()
+        with pytest.raises(HTTPException):
+            await stub_client.get_pokemon_by_id("25")
+
+        assert time.monotonic() - started < 0.5
+        assert stub.requests <= 2
+
+    async def test_recovers_when_latency_exceeds_learned_timeout(self, stub, stub_client, monkeypatch):
+        """Test that a step up in upstream latency past the learned timeout is not a permanent 504"""
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_MAX_RETRIES", 0)
+        tracker = stub_client.latency_for("detail")
+        tracker.minimum = 0.05
+        for _ in range(tracker.min_samples):
+            tracker.observe(0.01)
+        assert tracker.timeout() == pytest.approx(0.05)
+        stub.latency = 0.2
+
+        outcomes = []
+        for i in range(10):
+            try:
+                outcomes.append((await stub_client.get_pokemon_by_id(str(i + 1)))["id"])
+            except HTTPException as e:
+                outcomes.append(e.status_code)
+
+        # A few timeouts while the learned timeout catches up (at most until the fallback), then success
+        timed_out = next(i for i, outcome in enumerate(outcomes) if outcome != status.HTTP_504_GATEWAY_TIMEOUT)
+        assert 1 <= timed_out <= tracker.fallback_after
+        assert outcomes[timed_out:] == list(range(timed_out + 1, 11))
+        assert tracker.timeout() > 0.2
+
+    async def test_slow_request_is_hedged(self, stub, stub_client, monkeypatch):
+        """Test that a request slower than the p95 latency is raced by a second one"""
+        monkeypatch.setattr(pokeapi_client_module.settings, "POKEAPI_HEDGING", True)
+        tracker = stub_client.latency_for("detail")
+        for _ in range(tracker.min_samples):
+            tracker.observe(0.2)
+        stub.slow_rate = 1.0
+        stub.slow_latency = 1.0
+
+        started = time.monotonic()
+        fetch = asyncio.ensure_future(stub_client.get_pokemon_by_id("25"))
+        while stub.requests == 0:
+            await asyncio.sleep(0.001)
+        # Only the first request is slow
+        stub.slow_rate = 0.0
+        detail = await fetch
+
+        assert detail["id"] == 25
+        assert time.monotonic() - started < 0.8
+        assert stub_client.hedges == 1
+        assert stub.requests == 2
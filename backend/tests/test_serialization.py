@@ -0,0 +1,71 @@
+"""
+Serialization Tests
+Tests for the JSON backends and the app-wide response class
+"""
+import pytest
+from fastapi import status
+from app.core import serialization
+from app.core.serialization import ORJSON_AVAILABLE, json_dumps, json_loads
+from app.main import app
+from benchmarks.stub_upstream import FakePokeAPI
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def json_backend(request, monkeypatch):
+    """
+    Run a test once per JSON backend
+    """
+    if request.param == "orjson" and not ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(serialization.settings, "JSON_BACKEND", request.param)
+    return request.param
+
+
+class TestJsonBackends:
+    """Test suite for json_dumps / json_loads"""
+
+    def test_round_trip(self, json_backend):
+        """Test that a detail document survives encoding and decoding"""
+        detail = FakePokeAPI(moves=5).detail_payload(25)
+
+        assert json_loads(json_dumps(detail)) == detail
+        assert json_loads(memoryview(json_dumps(detail))) == detail
+
+    def test_backends_produce_identical_bytes(self, monkeypatch):
+        """Test that ETags do not change when switching backends"""
+        detail = {**FakePokeAPI(moves=5).detail_payload(25), "name": "ピカチュウ"}
+        monkeypatch.setattr(serialization.settings, "JSON_BACKEND", "stdlib")
+        stdlib = json_dumps(detail)
+        monkeypatch.setattr(serialization.settings, "JSON_BACKEND", "orjson")
+
+        assert json_dumps(detail) == stdlib
+
+    def test_orjson_missing_falls_back_to_stdlib(self, monkeypatch):
+        """Test that the default orjson backend still works when orjson is not installed"""
+        detail = FakePokeAPI(moves=5).detail_payload(25)
+        monkeypatch.setattr(serialization.settings, "JSON_BACKEND", "orjson")
+        monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+
+        assert not serialization.use_orjson()
+        assert json_loads(json_dumps(detail)) == detail
+
+
+class TestResponseClass:
+    """Test suite for the default response class"""
+
+    def test_app_default_response_class(self):
+        """Test that every route renders plain dict responses with FastJSONResponse"""
+        routes = [route for route in app.routes if hasattr(route, "response_class")]
+
+        assert routes
+        assert all(route.response_class is serialization.FastJSONResponse for route in routes)
+
+    def test_batch_rendered(self, client, auth_headers, fake_pokeapi, json_backend):
+        """Test that dict endpoints render compact JSON with either backend"""
+        response = client.get("/pokemons/batch", params={"ids": "1,25"}, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/json"
+        assert b'","' in response.content or b'":' in response.content
+        assert b'": ' not in response.content
+        assert set(response.json()["results"]) == {"1", "25"}
@@ -0,0 +1,97 @@
+"""
+Single-flight Tests
+Tests for coalescing concurrent identical upstream fetches
+"""
+import asyncio
+import pytest
+from fastapi import HTTPException, status
+from app.infrastructure.singleflight import SingleFlight
+from app.infrastructure.payload import Payload
+from app.services.pokemon_service import PokemonService
+
+
+class SlowPokeAPIClient:
+    """Stand-in client that counts calls and answers after a short delay"""
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+
+    async def fetch_pokemon(self, pokemon_id: str, previous: Payload = None) -> Payload:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+        return Payload(data={"id": 25, "name": "pikachu"})
+
+
+class TestSingleFlight:
+    """Test suite for the single-flight group"""
+
+    async def test_concurrent_callers_share_one_call(self):
+        """Test that concurrent callers for one key run the work once"""
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+
+        assert results == ["result"] * 10
+        assert len(calls) == 1
+        assert flight.coalesced == 9
+        assert flight.in_flight() == 0
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test that cancelling one waiter leaves the shared call running"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "result"
+
+
+class TestPokemonServiceSingleFlight:
+    """Test suite for coalescing in the pokemon service"""
+
+    async def test_concurrent_detail_requests_hit_upstream_once(self):
+        """Test that a burst of identical detail requests makes one upstream call"""
+        upstream = SlowPokeAPIClient()
+        service = PokemonService(upstream)
+
+        results = await asyncio.gather(*(service.get_pokemon_detail("25") for _ in range(50)))
+
+        assert upstream.calls == 1
+        assert all(result.data["name"] == "pikachu" for result in results)
+
+    @pytest.mark.parametrize(
+        "status_code",
+        [status.HTTP_404_NOT_FOUND, status.HTTP_504_GATEWAY_TIMEOUT],
+    )
+    async def test_errors_propagate_to_every_waiter(self, status_code):
+        """Test that a mapped HTTPException reaches all coalesced callers"""
+        upstream = SlowPokeAPIClient(error=HTTPException(status_code=status_code, detail="upstream"))
+        service = PokemonService(upstream)
+
+        results = await asyncio.gather(
+            *(service.get_pokemon_detail("missingno") for _ in range(5)),
+            return_exceptions=True,
+        )
+
+        assert upstream.calls == 1
+        assert all(isinstance(r, HTTPException) and r.status_code == status_code for r in results)
+
+        # Failures are not cached: the next call goes upstream again
+        with pytest.raises(HTTPException):
+            await service.get_pokemon_detail("missingno")
+        assert upstream.calls == 2
@@ -0,0 +1,115 @@
+"""
+Snapshot Tests
+Tests for the offline snapshot builder and the memory-mapped snapshot client
+"""
+import pytest
+from fastapi import HTTPException, status
+from app.infrastructure import snapshot as snapshot_module
+from app.infrastructure.pokeapi_client import pokeapi_client
+from app.infrastructure.snapshot import SnapshotPokeAPIClient
+from app.services.pokemon_service import PokemonService
+from app.tools.snapshot import build_snapshot
+from benchmarks.stub_upstream import ABILITY_NAMES
+
+
+@pytest.fixture
+async def snapshot_client(fake_pokeapi, tmp_path):
+    """Crawl the fake PokeAPI into a snapshot file and open it"""
+    path = str(tmp_path / "catalog.snap")
+    written = await build_snapshot(pokeapi_client, path, concurrency=8)
+    assert written == fake_pokeapi.count
+
+    # Every further read must come from the file, not the upstream
+    fake_pokeapi.fail_with = AssertionError("snapshot client made a network call")
+    client = SnapshotPokeAPIClient(path)
+    await client.start()
+    yield client
+    await client.close()
+
+
+class TestSnapshotClient:
+    """Test suite for reads served from a snapshot"""
+
+    async def test_detail_by_id_and_name(self, snapshot_client, fake_pokeapi):
+        """Test point reads by numeric ID and by name"""
+        by_id = await snapshot_client.get_pokemon_by_id("25")
+        by_name = await snapshot_client.get_pokemon_by_id("Pikachu")
+
+        assert by_id == by_name == fake_pokeapi.detail_payload(25)
+
+    async def test_missing_pokemon(self, snapshot_client):
+        """Test that unknown pokemons raise 404"""
+        for pokemon_id in ("99999", "missingno"):
+            with pytest.raises(HTTPException) as exc_info:
+                await snapshot_client.get_pokemon_by_id(pokemon_id)
+            assert exc_info.value.status_code == status.HTTP_404_NOT_FOUND
+
+    async def test_list_pages_match_upstream(self, snapshot_client, fake_pokeapi):
+        """Test that list pages are rebuilt in PokeAPI's format"""
+        page = await snapshot_client.get_pokemons(offset=20, limit=10)
+
+        assert page == fake_pokeapi.list_payload(20, 10)
+
+    async def test_types(self, snapshot_client, fake_pokeapi):
+        """Test that type membership is preserved"""
+        fire = await snapshot_client.get_type("fire")
+
+        assert [m["pokemon"] for m in fire["pokemon"]] == [
+            m["pokemon"] for m in fake_pokeapi.type_payload("fire")["pokemon"]
+        ]
+        with pytest.raises(HTTPException):
+            await snapshot_client.get_type("shadow")
+
+    async def test_resources_collected_from_details(self, snapshot_client, fake_pokeapi):
+        """Test that reference lists are rebuilt from the stored details, sorted by ID"""
+        abilities = await snapshot_client.get_resources("ability")
+        moves = await snapshot_client.get_resources("move")
+
+        assert abilities["results"] == fake_pokeapi.resource_list_payload("ability", ABILITY_NAMES)["results"]
+        ids = [int(move["url"].rstrip("/").rsplit("/", 1)[1]) for move in moves["results"]]
+        assert ids == sorted(ids) and len(ids) == moves["count"]
+        with pytest.raises(HTTPException):
+            await snapshot_client.get_resources("stat")
+
+    async def test_resources_stored_in_metadata(self, snapshot_client, monkeypatch):
+        """Test that reference lists come from the metadata without parsing any detail"""
+        monkeypatch.setattr(snapshot_module, "json_loads", None)
+        types = await snapshot_client.get_resources("type")
+
+        assert types["count"] == len(snapshot_client._metadata["resources"]["type"]) > 0
+
+    async def test_older_snapshot_scanned_once(self, snapshot_client, monkeypatch):
+        """Test that a snapshot without stored lists is scanned a single time, then memoized"""
+        scans = []
+        collect_resources = snapshot_module.collect_resources
+
+        def collect(details):
+            scans.append(1)
+            return collect_resources(details)
+
+        snapshot_client._resources = None
+        monkeypatch.setattr(snapshot_module, "collect_resources", collect)
+        moves = await snapshot_client.get_resources("move")
+        abilities = await snapshot_client.get_resources("ability")
+
+        assert moves["results"] == snapshot_client._metadata["resources"]["move"]
+        assert abilities["count"] > 0
+        assert len(scans) == 1
+
+    async def test_service_search_runs_offline(self, snapshot_client):
+        """Test that the service, including the catalog index, works from a snapshot"""
+        service = PokemonService(snapshot_client)
+
+        page = await service.search_pokemons(search="char", sort="-id")
+        detail = await service.get_pokemon_detail("charmander")
+
+        assert [item["name"] for item in page["results"]] == ["charizard", "charmeleon", "charmander"]
+        assert detail.data["id"] == 4
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the snapshot header is refused"""
+        path = tmp_path / "not-a-snapshot"
+        path.write_bytes(b"\0" * 64)
+
+        with pytest.raises(ValueError):
+            SnapshotPokeAPIClient(str(path))._open()
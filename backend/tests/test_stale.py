@@ -0,0 +1,153 @@
+"""
+Stale Serving Tests
+Tests for stale-while-revalidate and serve-stale-on-error in the pokemon service
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import HTTPException, status
+from app.infrastructure.cache import MemoryCache, TieredCache
+from app.infrastructure.payload import Payload
+from app.services import pokemon_service as pokemon_service_module
+from app.services.pokemon_service import PokemonService, pokemon_service
+
+
+class FlakyPokeAPIClient:
+    """Stand-in client whose answers (data, error or delay) can be changed between calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.name = "pikachu"
+        self.error = None
+        self.delay = 0.0
+
+    async def fetch_pokemon(self, pokemon_id: str, previous: Payload = None) -> Payload:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return Payload(data={"id": 25, "name": self.name})
+
+
+def expire(cache: MemoryCache, stale_for: float) -> None:
+    """Make every entry look expired by stale_for seconds (the event loop needs the real clock)"""
+    for key, (value, _) in list(cache._entries.items()):
+        cache._entries[key] = (value, time.monotonic() - stale_for)
+
+
+@pytest.fixture
+def service():
+    """
+    Pokemon service over a flaky upstream with a memory-only cache
+    """
+    service = PokemonService(FlakyPokeAPIClient(), cache=TieredCache(MemoryCache(100, 60)))
+    service.prefetcher.rate_per_second = 1000
+    return service
+
+
+class TestStaleWhileRevalidate:
+    """Test suite for serving expired entries while refreshing them"""
+
+    async def test_expired_entry_served_and_refreshed(self, service):
+        """Test that an entry just past expiry is returned at once and refreshed in the background"""
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.name = "raichu"
+        expire(service.cache.memory, 10)
+
+        stale = await service.get_pokemon_detail("25")
+        assert stale.stale == "revalidating"
+        assert stale.data["name"] == "pikachu"
+
+        await service.revalidator.join()
+        fresh = await service.get_pokemon_detail("25")
+        assert fresh.stale is None
+        assert fresh.data["name"] == "raichu"
+        assert service.pokeapi_client.calls == 2
+        assert service.cache_stats()["stale_served"] == {"revalidating": 1}
+
+    async def test_refresh_not_dropped_when_prefetch_queue_full(self, service):
+        """Test that a full speculative prefetch queue does not stop stale entries from being refreshed"""
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.name = "raichu"
+        expire(service.cache.memory, 10)
+        blocker = asyncio.Event()
+        service.prefetcher.max_pending = 1
+        service.prefetcher.schedule("busy", blocker.wait)
+
+        assert (await service.get_pokemon_detail("25")).stale == "revalidating"
+        await service.revalidator.join()
+
+        assert (await service.get_pokemon_detail("25")).data["name"] == "raichu"
+        assert service.prefetcher.dropped == 0
+        blocker.set()
+        await service.prefetcher.join()
+
+
+class TestStaleIfError:
+    """Test suite for falling back to the last good copy when PokeAPI fails"""
+
+    @pytest.mark.parametrize(
+        "status_code",
+        [status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_504_GATEWAY_TIMEOUT],
+    )
+    async def test_upstream_error_serves_last_good_copy(self, service, status_code):
+        """Test that a 5xx from the refresh is answered with the expired copy"""
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.error = HTTPException(status_code=status_code, detail="upstream")
+        expire(service.cache.memory, 3600)
+
+        payload = await service.get_pokemon_detail("25")
+
+        assert payload.stale == "error"
+        assert payload.data["name"] == "pikachu"
+
+    async def test_slow_upstream_does_not_block(self, service, monkeypatch):
+        """Test that a hanging refresh is abandoned after CACHE_STALE_IF_ERROR_WAIT"""
+        monkeypatch.setattr(pokemon_service_module.settings, "CACHE_STALE_IF_ERROR_WAIT", 0.05)
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.delay = 0.5
+        expire(service.cache.memory, 3600)
+
+        started = asyncio.get_running_loop().time()
+        payload = await service.get_pokemon_detail("25", view="summary")
+
+        assert asyncio.get_running_loop().time() - started < 0.3
+        assert payload.stale == "error"
+        assert payload.data == {"id": 25, "name": "pikachu"}
+
+    async def test_too_stale_is_not_served(self, service, monkeypatch):
+        """Test that copies older than CACHE_STALE_IF_ERROR are never served"""
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.error = HTTPException(status_code=503, detail="upstream")
+        expire(service.cache.memory, pokemon_service_module.settings.CACHE_STALE_IF_ERROR + 1)
+
+        with pytest.raises(HTTPException):
+            await service.get_pokemon_detail("25")
+
+    async def test_not_found_is_not_masked(self, service):
+        """Test that client errors from PokeAPI still propagate"""
+        await service.get_pokemon_detail("25")
+        service.pokeapi_client.error = HTTPException(status_code=404, detail="Pokemon not found")
+        expire(service.cache.memory, 3600)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_pokemon_detail("25")
+        assert exc_info.value.status_code == 404
+
+
+class TestStaleHeaders:
+    """Test suite for marking stale responses"""
+
+    def test_warning_header_on_upstream_outage(self, client, auth_headers, fake_pokeapi):
+        """Test that a stale copy served during an outage carries Warning 111"""
+        first = client.get("/pokemons/25", headers=auth_headers)
+        fake_pokeapi.fail_with = httpx.ConnectError("upstream down")
+        expire(pokemon_service.cache.memory, 3600)
+
+        response = client.get("/pokemons/25", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["warning"] == '111 - "Revalidation Failed"'
+        assert response.content == first.content
+        assert "warning" not in first.headers
@@ -0,0 +1,142 @@
+"""
+Tracing Tests
+Tests for request spans, the Server-Timing header, the JSONL trace log and the debug profiler
+"""
+import json
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import tracing as tracing_module
+from app.api.tracing import TracingMiddleware
+from app.core.tracing import Trace, TraceLog, current_trace, span, traced
+
+
+def build_app(**kwargs) -> FastAPI:
+    """Minimal app with one traced route, wrapped in TracingMiddleware"""
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, **kwargs)
+
+    @traced("service")
+    async def work() -> dict:
+        with span("upstream"):
+            time.sleep(0.02)
+        return {"ok": True}
+
+    @app.get("/work")
+    async def endpoint():
+        return await work()
+
+    return app
+
+
+def timings(header: str) -> dict:
+    """Parse a Server-Timing header into {name: milliseconds}"""
+    result = {}
+    for metric in header.split(","):
+        name, _, duration = metric.strip().partition(";dur=")
+        result[name] = float(duration)
+    return result
+
+
+class TestSpans:
+    """Test suite for span recording"""
+
+    def test_no_trace_is_a_no_op(self):
+        """Test that spans outside a request share one no-op object"""
+        assert span("cache") is span("upstream")
+
+    def test_nested_spans_and_server_timing(self):
+        """Test that spans record their parent and are summed per name"""
+        trace = Trace()
+        token = current_trace.set(trace)
+        try:
+            with span("service"):
+                with span("upstream"):
+                    pass
+                with span("upstream"):
+                    pass
+        finally:
+            current_trace.reset(token)
+
+        assert [(name, parent) for name, _, _, parent in trace.spans] == [
+            ("upstream", "service"), ("upstream", "service"), ("service", None),
+        ]
+        assert list(timings(trace.server_timing())) == ["upstream", "service", "total"]
+
+    def test_finished_trace_ignores_late_spans(self):
+        """Test that background work outliving the request does not extend its trace"""
+        trace = Trace()
+        trace.finished = True
+        trace.record("upstream", trace.started, 1.0, None)
+
+        assert trace.spans == []
+
+
+class TestTracingMiddleware:
+    """Test suite for the per-request trace"""
+
+    def test_server_timing_header(self):
+        """Test that responses report per-span durations and the total"""
+        response = TestClient(build_app()).get("/work")
+        reported = timings(response.headers["server-timing"])
+
+        assert reported["upstream"] >= 20
+        assert reported["service"] >= reported["upstream"]
+        assert reported["total"] >= reported["service"]
+
+    def test_layers_of_a_detail_request(self, client, auth_headers, fake_pokeapi):
+        """Test that a detail request is broken down into auth, service, cache and upstream"""
+        response = client.get("/pokemons/25", headers=auth_headers)
+
+        assert {"auth", "service", "cache", "upstream", "serialize", "total"} <= set(
+            timings(response.headers["server-timing"])
+        )
+
+    def test_sampled_traces_written_as_jsonl(self, tmp_path):
+        """Test that sampled requests are appended to the trace log"""
+        log = TraceLog(str(tmp_path / "traces" / "requests.jsonl"))
+        client = TestClient(build_app(sample_rate=1.0, log=log))
+        client.get("/work")
+        client.get("/work")
+        log.close()
+
+        records = [json.loads(line) for line in (tmp_path / "traces" / "requests.jsonl").read_text().splitlines()]
+        assert len(records) == 2
+        assert records[0]["path"] == "/work"
+        assert records[0]["status"] == 200
+        assert [s["name"] for s in records[0]["spans"]] == ["upstream", "service"]
+        assert records[0]["trace_id"] != records[1]["trace_id"]
+
+    def test_unsampled_traces_not_written(self, tmp_path):
+        """Test that a zero sample rate writes nothing"""
+        log = TraceLog(str(tmp_path / "requests.jsonl"))
+        TestClient(build_app(sample_rate=0.0, log=log)).get("/work")
+
+        assert not (tmp_path / "requests.jsonl").exists()
+
+
+class TestProfiler:
+    """Test suite for the debug-mode request profiler"""
+
+    def test_profile_written_on_request(self, tmp_path, monkeypatch):
+        """Test that X-Profile: 1 in debug mode produces a collapsed-stack file"""
+        monkeypatch.setattr(tracing_module.settings, "DEBUG", True)
+        monkeypatch.setattr(tracing_module.settings, "PROFILE_DIR", str(tmp_path))
+
+        response = TestClient(build_app()).get("/work", headers={"X-Profile": "1"})
+
+        path = response.headers["x-profile-file"]
+        lines = open(path).read().splitlines()
+        assert lines
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+        assert any("work (" in line for line in lines)
+
+    def test_ignored_outside_debug(self, tmp_path, monkeypatch):
+        """Test that the profiler cannot be triggered in production"""
+        monkeypatch.setattr(tracing_module.settings, "DEBUG", False)
+        monkeypatch.setattr(tracing_module.settings, "PROFILE_DIR", str(tmp_path))
+
+        response = TestClient(build_app()).get("/work?profile=1")
+
+        assert "x-profile-file" not in response.headers
+        assert list(tmp_path.iterdir()) == []